@@ -5,484 +5,377 @@ FINAL CORRECTED VERSION:
 1. Team UNDER bets: Clear evidence → UNDER 1.5, Unclear → UNDER 2.5
 2. Control detection fixed with epsilon for floating point comparison
 3. All fixes applied while preserving original interface
+
+Streamlit frontend; the engines live in brutball_core.
 """
 
-import pandas as pd
-import numpy as np
-from typing import Dict, List, Optional, Tuple
-import json
+import threading
 from datetime import datetime
-import os
+from typing import Dict, Tuple
+
 import streamlit as st
 
+from brutball_core import BrutballCertaintyEngine, BrutballDataLoader, MatchAnalysisCache
+from league_catalog import LeagueCatalog
+
+# Engine names importable from app before they moved to brutball_core
+from brutball_core import (  # noqa: F401
+    CERTAINTY_TRANSFORMATIONS, CONTROL_CRITERIA_REQUIRED, DIRECTION_THRESHOLD, ENFORCEMENT_METHODS_REQUIRED,
+    LEAGUE_CACHE_DIRNAME, LEAGUE_CACHE_FORMAT, QUIET_CONTROL_SEPARATION_THRESHOLD,
+    STATE_FLIP_FAILURES_REQUIRED, TOTALS_LOCK_THRESHOLD, BrutballCertaintyEngine, BrutballDataLoader,
+    CertaintyTransformationEngine, EdgeDerivedLocks, EdgeDetectionEngine, LeagueDataCache
+)
+
 # ============================================================================
-# SYSTEM CONSTANTS (IMMUTABLE)
+# STREAMLIT APP WITH ENHANCED FRONTEND (EXACTLY YOUR INTERFACE)
 # ============================================================================
 
-# GATE THRESHOLDS
-CONTROL_CRITERIA_REQUIRED = 2
-QUIET_CONTROL_SEPARATION_THRESHOLD = 0.1
-DIRECTION_THRESHOLD = 0.25
-STATE_FLIP_FAILURES_REQUIRED = 2
-ENFORCEMENT_METHODS_REQUIRED = 2
-TOTALS_LOCK_THRESHOLD = 1.2
+@st.cache_resource(show_spinner=False)
+def get_match_analysis_cache() -> MatchAnalysisCache:
+    """Process-wide memo of match detections (survives script reruns)"""
+    return MatchAnalysisCache(maxsize=2048)
 
-# CERTAINTY TRANSFORMATION RULES (100% Win Rate Strategy)
-CERTAINTY_TRANSFORMATIONS = {
-    "BACK HOME & OVER 2.5": {
-        'certainty_bet': "HOME DOUBLE CHANCE & OVER 1.5",
-        'odds_range': "1.25-1.40",
-        'historical_wins': "19/19",
-        'win_rate': "100%",
-        'reason': "Covers win/draw AND 2+ goals",
-        'icon': "🛡️",
-        'stake_multiplier': 2.0
-    },
-    "BACK AWAY & OVER 2.5": {
-        'certainty_bet': "AWAY DOUBLE CHANCE & OVER 1.5",
-        'odds_range': "1.30-1.45",
-        'historical_wins': "19/19",
-        'win_rate': "100%",
-        'reason': "Covers win/draw AND 2+ goals",
-        'icon': "🛡️",
-        'stake_multiplier': 2.0
-    },
-    "BACK HOME": {
-        'certainty_bet': "HOME DOUBLE CHANCE",
-        'odds_range': "1.15-1.25",
-        'historical_wins': "19/19",
-        'win_rate': "100%",
-        'reason': "Covers win OR draw",
-        'icon': "🎯",
-        'stake_multiplier': 2.0
-    },
-    "BACK AWAY": {
-        'certainty_bet': "AWAY DOUBLE CHANCE",
-        'odds_range': "1.20-1.30",
-        'historical_wins': "19/19",
-        'win_rate': "100%",
-        'reason': "Covers win OR draw",
-        'icon': "🎯",
-        'stake_multiplier': 2.0
-    },
-    "OVER 2.5": {
-        'certainty_bet': "OVER 1.5",
-        'odds_range': "1.10-1.20",
-        'historical_wins': "5/5",
-        'win_rate': "100%",
-        'reason': "Safer line: only 2+ goals needed",
-        'icon': "📈",
-        'stake_multiplier': 2.0
-    },
-    "UNDER 2.5": {
-        'certainty_bet': "UNDER 3.5",
-        'odds_range': "1.20-1.30",
-        'historical_wins': "5/5",
-        'win_rate': "100%",
-        'reason': "Safer line: allows up to 3 goals",
-        'icon': "📉",
-        'stake_multiplier': 2.0
-    },
-    "TEAM UNDER 1.5": {
-        'certainty_bet': "TEAM UNDER 1.5",
-        'odds_range': "1.20-1.35",
-        'historical_wins': "5/5",
-        'win_rate': "100%",
-        'reason': "Perfect lock - no adjustment needed",
-        'icon': "🎯",
-        'stake_multiplier': 2.0
-    },
-    # NEW: ADDED FOR UNCLEAR EVIDENCE TEAM UNDER BETS
-    "TEAM UNDER 2.5": {
-        'certainty_bet': "TEAM UNDER 2.5",
-        'odds_range': "1.10-1.20",
-        'historical_wins': "16/16",
-        'win_rate': "100%",
-        'reason': "Safe defensive matchup bet",
-        'icon': "🎯",
-        'stake_multiplier': 1.5  # Lower multiplier for unclear evidence
-    }
-}
+@st.cache_resource(show_spinner=False)
+def get_league_catalog() -> LeagueCatalog:
+    """League metadata shared across sessions; a league file is re-validated only when it changes"""
+    return LeagueCatalog(BrutballDataLoader.LEAGUES_DIR)
 
-# ============================================================================
-# DATA LOADING & VALIDATION
-# ============================================================================
+@st.cache_resource(show_spinner=False)
+def get_engine_registry() -> Tuple[threading.Lock, Dict[str, BrutballCertaintyEngine]]:
+    """Current engine per league, shared across sessions and reruns"""
+    return threading.Lock(), {}
+
+def get_certainty_engine(league_name: str, data_version: Tuple[int, int]) -> BrutballCertaintyEngine:
+    """
+    One warm engine per league, built from the frame loaded for data_version.
+    A newer version replaces the league's engine, so superseded frames are released.
+    """
+    lock, engines = get_engine_registry()
+    with lock:
+        engine = engines.get(league_name)
+        if engine is None or engine.data_version != data_version:
+            df = BrutballDataLoader.load_league_data(league_name)
+            # Rewritten during the load: the frame may be newer than data_version, so don't memoize under it
+            if BrutballDataLoader.get_data_version(league_name) != data_version:
+                data_version = None
+            engine = BrutballCertaintyEngine(league_name, df=df, data_version=data_version,
+                                             analysis_cache=get_match_analysis_cache())
+            engines[league_name] = engine
+    return engine
 
-class BrutballDataLoader:
-    """Loads and validates CSV data"""
+# Fragment reruns need Streamlit >= 1.37; older versions rerun the whole page as before
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
+
+# Session key of the last analysis: (selection, analyze_match result)
+ANALYSIS_STATE_KEY = "certainty_analysis"
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def render_bet_card(rec: Dict) -> str:
+    """Card HTML for one recommendation, cached by the recommendation's content"""
+    # Determine border color based on bet type
+    if 'UNDER 1.5' in rec['certainty_bet']:
+        border_color = "#4CAF50"  # Green for clear evidence
+        evidence_badge = '<span class="evidence-badge evidence-clear">CLEAR EVIDENCE</span>'
+    elif 'UNDER 2.5' in rec['certainty_bet']:
+        border_color = "#FF9800"  # Orange for unclear evidence
+        evidence_badge = '<span class="evidence-badge evidence-unclear">UNCLEAR EVIDENCE</span>'
+    elif rec['priority'] == 1:
+        border_color = "#667eea"  # Blue for main bet
+        evidence_badge = ''
+    else:
+        border_color = "#2196F3"  # Light blue for secondary
+        evidence_badge = ''
     
-    REQUIRED_COLUMNS = [
-        'team', 'home_matches_played', 'away_matches_played',
-        'home_goals_scored', 'away_goals_scored',
-        'home_goals_conceded', 'away_goals_conceded',
-        'home_xg_for', 'away_xg_for',
-        'home_xg_against', 'away_xg_against',
-        'goals_scored_last_5', 'goals_conceded_last_5',
-        'home_goals_conceded_last_5', 'away_goals_conceded_last_5'
-    ]
+    # Determine stake badge color based on multiplier
+    if rec['stake_multiplier'] >= 2.0:
+        stake_badge_color = "#10b981"  # Green
+    elif rec['stake_multiplier'] >= 1.5:
+        stake_badge_color = "#f59e0b"  # Orange
+    else:
+        stake_badge_color = "#6b7280"  # Gray
     
-    @staticmethod
-    def load_league_data(league_name: str) -> pd.DataFrame:
-        csv_path = f"leagues/{league_name}.csv"
-        if not os.path.exists(csv_path):
-            raise FileNotFoundError(f"CSV not found: {csv_path}")
-        
-        df = pd.read_csv(csv_path)
-        missing_cols = [col for col in BrutballDataLoader.REQUIRED_COLUMNS 
-                       if col not in df.columns]
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {missing_cols}")
-        
-        return df
+    card_html = f"""
+    <div class="bet-card" style="border-left-color: {border_color};">
+        <div class="priority-badge">P{rec['priority']}</div>
+        <div style="display: flex; justify-content: space-between; align-items: start;">
+            <div style="flex: 1;">
+                <div style="display: flex; align-items: center; gap: 10px; margin-bottom: 0.5rem;">
+                    <span style="font-size: 1.5rem;">{rec['icon']}</span>
+                    <h3 style="margin: 0; color: #333;">{rec['certainty_bet']} {evidence_badge}</h3>
+                    <span class="win-rate-badge">{rec['win_rate']}</span>
+                </div>
+                <div style="color: #666; margin-bottom: 1rem;">
+                    <p style="margin: 0; font-size: 0.95rem;">
+                        <strong>Reason:</strong> {rec['reason']}
+                    </p>
+                </div>
+                <div style="display: flex; gap: 1rem; flex-wrap: wrap;">
+                    <div style="display: flex; align-items: center; gap: 5px;">
+                        <span style="color: #667eea;">📈</span>
+                        <span style="font-size: 0.9rem;">Historical: {rec['historical_wins']}</span>
+                    </div>
+                    <div style="display: flex; align-items: center; gap: 5px;">
+                        <span style="color: #667eea;">💰</span>
+                        <span style="font-size: 0.9rem;">Odds: {rec['odds_range']}</span>
+                    </div>
+                    <div style="display: flex; align-items: center; gap: 5px;">
+                        <span style="color: #667eea;">⚡</span>
+                        <span style="font-size: 0.9rem;">Multiplier: {rec['stake_multiplier']}x</span>
+                    </div>
+                </div>
+            </div>
+            <div style="text-align: center; min-width: 150px;">
+                <div style="margin-bottom: 0.5rem;">
+                    <div style="font-size: 0.9rem; color: #666;">Stake</div>
+                    <div class="stake-badge" style="background: {stake_badge_color};">${rec['stake_amount']:.2f}</div>
+                </div>
+                <div style="font-size: 0.9rem; color: #666;">{rec['stake_pct']:.1f}% of bankroll</div>
+            </div>
+        </div>
+    """
     
-    @staticmethod
-    def get_team_data(df: pd.DataFrame, team_name: str) -> Dict:
-        team_row = df[df['team'] == team_name].iloc[0]
-        
-        data = {}
-        for col in df.columns:
-            val = team_row[col]
-            if pd.isna(val):
-                data[col] = None
-            elif isinstance(val, (np.integer, np.int64)):
-                data[col] = int(val)
-            elif isinstance(val, (np.floating, np.float64)):
-                data[col] = float(val)
-            else:
-                data[col] = val
-        
-        data['home_xg_per_match'] = (data['home_xg_for'] / data['home_matches_played'] 
-                                    if data['home_matches_played'] > 0 else 0)
-        data['away_xg_per_match'] = (data['away_xg_for'] / data['away_matches_played'] 
-                                    if data['away_matches_played'] > 0 else 0)
-        data['home_xga_per_match'] = (data['home_xg_against'] / data['home_matches_played'] 
-                                      if data['home_matches_played'] > 0 else 0)
-        data['away_xga_per_match'] = (data['away_xg_against'] / data['away_matches_played'] 
-                                      if data['away_matches_played'] > 0 else 0)
-        
-        data['avg_scored_last_5'] = data['goals_scored_last_5'] / 5
-        data['avg_conceded_last_5'] = data['goals_conceded_last_5'] / 5
-        data['home_avg_conceded_last_5'] = (data['home_goals_conceded_last_5'] / 5 
-                                           if data.get('home_goals_conceded_last_5') is not None 
-                                           else data['avg_conceded_last_5'])
-        data['away_avg_conceded_last_5'] = (data['away_goals_conceded_last_5'] / 5 
-                                           if data.get('away_goals_conceded_last_5') is not None 
-                                           else data['avg_conceded_last_5'])
-        
-        return data
+    if rec.get('transformation_applied', False):
+        card_html += f"""<div style="margin-top: 1rem; padding: 0.5rem; background: #f8f9fa; border-radius: 8px; font-size: 0.9rem; color: #666;"><strong>Transformed from:</strong> {rec['original_detection']}</div>"""
+    
+    card_html += "</div>"
+    return card_html
 
-# ============================================================================
-# CERTAINTY TRANSFORMATION ENGINE
-# ============================================================================
+@st.cache_data(max_entries=256, show_spinner=False)
+def render_team_stats(team: str, venue: str, xg_per_match: float, avg_scored_last_5: float,
+                      goals_conceded: float, matches_played: float) -> str:
+    """Team statistics panel HTML (venue: 'Home' or 'Away')"""
+    return f"""
+    <div class="metric-card">
+        <h4 style="color: #667eea; margin-bottom: 1rem;">{team} ({venue})</h4>
+        <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem;">
+            <div>
+                <div style="font-size: 0.9rem; color: #666;">xG per Match</div>
+                <div style="font-size: 1.3rem; font-weight: bold;">{xg_per_match:.2f}</div>
+            </div>
+            <div>
+                <div style="font-size: 0.9rem; color: #666;">Avg Scored Last 5</div>
+                <div style="font-size: 1.3rem; font-weight: bold;">{avg_scored_last_5:.2f}</div>
+            </div>
+            <div>
+                <div style="font-size: 0.9rem; color: #666;">Goals Conceded</div>
+                <div style="font-size: 1.3rem; font-weight: bold;">{goals_conceded:.0f}</div>
+            </div>
+            <div>
+                <div style="font-size: 0.9rem; color: #666;">Matches Played</div>
+                <div style="font-size: 1.3rem; font-weight: bold;">{matches_played:.0f}</div>
+            </div>
+        </div>
+    </div>
+    """
 
-class CertaintyTransformationEngine:
-    """Core engine that transforms ALL system outputs to 100% win rate strategy"""
+def render_results(result: Dict, home_team: str, away_team: str, bankroll: float) -> None:
+    """Results view of one analyze_match result (card and panel HTML come from the caches)"""
+    st.markdown(f"""
+    <div style="text-align: center; margin: 2rem 0;">
+        <h1 style="color: #333; margin-bottom: 0.5rem;">{result['match']}</h1>
+        <p style="color: #6c757d; margin-top: 0;">Analysis generated: {result['timestamp']}</p>
+    </div>
+    """, unsafe_allow_html=True)
     
-    @staticmethod
-    def transform_to_certainty(original_recommendation: str, team_specific: str = "", confidence: str = None) -> Dict:
-        """Transform ANY system recommendation to 100% win rate certainty bet"""
-        
-        # Handle Team UNDER bets with evidence-based approach
-        if "UNDER" in original_recommendation and team_specific:
-            # Determine if it's UNDER 1.5 or UNDER 2.5
-            if "UNDER 1.5" in original_recommendation:
-                specific_bet = f"{team_specific} UNDER 1.5"
-                transformation_key = "TEAM UNDER 1.5"
-            elif "UNDER 2.5" in original_recommendation:
-                specific_bet = f"{team_specific} UNDER 2.5"
-                transformation_key = "TEAM UNDER 2.5"
-            else:
-                specific_bet = f"{team_specific} {original_recommendation}"
-                transformation_key = original_recommendation
-            
-            if transformation_key in CERTAINTY_TRANSFORMATIONS:
-                certainty_data = CERTAINTY_TRANSFORMATIONS[transformation_key]
-                return {
-                    'original_detection': original_recommendation,
-                    'certainty_bet': specific_bet,
-                    'odds_range': certainty_data['odds_range'],
-                    'historical_wins': certainty_data['historical_wins'],
-                    'win_rate': certainty_data['win_rate'],
-                    'reason': certainty_data['reason'] if 'reason' in certainty_data else f"{team_specific} {original_recommendation}",
-                    'icon': certainty_data['icon'],
-                    'stake_multiplier': certainty_data['stake_multiplier'],
-                    'certainty_level': '100%',
-                    'transformation_applied': True
-                }
-        
-        # Handle other bet types
-        for original_pattern, certainty_data in CERTAINTY_TRANSFORMATIONS.items():
-            if original_pattern in original_recommendation:
-                return {
-                    'original_detection': original_recommendation,
-                    'certainty_bet': certainty_data['certainty_bet'],
-                    'odds_range': certainty_data['odds_range'],
-                    'historical_wins': certainty_data['historical_wins'],
-                    'win_rate': certainty_data['win_rate'],
-                    'reason': certainty_data['reason'],
-                    'icon': certainty_data['icon'],
-                    'stake_multiplier': certainty_data['stake_multiplier'],
-                    'certainty_level': '100%',
-                    'transformation_applied': True
-                }
-        
-        # Default fallback
-        return {
-            'original_detection': original_recommendation,
-            'certainty_bet': original_recommendation,
-            'odds_range': "1.20-1.50",
-            'historical_wins': "19/19",
-            'win_rate': "100%",
-            'reason': "Direct certainty bet",
-            'icon': "🎯",
-            'stake_multiplier': 2.0,
-            'certainty_level': '100%',
-            'transformation_applied': False
-        }
+    st.markdown("""
+    <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                color: white; padding: 1.5rem; border-radius: 12px; 
+                margin: 2rem 0; text-align: center; box-shadow: 0 8px 25px rgba(0,0,0,0.15);">
+        <div style="display: flex; align-items: center; justify-content: center; gap: 15px; margin-bottom: 0.5rem;">
+            <span style="font-size: 2rem;">🎯</span>
+            <h2 style="margin: 0; font-size: 1.8rem;">CERTAINTY BETS ACTIVATED</h2>
+            <span style="font-size: 2rem;">🛡️</span>
+        </div>
+        <p style="margin: 0; opacity: 0.9; font-size: 1.1rem;">100% Win Rate Strategy | 19/19 Historical Wins | Automatic Safety Transformation</p>
+    </div>
+    """, unsafe_allow_html=True)
     
-    @staticmethod
-    def generate_certainty_recommendations(edge_result: Dict, edge_locks: List, 
-                                          home_team: str, away_team: str) -> List[Dict]:
-        """Generate ALL certainty recommendations for a match"""
-        
-        recommendations = []
-        
-        # Main certainty bet
-        main_certainty = CertaintyTransformationEngine.transform_to_certainty(
-            edge_result['action']
-        )
-        recommendations.append({
-            'type': 'MAIN_CERTAINTY',
-            'priority': 1,
-            **main_certainty
-        })
-        
-        # Team-specific locks (UNDER 1.5 or UNDER 2.5)
-        for lock in edge_locks:
-            if "UNDER" in lock['bet_label']:
-                certainty_lock = CertaintyTransformationEngine.transform_to_certainty(
-                    lock['bet_label'].split(' ')[-2] + ' ' + lock['bet_label'].split(' ')[-1],  # Extract "UNDER X.X"
-                    lock['bet_label'].split(' UNDER')[0].strip()  # Extract team name
-                )
-                recommendations.append({
-                    'type': 'EDGE_DERIVED_CERTAINTY',
-                    'priority': 2,
-                    **certainty_lock
-                })
-        
-        # Remove duplicates
-        unique_recommendations = []
-        seen_bets = set()
+    st.markdown('<h2 class="section-header">🎯 CERTAINTY BET RECOMMENDATIONS</h2>', unsafe_allow_html=True)
+    
+    if result['certainty_recommendations']:
+        recommendations = sorted(result['certainty_recommendations'], key=lambda x: x['priority'])
         for rec in recommendations:
-            if rec['certainty_bet'] not in seen_bets:
-                seen_bets.add(rec['certainty_bet'])
-                unique_recommendations.append(rec)
-        
-        return unique_recommendations
-
-# ============================================================================
-# TIER 1: EDGE DETECTION ENGINE (Detection Only) - FIXED VERSION
-# ============================================================================
-
-class EdgeDetectionEngine:
-    """Detection engine - finds edges that get transformed to certainty"""
+            st.markdown(render_bet_card(rec), unsafe_allow_html=True)
     
-    @staticmethod
-    def evaluate_control_criteria(team_data: Dict) -> Tuple[float, List[str]]:
-        criteria_passed = []
-        weighted_score = 0.0
-        
-        # 1. Tempo (xG creation)
-        avg_xg = (team_data.get('home_xg_per_match', 0) + team_data.get('away_xg_per_match', 0)) / 2
-        if avg_xg > 1.4:
-            criteria_passed.append("Tempo")
-            weighted_score += 1.0
-        
-        # 2. Efficiency (finishing)
-        total_goals = team_data.get('home_goals_scored', 0) + team_data.get('away_goals_scored', 0)
-        total_xg = team_data.get('home_xg_for', 0) + team_data.get('away_xg_for', 0)
-        if total_xg > 0 and (total_goals / total_xg) > 0.9:
-            criteria_passed.append("Efficiency")
-            weighted_score += 1.0
-        
-        # 3. Patterns (recent form)
-        if team_data['avg_scored_last_5'] > 1.5:
-            criteria_passed.append("Patterns")
-            weighted_score += 0.8
-        
-        return weighted_score, criteria_passed
+    st.markdown('<h2 class="section-header">📊 DETECTION ANALYSIS</h2>', unsafe_allow_html=True)
     
-    @staticmethod
-    def analyze_match(home_data: Dict, away_data: Dict) -> Dict:
-        home_score, home_criteria = EdgeDetectionEngine.evaluate_control_criteria(home_data)
-        away_score, away_criteria = EdgeDetectionEngine.evaluate_control_criteria(away_data)
-        
-        controller = None
-        EPSILON = 0.001  # For floating point comparison
-        
-        # FIXED CONTROL DETECTION LOGIC
-        if len(home_criteria) >= CONTROL_CRITERIA_REQUIRED and len(away_criteria) >= CONTROL_CRITERIA_REQUIRED:
-            score_diff = abs(home_score - away_score)
-            if score_diff > QUIET_CONTROL_SEPARATION_THRESHOLD + EPSILON:
-                # Controller must have at least 2 criteria
-                if home_score > away_score and len(home_criteria) >= 2:
-                    controller = 'HOME'
-                elif away_score > home_score and len(away_criteria) >= 2:
-                    controller = 'AWAY'
-            # If scores are too close (difference <= 0.1), no clear controller
-        elif len(home_criteria) >= CONTROL_CRITERIA_REQUIRED and len(away_criteria) < 2:
-            controller = 'HOME'
-        elif len(away_criteria) >= CONTROL_CRITERIA_REQUIRED and len(home_criteria) < 2:
-            controller = 'AWAY'
-        
-        # Goals environment
-        combined_xg = home_data['home_xg_per_match'] + away_data['away_xg_per_match']
-        max_xg = max(home_data['home_xg_per_match'], away_data['away_xg_per_match'])
-        goals_environment = (combined_xg >= 2.8 and max_xg >= 1.6)
-        
-        # Determine action
-        if controller and goals_environment:
-            action = f"BACK {controller} & OVER 2.5"
-        elif controller:
-            action = f"BACK {controller}"
-        elif goals_environment:
-            action = "OVER 2.5"
-        else:
-            action = "UNDER 2.5"
-        
-        return {
-            'controller': controller,
-            'action': action,
-            'goals_environment': goals_environment
-        }
-
-# ============================================================================
-# TIER 1+: EDGE-DERIVED LOCKS (Detection Only) - CORRECTED VERSION
-# ============================================================================
-
-class EdgeDerivedLocks:
-    """Generate team-specific goal bets based on evidence strength"""
+    detection = result['detection_summary']
+    metrics_col1, metrics_col2, metrics_col3, metrics_col4 = st.columns(4)
     
-    @staticmethod
-    def generate_team_goal_bets(defender_data: Dict, attacker_data: Dict, 
-                                defender_name: str, attacker_name: str) -> Optional[Dict]:
-        """
-        Generate appropriate team goal bet based on evidence strength
-        YOUR CORRECT LOGIC:
-        - Clear evidence (attack ≤1.0): UNDER 1.5
-        - Unclear evidence (attack 1.0-1.2): UNDER 2.5  
-        - No evidence (attack >1.2): No bet
-        """
-        attack_weakness = attacker_data['avg_scored_last_5']
-        
-        # CLEAR EVIDENCE: Attack ≤ 1.0 goals/game → UNDER 1.5
-        if attack_weakness <= 1.0:
-            return {
-                'bet_label': f"{attacker_name} UNDER 1.5",
-                'defensive_team': defender_name,
-                'offensive_team': attacker_name,
-                'attack_weakness': attack_weakness,
-                'evidence_level': 'CLEAR',
-                'reason': f"{attacker_name} very weak attack ({attack_weakness:.1f} goals/game)"
-            }
-        
-        # UNCLEAR EVIDENCE: Attack 1.0-1.2 goals/game → UNDER 2.5
-        elif attack_weakness <= 1.2:
-            return {
-                'bet_label': f"{attacker_name} UNDER 2.5",
-                'defensive_team': defender_name,
-                'offensive_team': attacker_name,
-                'attack_weakness': attack_weakness,
-                'evidence_level': 'UNCLEAR',
-                'reason': f"{attacker_name} moderate attack ({attack_weakness:.1f} goals/game)"
-            }
-        
-        # NO EVIDENCE: Attack > 1.2 goals/game → No bet
-        else:
-            return None
+    with metrics_col1:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.markdown(f'<div style="font-size: 2rem;">{"🎮" if detection["controller"] else "⚖️"}</div>', unsafe_allow_html=True)
+        st.metric("Controller", detection['controller'] if detection['controller'] else "Balanced", "")
+        st.markdown('</div>', unsafe_allow_html=True)
     
-    @staticmethod
-    def generate_under_locks(home_data: Dict, away_data: Dict, home_team: str, away_team: str) -> List[Dict]:
-        """Generate all team-specific goal bets for the match"""
-        locks = []
-        
-        # Check AWAY team scoring (vs HOME defense)
-        away_bet = EdgeDerivedLocks.generate_team_goal_bets(
-            defender_data=home_data,
-            attacker_data=away_data,
-            defender_name=home_team,
-            attacker_name=away_team
-        )
-        if away_bet:
-            locks.append(away_bet)
-        
-        # Check HOME team scoring (vs AWAY defense)
-        home_bet = EdgeDerivedLocks.generate_team_goal_bets(
-            defender_data=away_data,
-            attacker_data=home_data,
-            defender_name=away_team,
-            attacker_name=home_team
-        )
-        if home_bet:
-            locks.append(home_bet)
-        
-        return locks
-
-# ============================================================================
-# MAIN BRUTBALL v6.4 CERTAINTY ENGINE
-# ============================================================================
-
-class BrutballCertaintyEngine:
-    """Main engine - transforms ALL detections to 100% win rate certainty bets"""
+    with metrics_col2:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.markdown(f'<div style="font-size: 2rem;">{"⚽" if detection["goals_environment"] else "🔒"}</div>', unsafe_allow_html=True)
+        st.metric("Goals Environment", "High" if detection['goals_environment'] else "Low", "")
+        st.markdown('</div>', unsafe_allow_html=True)
     
-    def __init__(self, league_name: str):
-        self.league_name = league_name
-        self.df = BrutballDataLoader.load_league_data(league_name)
+    with metrics_col3:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.markdown(f'<div style="font-size: 2rem;">🎯</div>', unsafe_allow_html=True)
+        st.metric("Certainty Bets", len(result['certainty_recommendations']), "")
+        st.markdown('</div>', unsafe_allow_html=True)
     
-    def analyze_match(self, home_team: str, away_team: str, bankroll: float = 1000, base_stake_pct: float = 0.5) -> Dict:
-        home_data = BrutballDataLoader.get_team_data(self.df, home_team)
-        away_data = BrutballDataLoader.get_team_data(self.df, away_team)
-        home_data['team'] = home_team
-        away_data['team'] = away_team
-        
-        # Edge detection
-        edge_result = EdgeDetectionEngine.analyze_match(home_data, away_data)
-        
-        # CORRECTED: Use evidence-based team goal bets
-        edge_locks = EdgeDerivedLocks.generate_under_locks(home_data, away_data, home_team, away_team)
-        
-        # Certainty transformations
-        certainty_recommendations = CertaintyTransformationEngine.generate_certainty_recommendations(
-            edge_result, edge_locks, home_team, away_team
-        )
-        
-        # Calculate stakes
-        base_stake_amount = (bankroll * base_stake_pct / 100)
-        
-        for rec in certainty_recommendations:
-            rec['stake_amount'] = base_stake_amount * rec['stake_multiplier']
-            rec['stake_pct'] = (rec['stake_amount'] / bankroll) * 100
-        
-        return {
-            'match': f"{home_team} vs {away_team}",
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'home_data': home_data,
-            'away_data': away_data,
-            'certainty_recommendations': certainty_recommendations,
-            'detection_summary': edge_result,
-            'bankroll_info': {
-                'bankroll': bankroll,
-                'base_stake_pct': base_stake_pct,
-                'base_stake_amount': base_stake_amount
-            }
-        }
+    with metrics_col4:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.markdown(f'<div style="font-size: 2rem;">📈</div>', unsafe_allow_html=True)
+        total_stake = sum(rec['stake_amount'] for rec in result['certainty_recommendations'])
+        st.metric("Total Stake", f"${total_stake:.2f}", f"{(total_stake/bankroll)*100:.1f}%")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    st.markdown('<h2 class="section-header">📈 TEAM STATISTICS</h2>', unsafe_allow_html=True)
     
-    def get_available_teams(self) -> List[str]:
-        return self.df['team'].tolist()
+    stats_col1, stats_col2 = st.columns(2)
+    
+    with stats_col1:
+        home_stats = result['home_data']
+        st.markdown(render_team_stats(
+            home_team, "Home", home_stats.get('home_xg_per_match', 0), home_stats.get('avg_scored_last_5', 0),
+            home_stats.get('home_goals_conceded', 0), home_stats.get('home_matches_played', 0)
+        ), unsafe_allow_html=True)
+    
+    with stats_col2:
+        away_stats = result['away_data']
+        st.markdown(render_team_stats(
+            away_team, "Away", away_stats.get('away_xg_per_match', 0), away_stats.get('avg_scored_last_5', 0),
+            away_stats.get('away_goals_conceded', 0), away_stats.get('away_matches_played', 0)
+        ), unsafe_allow_html=True)
+    
+    with st.expander("🔍 HOW THE CERTAINTY TRANSFORMATION WORKS", expanded=False):
+        st.markdown("""
+        <div style="padding: 1rem;">
+            <h3>🎯 The Certainty Transformation Process</h3>
+            <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 1rem; margin: 1.5rem 0;">
+                <div style="background: #f8f9fa; padding: 1.5rem; border-radius: 8px;">
+                    <h4>1️⃣ System Detection</h4>
+                    <p>Original BRUTBALL system analyzes the match using statistical models (52.6% accuracy).</p>
+                    <ul><li>xG analysis</li><li>Recent form assessment</li><li>Control criteria evaluation</li></ul>
+                </div>
+                <div style="background: #f8f9fa; padding: 1.5rem; border-radius: 8px;">
+                    <h4>2️⃣ Certainty Transformation</h4>
+                    <p>Automatically applies 100% win rate rules to transform risky bets into certainties.</p>
+                    <ul><li>Adds safety buffers</li><li>Uses double chance options</li><li>Adjusts goal lines</li></ul>
+                </div>
+                <div style="background: #f8f9fa; padding: 1.5rem; border-radius: 8px;">
+                    <h4>3️⃣ 100% Win Rate Output</h4>
+                    <p>Only shows bets with proven 19/19 win rate in historical testing.</p>
+                    <ul><li>Empirical evidence based</li><li>Risk minimized</li><li>ROI maximized</li></ul>
+                </div>
+            </div>
+            <h4>🛡️ Key Safety Transformations</h4>
+            <div style="overflow-x: auto;">
+                <table style="width: 100%; border-collapse: collapse; margin: 1rem 0;">
+                    <thead>
+                        <tr style="background: #667eea; color: white;">
+                            <th style="padding: 0.75rem; text-align: left;">Original Detection</th>
+                            <th style="padding: 0.75rem; text-align: left;">→</th>
+                            <th style="padding: 0.75rem; text-align: left;">Certainty Bet</th>
+                            <th style="padding: 0.75rem; text-align: left;">Safety Improvement</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        <tr style="border-bottom: 1px solid #dee2e6;"><td style="padding: 0.75rem;">BACK HOME & OVER 2.5</td><td style="padding: 0.75rem; text-align: center;">→</td><td style="padding: 0.75rem;">HOME DOUBLE CHANCE & OVER 1.5</td><td style="padding: 0.75rem;">Covers win/draw AND 2+ goals</td></tr>
+                        <tr style="border-bottom: 1px solid #dee2e6;"><td style="padding: 0.75rem;">UNDER 2.5</td><td style="padding: 0.75rem; text-align: center;">→</td><td style="padding: 0.75rem;">UNDER 3.5</td><td style="padding: 0.75rem;">Allows up to 3 goals</td></tr>
+                        <tr style="border-bottom: 1px solid #dee2e6;"><td style="padding: 0.75rem;">BACK AWAY</td><td style="padding: 0.75rem; text-align: center;">→</td><td style="padding: 0.75rem;">AWAY DOUBLE CHANCE</td><td style="padding: 0.75rem;">Covers win OR draw</td></tr>
+                        <tr><td style="padding: 0.75rem;">TEAM UNDER (Evidence-Based)</td><td style="padding: 0.75rem; text-align: center;">→</td><td style="padding: 0.75rem;">UNDER 1.5 or UNDER 2.5</td><td style="padding: 0.75rem;">Line adjusted to evidence strength</td></tr>
+                    </tbody>
+                </table>
+            </div>
+            <div style="background: linear-gradient(135deg, #4CAF50 0%, #2E7D32 100%); color: white; padding: 1.5rem; border-radius: 8px; margin-top: 1.5rem;">
+                <h4 style="margin: 0 0 0.5rem 0;">📈 Empirical Evidence</h4>
+                <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem; text-align: center;">
+                    <div><div style="font-size: 1.8rem; font-weight: bold;">19</div><div style="font-size: 0.9rem;">Matches Analyzed</div></div>
+                    <div><div style="font-size: 1.8rem; font-weight: bold;">19/19</div><div style="font-size: 0.9rem;">Wins</div></div>
+                    <div><div style="font-size: 1.8rem; font-weight: bold;">0%</div><div style="font-size: 0.9rem;">Loss Rate</div></div>
+                    <div><div style="font-size: 1.8rem; font-weight: bold;">+31.22%</div><div style="font-size: 0.9rem;">Total ROI</div></div>
+                </div>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
 
-# ============================================================================
-# STREAMLIT APP WITH ENHANCED FRONTEND (EXACTLY YOUR INTERFACE)
-# ============================================================================
+@fragment
+def render_match_view(selected_league: str, bankroll: float, base_stake_pct: float) -> None:
+    """
+    Match selection and results. Team changes and the generate button rerun
+    only this fragment; the last analysis is kept in session state, so any
+    rerun redraws it from the caches instead of recomputing it.
+    """
+    try:
+        engine = get_certainty_engine(
+            selected_league, BrutballDataLoader.get_data_version(selected_league)
+        )
+        teams = engine.get_available_teams()
+        
+        st.markdown('<h2 class="section-header">🏟️ Match Selection</h2>', unsafe_allow_html=True)
+        
+        match_col1, vs_col, match_col2 = st.columns([5, 1, 5])
+        
+        with match_col1:
+            st.markdown('<div class="team-card">', unsafe_allow_html=True)
+            home_team = st.selectbox("Home Team", teams, key="home_select")
+            st.markdown(f'<h3 style="margin: 1rem 0; color: white;">🏠 {home_team}</h3>', unsafe_allow_html=True)
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        with vs_col:
+            st.markdown('<div style="text-align: center; padding-top: 3rem;">', unsafe_allow_html=True)
+            st.markdown('<h2 style="color: #667eea;">VS</h2>', unsafe_allow_html=True)
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        with match_col2:
+            st.markdown('<div class="team-card">', unsafe_allow_html=True)
+            away_options = [t for t in teams if t != home_team]
+            away_team = st.selectbox("Away Team", away_options, key="away_select")
+            st.markdown(f'<h3 style="margin: 1rem 0; color: white;">✈️ {away_team}</h3>', unsafe_allow_html=True)
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        selection = (selected_league, engine.data_version, home_team, away_team, bankroll, base_stake_pct)
+        
+        generate_col1, generate_col2, generate_col3 = st.columns([1, 2, 1])
+        with generate_col2:
+            if st.button("🚀 GENERATE CERTAINTY BETS", type="primary", use_container_width=True):
+                with st.spinner("🔥 Transforming to 100% Win Rate Strategy..."):
+                    result = engine.analyze_match(home_team, away_team, bankroll, base_stake_pct)
+                st.session_state[ANALYSIS_STATE_KEY] = (selection, result)
+            
+            # Shown while the selection it was generated for is still current
+            stored = st.session_state.get(ANALYSIS_STATE_KEY)
+            if stored is not None and stored[0] == selection:
+                render_results(stored[1], home_team, away_team, bankroll)
+            else:
+                st.markdown("""
+                <div style="text-align: center; padding: 4rem; background: #f8f9fa; border-radius: 12px; margin: 2rem 0;">
+                    <div style="font-size: 4rem; margin-bottom: 1rem;">🎯</div>
+                    <h3 style="color: #667eea;">Ready to Generate Certainty Bets</h3>
+                    <p style="color: #6c757d; max-width: 600px; margin: 1rem auto;">Select your match and click "GENERATE CERTAINTY BETS" to activate the 100% win rate strategy.</p>
+                    <div style="display: flex; justify-content: center; gap: 1rem; margin-top: 2rem;">
+                        <div style="text-align: center;"><div style="font-size: 1.5rem;">🔥</div><div style="font-size: 0.9rem;">19/19 Wins</div></div>
+                        <div style="text-align: center;"><div style="font-size: 1.5rem;">💰</div><div style="font-size: 0.9rem;">+31.22% ROI</div></div>
+                        <div style="text-align: center;"><div style="font-size: 1.5rem;">🛡️</div><div style="font-size: 0.9rem;">100% Win Rate</div></div>
+                    </div>
+                </div>
+                """, unsafe_allow_html=True)
+    
+    except Exception as e:
+        st.error(f"""
+        ### ❌ Error Encountered
+        **Details:** {str(e)}
+        **Troubleshooting:**
+        1. Ensure your CSV is in the 'leagues' folder
+        2. Verify the CSV contains all required columns
+        3. Check that team names match exactly
+        4. Ensure CSV format is correct
+        **Required columns include:**
+        - team, home_matches_played, away_matches_played
+        - home_goals_scored, away_goals_scored
+        - home_goals_conceded, away_goals_conceded
+        - home_xg_for, away_xg_for
+        - home_xg_against, away_xg_against
+        - goals_scored_last_5, goals_conceded_last_5
+        """)
 
 def main():
     st.set_page_config(
@@ -668,18 +561,33 @@ def main():
         
         st.markdown("### 📁 League Selection")
         
-        leagues_dir = "leagues"
-        if not os.path.exists(leagues_dir):
-            os.makedirs(leagues_dir)
-            st.info(f"📁 Created '{leagues_dir}' directory")
+        catalog = get_league_catalog()
+        league_files = catalog.get_leagues()
+        if catalog.created_dir and not league_files:
+            st.info(f"📁 Created '{catalog.leagues_dir}' directory")
         
-        league_files = [f.replace('.csv', '') for f in os.listdir(leagues_dir) if f.endswith('.csv')]
+        invalid_files = catalog.get_invalid()
+        if invalid_files:
+            st.warning("⚠️ Skipped invalid league files:\n" +
+                       "\n".join(f"- **{name}**: {error}" for name, error in invalid_files.items()))
+        
+        league_warnings = catalog.get_warnings()
+        if league_warnings:
+            st.warning("⚠️ League file warnings:\n" +
+                       "\n".join(f"- **{name}**: {warning}" for name, warning in league_warnings.items()))
         
         if not league_files:
             st.error("⚠️ No CSV files found in 'leagues' folder.")
             selected_league = None
         else:
             selected_league = st.selectbox("Select League Database", league_files)
+            league_info = catalog.get_info(selected_league)
+            if league_info is None:
+                # Removed since the selectbox was built
+                league_meta = "file no longer available"
+            else:
+                updated = datetime.fromtimestamp(league_info.mtime_ns / 1e9).strftime("%Y-%m-%d %H:%M")
+                league_meta = f"{league_info.teams} teams · updated {updated}"
             
             st.markdown(f"""
             <div style="background: #f8f9fa; padding: 1rem; border-radius: 8px; margin-top: 1rem;">
@@ -687,7 +595,8 @@ def main():
                     <span style="font-size: 1.2rem;">📊</span>
                     <div>
                         <strong>Selected League</strong><br>
-                        <span style="font-size: 0.9rem; color: #6c757d;">{selected_league if selected_league else 'None'}</span>
+                        <span style="font-size: 0.9rem; color: #6c757d;">{selected_league if selected_league else 'None'}</span><br>
+                        <span style="font-size: 0.8rem; color: #6c757d;">{league_meta}</span>
                     </div>
                 </div>
             </div>
@@ -719,301 +628,7 @@ def main():
         """, unsafe_allow_html=True)
     
     if selected_league:
-        try:
-            engine = BrutballCertaintyEngine(selected_league)
-            teams = engine.get_available_teams()
-            
-            st.markdown('<h2 class="section-header">🏟️ Match Selection</h2>', unsafe_allow_html=True)
-            
-            match_col1, vs_col, match_col2 = st.columns([5, 1, 5])
-            
-            with match_col1:
-                st.markdown('<div class="team-card">', unsafe_allow_html=True)
-                home_team = st.selectbox("Home Team", teams, key="home_select")
-                st.markdown(f'<h3 style="margin: 1rem 0; color: white;">🏠 {home_team}</h3>', unsafe_allow_html=True)
-                st.markdown('</div>', unsafe_allow_html=True)
-            
-            with vs_col:
-                st.markdown('<div style="text-align: center; padding-top: 3rem;">', unsafe_allow_html=True)
-                st.markdown('<h2 style="color: #667eea;">VS</h2>', unsafe_allow_html=True)
-                st.markdown('</div>', unsafe_allow_html=True)
-            
-            with match_col2:
-                st.markdown('<div class="team-card">', unsafe_allow_html=True)
-                away_options = [t for t in teams if t != home_team]
-                away_team = st.selectbox("Away Team", away_options, key="away_select")
-                st.markdown(f'<h3 style="margin: 1rem 0; color: white;">✈️ {away_team}</h3>', unsafe_allow_html=True)
-                st.markdown('</div>', unsafe_allow_html=True)
-            
-            generate_col1, generate_col2, generate_col3 = st.columns([1, 2, 1])
-            with generate_col2:
-                if st.button("🚀 GENERATE CERTAINTY BETS", type="primary", use_container_width=True):
-                    with st.spinner("🔥 Transforming to 100% Win Rate Strategy..."):
-                        result = engine.analyze_match(home_team, away_team, bankroll, base_stake_pct)
-                        
-                        st.markdown(f"""
-                        <div style="text-align: center; margin: 2rem 0;">
-                            <h1 style="color: #333; margin-bottom: 0.5rem;">{result['match']}</h1>
-                            <p style="color: #6c757d; margin-top: 0;">Analysis generated: {result['timestamp']}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        st.markdown("""
-                        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                                    color: white; padding: 1.5rem; border-radius: 12px; 
-                                    margin: 2rem 0; text-align: center; box-shadow: 0 8px 25px rgba(0,0,0,0.15);">
-                            <div style="display: flex; align-items: center; justify-content: center; gap: 15px; margin-bottom: 0.5rem;">
-                                <span style="font-size: 2rem;">🎯</span>
-                                <h2 style="margin: 0; font-size: 1.8rem;">CERTAINTY BETS ACTIVATED</h2>
-                                <span style="font-size: 2rem;">🛡️</span>
-                            </div>
-                            <p style="margin: 0; opacity: 0.9; font-size: 1.1rem;">100% Win Rate Strategy | 19/19 Historical Wins | Automatic Safety Transformation</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        st.markdown('<h2 class="section-header">🎯 CERTAINTY BET RECOMMENDATIONS</h2>', unsafe_allow_html=True)
-                        
-                        if result['certainty_recommendations']:
-                            recommendations = sorted(result['certainty_recommendations'], key=lambda x: x['priority'])
-                            
-                            for rec in recommendations:
-                                # Determine border color based on bet type
-                                if 'UNDER 1.5' in rec['certainty_bet']:
-                                    border_color = "#4CAF50"  # Green for clear evidence
-                                    evidence_badge = '<span class="evidence-badge evidence-clear">CLEAR EVIDENCE</span>'
-                                elif 'UNDER 2.5' in rec['certainty_bet']:
-                                    border_color = "#FF9800"  # Orange for unclear evidence
-                                    evidence_badge = '<span class="evidence-badge evidence-unclear">UNCLEAR EVIDENCE</span>'
-                                elif rec['priority'] == 1:
-                                    border_color = "#667eea"  # Blue for main bet
-                                    evidence_badge = ''
-                                else:
-                                    border_color = "#2196F3"  # Light blue for secondary
-                                    evidence_badge = ''
-                                
-                                # Determine stake badge color based on multiplier
-                                if rec['stake_multiplier'] >= 2.0:
-                                    stake_badge_color = "#10b981"  # Green
-                                elif rec['stake_multiplier'] >= 1.5:
-                                    stake_badge_color = "#f59e0b"  # Orange
-                                else:
-                                    stake_badge_color = "#6b7280"  # Gray
-                                
-                                card_html = f"""
-                                <div class="bet-card" style="border-left-color: {border_color};">
-                                    <div class="priority-badge">P{rec['priority']}</div>
-                                    <div style="display: flex; justify-content: space-between; align-items: start;">
-                                        <div style="flex: 1;">
-                                            <div style="display: flex; align-items: center; gap: 10px; margin-bottom: 0.5rem;">
-                                                <span style="font-size: 1.5rem;">{rec['icon']}</span>
-                                                <h3 style="margin: 0; color: #333;">{rec['certainty_bet']} {evidence_badge}</h3>
-                                                <span class="win-rate-badge">{rec['win_rate']}</span>
-                                            </div>
-                                            <div style="color: #666; margin-bottom: 1rem;">
-                                                <p style="margin: 0; font-size: 0.95rem;">
-                                                    <strong>Reason:</strong> {rec['reason']}
-                                                </p>
-                                            </div>
-                                            <div style="display: flex; gap: 1rem; flex-wrap: wrap;">
-                                                <div style="display: flex; align-items: center; gap: 5px;">
-                                                    <span style="color: #667eea;">📈</span>
-                                                    <span style="font-size: 0.9rem;">Historical: {rec['historical_wins']}</span>
-                                                </div>
-                                                <div style="display: flex; align-items: center; gap: 5px;">
-                                                    <span style="color: #667eea;">💰</span>
-                                                    <span style="font-size: 0.9rem;">Odds: {rec['odds_range']}</span>
-                                                </div>
-                                                <div style="display: flex; align-items: center; gap: 5px;">
-                                                    <span style="color: #667eea;">⚡</span>
-                                                    <span style="font-size: 0.9rem;">Multiplier: {rec['stake_multiplier']}x</span>
-                                                </div>
-                                            </div>
-                                        </div>
-                                        <div style="text-align: center; min-width: 150px;">
-                                            <div style="margin-bottom: 0.5rem;">
-                                                <div style="font-size: 0.9rem; color: #666;">Stake</div>
-                                                <div class="stake-badge" style="background: {stake_badge_color};">${rec['stake_amount']:.2f}</div>
-                                            </div>
-                                            <div style="font-size: 0.9rem; color: #666;">{rec['stake_pct']:.1f}% of bankroll</div>
-                                        </div>
-                                    </div>
-                                """
-                                
-                                if rec.get('transformation_applied', False):
-                                    card_html += f"""<div style="margin-top: 1rem; padding: 0.5rem; background: #f8f9fa; border-radius: 8px; font-size: 0.9rem; color: #666;"><strong>Transformed from:</strong> {rec['original_detection']}</div>"""
-                                
-                                card_html += "</div>"
-                                st.markdown(card_html, unsafe_allow_html=True)
-                        
-                        st.markdown('<h2 class="section-header">📊 DETECTION ANALYSIS</h2>', unsafe_allow_html=True)
-                        
-                        detection = result['detection_summary']
-                        metrics_col1, metrics_col2, metrics_col3, metrics_col4 = st.columns(4)
-                        
-                        with metrics_col1:
-                            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                            st.markdown(f'<div style="font-size: 2rem;">{"🎮" if detection["controller"] else "⚖️"}</div>', unsafe_allow_html=True)
-                            st.metric("Controller", detection['controller'] if detection['controller'] else "Balanced", "")
-                            st.markdown('</div>', unsafe_allow_html=True)
-                        
-                        with metrics_col2:
-                            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                            st.markdown(f'<div style="font-size: 2rem;">{"⚽" if detection["goals_environment"] else "🔒"}</div>', unsafe_allow_html=True)
-                            st.metric("Goals Environment", "High" if detection['goals_environment'] else "Low", "")
-                            st.markdown('</div>', unsafe_allow_html=True)
-                        
-                        with metrics_col3:
-                            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                            st.markdown(f'<div style="font-size: 2rem;">🎯</div>', unsafe_allow_html=True)
-                            st.metric("Certainty Bets", len(result['certainty_recommendations']), "")
-                            st.markdown('</div>', unsafe_allow_html=True)
-                        
-                        with metrics_col4:
-                            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                            st.markdown(f'<div style="font-size: 2rem;">📈</div>', unsafe_allow_html=True)
-                            total_stake = sum(rec['stake_amount'] for rec in result['certainty_recommendations'])
-                            st.metric("Total Stake", f"${total_stake:.2f}", f"{(total_stake/bankroll)*100:.1f}%")
-                            st.markdown('</div>', unsafe_allow_html=True)
-                        
-                        st.markdown('<h2 class="section-header">📈 TEAM STATISTICS</h2>', unsafe_allow_html=True)
-                        
-                        stats_col1, stats_col2 = st.columns(2)
-                        
-                        with stats_col1:
-                            home_stats = result['home_data']
-                            st.markdown(f"""
-                            <div class="metric-card">
-                                <h4 style="color: #667eea; margin-bottom: 1rem;">{home_team} (Home)</h4>
-                                <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem;">
-                                    <div>
-                                        <div style="font-size: 0.9rem; color: #666;">xG per Match</div>
-                                        <div style="font-size: 1.3rem; font-weight: bold;">{home_stats.get('home_xg_per_match', 0):.2f}</div>
-                                    </div>
-                                    <div>
-                                        <div style="font-size: 0.9rem; color: #666;">Avg Scored Last 5</div>
-                                        <div style="font-size: 1.3rem; font-weight: bold;">{home_stats.get('avg_scored_last_5', 0):.2f}</div>
-                                    </div>
-                                    <div>
-                                        <div style="font-size: 0.9rem; color: #666;">Goals Conceded</div>
-                                        <div style="font-size: 1.3rem; font-weight: bold;">{home_stats.get('home_goals_conceded', 0):.0f}</div>
-                                    </div>
-                                    <div>
-                                        <div style="font-size: 0.9rem; color: #666;">Matches Played</div>
-                                        <div style="font-size: 1.3rem; font-weight: bold;">{home_stats.get('home_matches_played', 0):.0f}</div>
-                                    </div>
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        with stats_col2:
-                            away_stats = result['away_data']
-                            st.markdown(f"""
-                            <div class="metric-card">
-                                <h4 style="color: #667eea; margin-bottom: 1rem;">{away_team} (Away)</h4>
-                                <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem;">
-                                    <div>
-                                        <div style="font-size: 0.9rem; color: #666;">xG per Match</div>
-                                        <div style="font-size: 1.3rem; font-weight: bold;">{away_stats.get('away_xg_per_match', 0):.2f}</div>
-                                    </div>
-                                    <div>
-                                        <div style="font-size: 0.9rem; color: #666;">Avg Scored Last 5</div>
-                                        <div style="font-size: 1.3rem; font-weight: bold;">{away_stats.get('avg_scored_last_5', 0):.2f}</div>
-                                    </div>
-                                    <div>
-                                        <div style="font-size: 0.9rem; color: #666;">Goals Conceded</div>
-                                        <div style="font-size: 1.3rem; font-weight: bold;">{away_stats.get('away_goals_conceded', 0):.0f}</div>
-                                    </div>
-                                    <div>
-                                        <div style="font-size: 0.9rem; color: #666;">Matches Played</div>
-                                        <div style="font-size: 1.3rem; font-weight: bold;">{away_stats.get('away_matches_played', 0):.0f}</div>
-                                    </div>
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        with st.expander("🔍 HOW THE CERTAINTY TRANSFORMATION WORKS", expanded=False):
-                            st.markdown("""
-                            <div style="padding: 1rem;">
-                                <h3>🎯 The Certainty Transformation Process</h3>
-                                <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 1rem; margin: 1.5rem 0;">
-                                    <div style="background: #f8f9fa; padding: 1.5rem; border-radius: 8px;">
-                                        <h4>1️⃣ System Detection</h4>
-                                        <p>Original BRUTBALL system analyzes the match using statistical models (52.6% accuracy).</p>
-                                        <ul><li>xG analysis</li><li>Recent form assessment</li><li>Control criteria evaluation</li></ul>
-                                    </div>
-                                    <div style="background: #f8f9fa; padding: 1.5rem; border-radius: 8px;">
-                                        <h4>2️⃣ Certainty Transformation</h4>
-                                        <p>Automatically applies 100% win rate rules to transform risky bets into certainties.</p>
-                                        <ul><li>Adds safety buffers</li><li>Uses double chance options</li><li>Adjusts goal lines</li></ul>
-                                    </div>
-                                    <div style="background: #f8f9fa; padding: 1.5rem; border-radius: 8px;">
-                                        <h4>3️⃣ 100% Win Rate Output</h4>
-                                        <p>Only shows bets with proven 19/19 win rate in historical testing.</p>
-                                        <ul><li>Empirical evidence based</li><li>Risk minimized</li><li>ROI maximized</li></ul>
-                                    </div>
-                                </div>
-                                <h4>🛡️ Key Safety Transformations</h4>
-                                <div style="overflow-x: auto;">
-                                    <table style="width: 100%; border-collapse: collapse; margin: 1rem 0;">
-                                        <thead>
-                                            <tr style="background: #667eea; color: white;">
-                                                <th style="padding: 0.75rem; text-align: left;">Original Detection</th>
-                                                <th style="padding: 0.75rem; text-align: left;">→</th>
-                                                <th style="padding: 0.75rem; text-align: left;">Certainty Bet</th>
-                                                <th style="padding: 0.75rem; text-align: left;">Safety Improvement</th>
-                                            </tr>
-                                        </thead>
-                                        <tbody>
-                                            <tr style="border-bottom: 1px solid #dee2e6;"><td style="padding: 0.75rem;">BACK HOME & OVER 2.5</td><td style="padding: 0.75rem; text-align: center;">→</td><td style="padding: 0.75rem;">HOME DOUBLE CHANCE & OVER 1.5</td><td style="padding: 0.75rem;">Covers win/draw AND 2+ goals</td></tr>
-                                            <tr style="border-bottom: 1px solid #dee2e6;"><td style="padding: 0.75rem;">UNDER 2.5</td><td style="padding: 0.75rem; text-align: center;">→</td><td style="padding: 0.75rem;">UNDER 3.5</td><td style="padding: 0.75rem;">Allows up to 3 goals</td></tr>
-                                            <tr style="border-bottom: 1px solid #dee2e6;"><td style="padding: 0.75rem;">BACK AWAY</td><td style="padding: 0.75rem; text-align: center;">→</td><td style="padding: 0.75rem;">AWAY DOUBLE CHANCE</td><td style="padding: 0.75rem;">Covers win OR draw</td></tr>
-                                            <tr><td style="padding: 0.75rem;">TEAM UNDER (Evidence-Based)</td><td style="padding: 0.75rem; text-align: center;">→</td><td style="padding: 0.75rem;">UNDER 1.5 or UNDER 2.5</td><td style="padding: 0.75rem;">Line adjusted to evidence strength</td></tr>
-                                        </tbody>
-                                    </table>
-                                </div>
-                                <div style="background: linear-gradient(135deg, #4CAF50 0%, #2E7D32 100%); color: white; padding: 1.5rem; border-radius: 8px; margin-top: 1.5rem;">
-                                    <h4 style="margin: 0 0 0.5rem 0;">📈 Empirical Evidence</h4>
-                                    <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem; text-align: center;">
-                                        <div><div style="font-size: 1.8rem; font-weight: bold;">19</div><div style="font-size: 0.9rem;">Matches Analyzed</div></div>
-                                        <div><div style="font-size: 1.8rem; font-weight: bold;">19/19</div><div style="font-size: 0.9rem;">Wins</div></div>
-                                        <div><div style="font-size: 1.8rem; font-weight: bold;">0%</div><div style="font-size: 0.9rem;">Loss Rate</div></div>
-                                        <div><div style="font-size: 1.8rem; font-weight: bold;">+31.22%</div><div style="font-size: 0.9rem;">Total ROI</div></div>
-                                    </div>
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                
-                else:
-                    st.markdown("""
-                    <div style="text-align: center; padding: 4rem; background: #f8f9fa; border-radius: 12px; margin: 2rem 0;">
-                        <div style="font-size: 4rem; margin-bottom: 1rem;">🎯</div>
-                        <h3 style="color: #667eea;">Ready to Generate Certainty Bets</h3>
-                        <p style="color: #6c757d; max-width: 600px; margin: 1rem auto;">Select your match and click "GENERATE CERTAINTY BETS" to activate the 100% win rate strategy.</p>
-                        <div style="display: flex; justify-content: center; gap: 1rem; margin-top: 2rem;">
-                            <div style="text-align: center;"><div style="font-size: 1.5rem;">🔥</div><div style="font-size: 0.9rem;">19/19 Wins</div></div>
-                            <div style="text-align: center;"><div style="font-size: 1.5rem;">💰</div><div style="font-size: 0.9rem;">+31.22% ROI</div></div>
-                            <div style="text-align: center;"><div style="font-size: 1.5rem;">🛡️</div><div style="font-size: 0.9rem;">100% Win Rate</div></div>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-        
-        except Exception as e:
-            st.error(f"""
-            ### ❌ Error Encountered
-            **Details:** {str(e)}
-            **Troubleshooting:**
-            1. Ensure your CSV is in the 'leagues' folder
-            2. Verify the CSV contains all required columns
-            3. Check that team names match exactly
-            4. Ensure CSV format is correct
-            **Required columns include:**
-            - team, home_matches_played, away_matches_played
-            - home_goals_scored, away_goals_scored
-            - home_goals_conceded, away_goals_conceded
-            - home_xg_for, away_xg_for
-            - home_xg_against, away_xg_against
-            - goals_scored_last_5, goals_conceded_last_5
-            """)
+        render_match_view(selected_league, bankroll, base_stake_pct)
     
     else:
         st.info("""
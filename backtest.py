@@ -0,0 +1,312 @@
+"""
+HISTORICAL BACKTEST
+Replays the certainty engine over historical fixtures using each team's
+table row as it stood before kick-off, grades every certainty market against
+the final score and reports hit rate and ROI per rule. Detection, locks and
+grading run as array operations over the whole history at once.
+
+Inputs are plain DataFrames:
+- fixtures: league, date, home_team, away_team, home_goals, away_goals
+  (optional winner_lock_detected / winner_delta_value / winner_lock_team
+  columns feed the Winner Lock pattern)
+- snapshots: league, team, as_of + BrutballDataLoader.REQUIRED_COLUMNS
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from brutball_core import (
+    CERTAINTY_DISPATCH, CERTAINTY_TRANSFORMATIONS, BrutballCertaintyEngine, BrutballDataLoader,
+    EdgeDerivedLocks, EdgeDetectionEngine
+)
+from brutball_rules import DEFAULT_RULES, RuleSet
+from match_state_classifier import (
+    ELITE_DEFENSE_TEMPLATES, UNDER_35_BETS, WINNER_LOCK_TEMPLATE, CompletePatternDetector
+)
+
+FIXTURE_COLUMNS = ['league', 'date', 'home_team', 'away_team', 'home_goals', 'away_goals']
+SNAPSHOT_KEYS = ['league', 'team', 'as_of']
+WINNER_LOCK_COLUMNS = ['winner_lock_detected', 'winner_delta_value', 'winner_lock_team']
+
+BET_COLUMNS = ['fixture', 'league', 'date', 'home_team', 'away_team', 'type', 'rule',
+               'certainty_bet', 'won', 'odds', 'stake_multiplier', 'profit']
+
+# ============================================================================
+# MARKET GRADING
+# ============================================================================
+
+Leg = Tuple[str, Optional[str], Optional[float]]
+
+def parse_certainty_legs(certainty_bet: str) -> Tuple[Leg, ...]:
+    """Split a certainty bet ("HOME DOUBLE CHANCE & OVER 1.5", "TEAM UNDER 1.5") into gradeable legs"""
+    legs = []
+    for leg in certainty_bet.split(' & '):
+        words = leg.split()
+        if len(words) == 3 and words[1:] == ['DOUBLE', 'CHANCE'] and words[0] in ('HOME', 'AWAY'):
+            legs.append(('DOUBLE_CHANCE', words[0], None))
+        elif len(words) == 2 and words[0] in ('OVER', 'UNDER'):
+            legs.append((words[0], None, float(words[1])))
+        elif len(words) == 3 and words[:2] == ['TEAM', 'UNDER']:
+            legs.append(('TEAM_UNDER', None, float(words[2])))
+        else:
+            raise ValueError(f"Cannot grade certainty bet: {certainty_bet!r}")
+    return tuple(legs)
+
+def odds_midpoint(odds_range: str) -> float:
+    """"1.25-1.40" -> 1.325"""
+    low, _, high = odds_range.partition('-')
+    return (float(low) + float(high or low)) / 2
+
+def grade_legs(legs: Tuple[Leg, ...], home_goals: np.ndarray, away_goals: np.ndarray,
+               team_goals: Optional[np.ndarray] = None) -> np.ndarray:
+    """Win mask of an accumulator of legs; TEAM_UNDER legs grade team_goals"""
+    won = np.ones(len(home_goals), dtype=bool)
+    total = home_goals + away_goals
+    for market, side, line in legs:
+        if market == 'DOUBLE_CHANCE':
+            won &= (home_goals >= away_goals) if side == 'HOME' else (away_goals >= home_goals)
+        elif market == 'OVER':
+            won &= total > line
+        elif market == 'UNDER':
+            won &= total < line
+        else:
+            won &= team_goals < line
+    return won
+
+# Compiled once per certainty rule
+RULE_LEGS = {label: parse_certainty_legs(rule['certainty_bet']) for label, rule in CERTAINTY_TRANSFORMATIONS.items()}
+RULE_ODDS = {label: odds_midpoint(rule['odds_range']) for label, rule in CERTAINTY_TRANSFORMATIONS.items()}
+
+# Detection action code -> CERTAINTY_TRANSFORMATIONS label
+ACTION_RULES = tuple(CERTAINTY_DISPATCH[key] for key in EdgeDetectionEngine.ACTION_KEYS)
+LOCK_RULES = {level: f"TEAM UNDER {line}" for level, line in BrutballCertaintyEngine.LOCK_LINES.items()}
+
+# ============================================================================
+# HISTORY PREPARATION
+# ============================================================================
+
+def prepare_history(fixtures: pd.DataFrame, snapshots: pd.DataFrame) -> Dict:
+    """
+    Attach to every played fixture the latest snapshot of each team taken
+    strictly before the fixture date (as-of join per league and team).
+    Fixtures without a result or without a prior snapshot for both teams are dropped.
+    """
+    missing = [col for col in FIXTURE_COLUMNS if col not in fixtures.columns]
+    missing += [col for col in SNAPSHOT_KEYS + BrutballDataLoader.REQUIRED_COLUMNS if col not in snapshots.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    played = fixtures.dropna(subset=['home_goals', 'away_goals']).copy()
+    played['date'] = pd.to_datetime(played['date']).astype('datetime64[ns]')
+    played['_fixture'] = np.arange(len(played))
+    played = played.sort_values('date', kind='mergesort')
+
+    stats = snapshots[SNAPSHOT_KEYS + [col for col in BrutballDataLoader.REQUIRED_COLUMNS if col != 'team']].copy()
+    stats['as_of'] = pd.to_datetime(stats['as_of']).astype('datetime64[ns]')
+    stats = stats.sort_values('as_of', kind='mergesort')
+
+    sides = {}
+    for side in ('home', 'away'):
+        joined = pd.merge_asof(
+            played[['date', 'league', f'{side}_team', '_fixture']].rename(columns={f'{side}_team': 'team'}),
+            stats, left_on='date', right_on='as_of', by=['league', 'team'], allow_exact_matches=False
+        )
+        sides[side] = joined.set_index('_fixture').sort_index()
+
+    matched = (sides['home']['as_of'].notna() & sides['away']['as_of'].notna()).to_numpy()
+    played = played.sort_values('_fixture')[matched].drop(columns='_fixture').reset_index(drop=True)
+    home = sides['home'][matched].reset_index(drop=True)
+    away = sides['away'][matched].reset_index(drop=True)
+
+    return {
+        'fixtures': played,
+        'home': home[BrutballDataLoader.REQUIRED_COLUMNS],
+        'away': away[BrutballDataLoader.REQUIRED_COLUMNS],
+        'dropped': len(fixtures) - len(played)
+    }
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+def _bet_frame(fixtures: pd.DataFrame, index: np.ndarray, bet_type: str, rule: str, certainty_bet,
+               won: np.ndarray, odds: float, stake_multiplier: float) -> pd.DataFrame:
+    frame = fixtures.iloc[index][['league', 'date', 'home_team', 'away_team']].reset_index(drop=True)
+    frame.insert(0, 'fixture', index)
+    frame['type'] = bet_type
+    frame['rule'] = rule
+    frame['certainty_bet'] = certainty_bet
+    frame['won'] = won
+    frame['odds'] = odds
+    frame['stake_multiplier'] = stake_multiplier
+    # Unpriced bets (odds NaN) carry no profit
+    frame['profit'] = np.where(won, odds - 1.0, -1.0) if not np.isnan(odds) else np.nan
+    return frame
+
+def _ordered_bets(frames: List[pd.DataFrame], order: List[int]) -> pd.DataFrame:
+    frames = [frame.assign(_order=rank) for frame, rank in zip(frames, order) if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=BET_COLUMNS)
+    return pd.concat(frames, ignore_index=True).sort_values(
+        ['fixture', '_order'], kind='mergesort'
+    ).drop(columns='_order').reset_index(drop=True)
+
+def certainty_hits(home: pd.DataFrame, away: pd.DataFrame, home_goals: np.ndarray, away_goals: np.ndarray,
+                   rules: RuleSet = DEFAULT_RULES) -> Iterator[Tuple[int, str, Optional[str], np.ndarray, np.ndarray]]:
+    """
+    Array core of the replay: yields (order, rule label, lock side, fixture
+    index, won mask) per certainty rule. Order 0 = main bet, 1 = away lock,
+    2 = home lock - as in generate_under_locks.
+    """
+    home_features = BrutballDataLoader.build_feature_table(home, rules)
+    away_features = BrutballDataLoader.build_feature_table(away, rules)
+
+    columns = ('control_score', 'control_count', 'home_xg_per_match', 'away_xg_per_match')
+    detection = EdgeDetectionEngine.analyze_pairs(
+        {col: home_features[col].to_numpy() for col in columns},
+        {col: away_features[col].to_numpy() for col in columns},
+        rules
+    )
+
+    # Main certainty bet: one per fixture, graded per action code
+    for code, label in enumerate(ACTION_RULES):
+        index = np.flatnonzero(detection['action'] == code)
+        yield 0, label, None, index, grade_legs(RULE_LEGS[label], home_goals[index], away_goals[index])
+
+    # Team locks: away team scoring first, then home
+    for order, (side, features, team_goals) in enumerate(
+            (('away', away_features, away_goals), ('home', home_features, home_goals)), start=1):
+        levels = EdgeDerivedLocks.evidence_levels(features['avg_scored_last_5'].to_numpy(), rules)
+        for level, label in LOCK_RULES.items():
+            index = np.flatnonzero(levels == level)
+            yield order, label, side, index, grade_legs(
+                RULE_LEGS[label], home_goals[index], away_goals[index], team_goals[index]
+            )
+
+def replay_certainty(history: Dict, rules: RuleSet = DEFAULT_RULES) -> pd.DataFrame:
+    """
+    One row per certainty recommendation per fixture, in the same order as
+    BrutballCertaintyEngine.analyze_fixtures (main bet, away lock, home lock).
+    Profit is per unit staked at the odds_range midpoint.
+    """
+    fixtures = history['fixtures']
+    hits = certainty_hits(
+        history['home'], history['away'],
+        fixtures['home_goals'].to_numpy(dtype=np.float64), fixtures['away_goals'].to_numpy(dtype=np.float64),
+        rules
+    )
+
+    frames, order = [], []
+    for rank, label, side, index, won in hits:
+        rule = CERTAINTY_TRANSFORMATIONS[label]
+        if side is None:
+            bet_type, certainty_bet = 'MAIN_CERTAINTY', rule['certainty_bet']
+        else:
+            teams = fixtures[f'{side}_team'].to_numpy()[index].astype(str)
+            bet_type, certainty_bet = 'EDGE_DERIVED_CERTAINTY', np.char.add(teams, label[len('TEAM'):])
+        frames.append(_bet_frame(fixtures, index, bet_type, label, certainty_bet,
+                                 won, RULE_ODDS[label], rule['stake_multiplier']))
+        order.append(rank)
+
+    return _ordered_bets(frames, order)
+
+def replay_patterns(history: Dict) -> pd.DataFrame:
+    """Grade the CompletePatternDetector tiers (no odds are quoted for them)"""
+    fixtures = history['fixtures']
+    winner_lock = {}
+    if all(col in fixtures.columns for col in WINNER_LOCK_COLUMNS):
+        winner_lock = {col: fixtures[col].to_numpy() for col in WINNER_LOCK_COLUMNS}
+
+    batch = CompletePatternDetector.analyze_matches_batch(
+        history['home']['goals_conceded_last_5'].to_numpy(),
+        history['away']['goals_conceded_last_5'].to_numpy(),
+        materialize=False, **winner_lock
+    )
+    home_goals = fixtures['home_goals'].to_numpy(dtype=np.float64)
+    away_goals = fixtures['away_goals'].to_numpy(dtype=np.float64)
+
+    frames, order = [], []
+
+    # Elite Defense: the opponent of the elite defender stays under 1.5
+    elite = ELITE_DEFENSE_TEMPLATES['home'].constants
+    for rank, (mask, team_side, team_goals) in enumerate(
+            ((batch['home_elite_defense'], 'away', away_goals), (batch['away_elite_defense'], 'home', home_goals))):
+        index = np.flatnonzero(mask)
+        teams = fixtures[f'{team_side}_team'].to_numpy()[index].astype(str)
+        frames.append(_bet_frame(fixtures, index, 'PATTERN', elite['pattern'], np.char.add(teams, " UNDER 1.5"),
+                                 team_goals[index] < 1.5, np.nan, elite['stake_multiplier']))
+        order.append(rank)
+
+    # Winner Lock: the lock team does not lose
+    index = np.flatnonzero(batch['has_winner_lock'])
+    lock_home = winner_lock.get('winner_lock_team', np.array([], dtype=object))[index] == 'home'
+    won = np.where(lock_home, home_goals[index] >= away_goals[index], away_goals[index] >= home_goals[index])
+    teams = np.where(lock_home, fixtures['home_team'].to_numpy()[index], fixtures['away_team'].to_numpy()[index])
+    frames.append(_bet_frame(fixtures, index, 'PATTERN', WINNER_LOCK_TEMPLATE.pattern,
+                             np.char.add(teams.astype(str), " DOUBLE CHANCE"), won, np.nan,
+                             WINNER_LOCK_TEMPLATE.constants['stake_multiplier']))
+    order.append(2)
+
+    # UNDER 3.5 tiers
+    for tier, bet in enumerate(UNDER_35_BETS):
+        if bet is None:
+            continue
+        index = np.flatnonzero(batch['pattern_combination'] == tier)
+        frames.append(_bet_frame(fixtures, index, 'PATTERN', bet['pattern'], "UNDER 3.5",
+                                 (home_goals[index] + away_goals[index]) < 3.5, np.nan, bet['stake_multiplier']))
+        order.append(3)
+
+    return _ordered_bets(frames, order)
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def claimed_records() -> Dict[str, str]:
+    """The hardcoded track records the backtest is checked against"""
+    claimed = {label: rule['historical_wins'] for label, rule in CERTAINTY_TRANSFORMATIONS.items()}
+    for template in (ELITE_DEFENSE_TEMPLATES['home'], WINNER_LOCK_TEMPLATE):
+        claimed[template.pattern] = template.constants['sample_accuracy']
+    for bet in UNDER_35_BETS[1:]:
+        claimed[bet['pattern']] = bet['sample_accuracy']
+    return claimed
+
+def summarize(bets: pd.DataFrame, by: Optional[List[str]] = None) -> pd.DataFrame:
+    """Hit rate and flat-stake ROI per rule (optionally split further, e.g. by league)"""
+    keys = ['rule'] + list(by or [])
+    if bets.empty:
+        return pd.DataFrame(columns=keys + ['bets', 'wins', 'hit_rate', 'avg_odds', 'profit', 'roi',
+                                            'record', 'claimed'])
+
+    summary = bets.groupby(keys, sort=False).agg(
+        bets=('won', 'size'), wins=('won', 'sum'), avg_odds=('odds', 'mean'), profit=('profit', 'sum')
+    ).reset_index()
+    # Rules in table order, then the extra keys
+    rule_order = {rule: position for position, rule in enumerate(claimed_records())}
+    summary = summary.sort_values(
+        keys, key=lambda col: col.map(rule_order) if col.name == 'rule' else col, kind='mergesort'
+    ).reset_index(drop=True)
+    summary['wins'] = summary['wins'].astype(np.int64)
+    summary['hit_rate'] = summary['wins'] / summary['bets']
+    # Rules without quoted odds have no ROI
+    summary.loc[summary['avg_odds'].isna(), 'profit'] = np.nan
+    summary['roi'] = summary['profit'] / summary['bets']
+    summary['record'] = summary['wins'].astype(str) + '/' + summary['bets'].astype(str)
+    summary['claimed'] = summary['rule'].map(claimed_records())
+    return summary[keys + ['bets', 'wins', 'hit_rate', 'avg_odds', 'profit', 'roi', 'record', 'claimed']]
+
+def run_backtest(fixtures: pd.DataFrame, snapshots: pd.DataFrame, rules: RuleSet = DEFAULT_RULES,
+                 by: Optional[List[str]] = None, include_patterns: bool = True) -> Dict:
+    """Prepare, replay and summarize in one call"""
+    history = prepare_history(fixtures, snapshots)
+    bets = replay_certainty(history, rules)
+    if include_patterns:
+        bets = pd.concat([bets, replay_patterns(history)], ignore_index=True)
+    return {
+        'bets': bets,
+        'summary': summarize(bets, by),
+        'fixtures': len(history['fixtures']),
+        'dropped': history['dropped']
+    }
@@ -0,0 +1,1291 @@
+"""
+BRUTBALL CORE - ENGINES WITHOUT THE UI
+Data loading, edge detection, certainty transformations and the certainty
+engine, importable by the Streamlit app, the service, the CLI and worker
+processes alike. Nothing here imports Streamlit.
+
+Import budget: importing this module loads numpy and brutball_rules only.
+pandas is imported on first use (loading a league, building features) via
+LazyModule, so a process that never touches a DataFrame never pays for it
+(tests/test_brutball_core.py holds the import budget).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import datetime
+from enum import Enum
+from operator import attrgetter
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from brutball_rules import (
+    ATTACK_EVIDENCE_RULES, CONTROL_CRITERIA_RULES, CONTROL_MATCH_RULES,
+    DEFAULT_RULES, RULE_PARAMETERS, RuleSet
+)
+
+class LazyModule:
+    """Stand-in for a heavy module, imported on first attribute access"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str) -> Any:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+pd = LazyModule('pandas')
+
+# ============================================================================
+# SYSTEM CONSTANTS (IMMUTABLE)
+# ============================================================================
+
+# Bump whenever detection or transformation output changes (invalidates memoized analyses)
+ENGINE_VERSION = "6.4"
+
+# GATE THRESHOLDS (rule thresholds are defined in brutball_rules.RULE_PARAMETERS)
+CONTROL_CRITERIA_REQUIRED = RULE_PARAMETERS['control_criteria_required']
+QUIET_CONTROL_SEPARATION_THRESHOLD = RULE_PARAMETERS['quiet_control_separation']
+DIRECTION_THRESHOLD = 0.25
+STATE_FLIP_FAILURES_REQUIRED = 2
+ENFORCEMENT_METHODS_REQUIRED = 2
+TOTALS_LOCK_THRESHOLD = 1.2
+
+# CERTAINTY TRANSFORMATION RULES (100% Win Rate Strategy)
+CERTAINTY_TRANSFORMATIONS = {
+    "BACK HOME & OVER 2.5": {
+        'certainty_bet': "HOME DOUBLE CHANCE & OVER 1.5",
+        'odds_range': "1.25-1.40",
+        'historical_wins': "19/19",
+        'win_rate': "100%",
+        'reason': "Covers win/draw AND 2+ goals",
+        'icon': "🛡️",
+        'stake_multiplier': 2.0
+    },
+    "BACK AWAY & OVER 2.5": {
+        'certainty_bet': "AWAY DOUBLE CHANCE & OVER 1.5",
+        'odds_range': "1.30-1.45",
+        'historical_wins': "19/19",
+        'win_rate': "100%",
+        'reason': "Covers win/draw AND 2+ goals",
+        'icon': "🛡️",
+        'stake_multiplier': 2.0
+    },
+    "BACK HOME": {
+        'certainty_bet': "HOME DOUBLE CHANCE",
+        'odds_range': "1.15-1.25",
+        'historical_wins': "19/19",
+        'win_rate': "100%",
+        'reason': "Covers win OR draw",
+        'icon': "🎯",
+        'stake_multiplier': 2.0
+    },
+    "BACK AWAY": {
+        'certainty_bet': "AWAY DOUBLE CHANCE",
+        'odds_range': "1.20-1.30",
+        'historical_wins': "19/19",
+        'win_rate': "100%",
+        'reason': "Covers win OR draw",
+        'icon': "🎯",
+        'stake_multiplier': 2.0
+    },
+    "OVER 2.5": {
+        'certainty_bet': "OVER 1.5",
+        'odds_range': "1.10-1.20",
+        'historical_wins': "5/5",
+        'win_rate': "100%",
+        'reason': "Safer line: only 2+ goals needed",
+        'icon': "📈",
+        'stake_multiplier': 2.0
+    },
+    "UNDER 2.5": {
+        'certainty_bet': "UNDER 3.5",
+        'odds_range': "1.20-1.30",
+        'historical_wins': "5/5",
+        'win_rate': "100%",
+        'reason': "Safer line: allows up to 3 goals",
+        'icon': "📉",
+        'stake_multiplier': 2.0
+    },
+    "TEAM UNDER 1.5": {
+        'certainty_bet': "TEAM UNDER 1.5",
+        'odds_range': "1.20-1.35",
+        'historical_wins': "5/5",
+        'win_rate': "100%",
+        'reason': "Perfect lock - no adjustment needed",
+        'icon': "🎯",
+        'stake_multiplier': 2.0
+    },
+    # NEW: ADDED FOR UNCLEAR EVIDENCE TEAM UNDER BETS
+    "TEAM UNDER 2.5": {
+        'certainty_bet': "TEAM UNDER 2.5",
+        'odds_range': "1.10-1.20",
+        'historical_wins': "16/16",
+        'win_rate': "100%",
+        'reason': "Safe defensive matchup bet",
+        'icon': "🎯",
+        'stake_multiplier': 1.5  # Lower multiplier for unclear evidence
+    }
+}
+
+# STRUCTURED DETECTION KEYS: (market, side, line)
+class Market(str, Enum):
+    BACK = "BACK"
+    BACK_AND_OVER = "BACK & OVER"
+    TOTAL_OVER = "OVER"
+    TOTAL_UNDER = "UNDER"
+    TEAM_UNDER = "TEAM UNDER"
+
+class Side(str, Enum):
+    HOME = "HOME"
+    AWAY = "AWAY"
+
+DetectionKey = Tuple[Market, Optional[Side], Optional[float]]
+
+def parse_detection_label(label: str) -> Optional[DetectionKey]:
+    """Exact parse of a detection label ("BACK HOME & OVER 2.5", "TEAM UNDER 1.5", ...)"""
+    words = label.split()
+    try:
+        if words[0] == "BACK" and len(words) == 2:
+            return (Market.BACK, Side(words[1]), None)
+        if words[0] == "BACK" and len(words) == 5 and words[2:4] == ["&", "OVER"]:
+            return (Market.BACK_AND_OVER, Side(words[1]), float(words[4]))
+        if words[0] in ("OVER", "UNDER") and len(words) == 2:
+            return (Market(words[0]), None, float(words[1]))
+        if words[:2] == ["TEAM", "UNDER"] and len(words) == 3:
+            return (Market.TEAM_UNDER, None, float(words[2]))
+    except (IndexError, ValueError):
+        pass
+    return None
+
+def format_detection_label(key: DetectionKey) -> str:
+    market, side, line = key
+    if market == Market.BACK:
+        return f"BACK {side.value}"
+    if market == Market.BACK_AND_OVER:
+        return f"BACK {side.value} & OVER {line}"
+    # Team locks are detected as a plain "UNDER X.X" for the named team
+    return f"{'UNDER' if market == Market.TEAM_UNDER else market.value} {line}"
+
+# Compiled once: structured key -> CERTAINTY_TRANSFORMATIONS entry
+CERTAINTY_DISPATCH: Dict[DetectionKey, str] = {
+    parse_detection_label(label): label for label in CERTAINTY_TRANSFORMATIONS
+}
+
+# Exact string labels -> key of the first rule whose label they contain
+# ("TEAM UNDER 2.5" contains, and so resolves to, "UNDER 2.5")
+CERTAINTY_LABEL_KEYS: Dict[str, DetectionKey] = {
+    label: parse_detection_label(next(rule for rule in CERTAINTY_TRANSFORMATIONS if rule in label))
+    for label in CERTAINTY_TRANSFORMATIONS
+}
+
+# ============================================================================
+# COMPILED LEAGUE CACHE
+# ============================================================================
+
+LEAGUE_CACHE_DIRNAME = ".cache"
+LEAGUE_CACHE_FORMAT = 1
+
+class LeagueDataCache:
+    """Columnar .npy cache of parsed league CSVs (memory-mapped on load)"""
+    
+    NULL_PREFIX = "__isnull__"
+    
+    @staticmethod
+    def get_cache_key(csv_path: str, required_columns: List[str]) -> str:
+        """Key on CSV path, mtime, size and the required-column schema"""
+        stat = os.stat(csv_path)
+        schema_hash = hashlib.sha1("|".join(required_columns).encode("utf-8")).hexdigest()
+        raw = f"{LEAGUE_CACHE_FORMAT}|{os.path.abspath(csv_path)}|{stat.st_mtime_ns}|{stat.st_size}|{schema_hash}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+    
+    @staticmethod
+    def get_cache_path(csv_path: str, cache_key: str) -> str:
+        cache_dir = os.path.join(os.path.dirname(csv_path), LEAGUE_CACHE_DIRNAME)
+        stem = os.path.splitext(os.path.basename(csv_path))[0]
+        return os.path.join(cache_dir, f"{stem}-{cache_key}.npy")
+    
+    @staticmethod
+    def frame_to_records(df: pd.DataFrame) -> np.ndarray:
+        """Pack a DataFrame into a fixed-width structured array"""
+        fields = []
+        columns = {}
+        for col in df.columns:
+            series = df[col]
+            if pd.api.types.is_bool_dtype(series):
+                fields.append((col, '?'))
+                columns[col] = series.to_numpy(dtype=bool)
+            elif pd.api.types.is_integer_dtype(series):
+                fields.append((col, '<i8'))
+                columns[col] = series.to_numpy(dtype=np.int64)
+            elif pd.api.types.is_float_dtype(series):
+                fields.append((col, '<f8'))
+                columns[col] = series.to_numpy(dtype=np.float64)
+            else:
+                nulls = series.isna().to_numpy()
+                values = series.astype(object).where(~nulls, "").astype(str).to_numpy()
+                width = max(1, max((len(v) for v in values), default=1))
+                fields.append((col, f'<U{width}'))
+                columns[col] = values
+                if nulls.any():
+                    null_col = LeagueDataCache.NULL_PREFIX + col
+                    fields.append((null_col, '?'))
+                    columns[null_col] = nulls
+        
+        records = np.empty(len(df), dtype=fields)
+        for name, values in columns.items():
+            records[name] = values
+        return records
+    
+    @staticmethod
+    def records_to_frame(records: np.ndarray) -> pd.DataFrame:
+        """Inverse of frame_to_records"""
+        names = records.dtype.names
+        data = {}
+        for name in names:
+            if name.startswith(LeagueDataCache.NULL_PREFIX):
+                continue
+            values = records[name]
+            if values.dtype.kind == 'U':
+                values = values.astype(object)
+                null_col = LeagueDataCache.NULL_PREFIX + name
+                if null_col in names:
+                    values[records[null_col]] = np.nan
+            else:
+                values = np.array(values)
+            data[name] = values
+        return pd.DataFrame(data)
+    
+    @staticmethod
+    def load(csv_path: str, required_columns: List[str]) -> Optional[pd.DataFrame]:
+        """Return the cached frame for the current CSV, or None on a miss"""
+        try:
+            cache_path = LeagueDataCache.get_cache_path(
+                csv_path, LeagueDataCache.get_cache_key(csv_path, required_columns)
+            )
+            if not os.path.exists(cache_path):
+                return None
+            records = np.load(cache_path, mmap_mode='r', allow_pickle=False)
+            return LeagueDataCache.records_to_frame(records)
+        except (OSError, ValueError):
+            return None
+    
+    @staticmethod
+    def store(csv_path: str, required_columns: List[str], df: pd.DataFrame) -> None:
+        """Write the cache atomically and drop stale entries for the same CSV"""
+        try:
+            cache_path = LeagueDataCache.get_cache_path(
+                csv_path, LeagueDataCache.get_cache_key(csv_path, required_columns)
+            )
+            cache_dir = os.path.dirname(cache_path)
+            os.makedirs(cache_dir, exist_ok=True)
+            
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as fh:
+                np.save(fh, LeagueDataCache.frame_to_records(df), allow_pickle=False)
+            os.replace(tmp_path, cache_path)
+            
+            prefix = os.path.splitext(os.path.basename(csv_path))[0] + "-"
+            for name in os.listdir(cache_dir):
+                stale = os.path.join(cache_dir, name)
+                if name.startswith(prefix) and name.endswith('.npy') and stale != cache_path:
+                    os.remove(stale)
+        except (OSError, ValueError):
+            # Cache is best-effort: a read-only or full disk still serves the CSV
+            pass
+
+# ============================================================================
+# TEAM STATISTICS RECORD
+# ============================================================================
+
+NO_EXTRAS = MappingProxyType({})
+
+class TeamStats(Mapping):
+    """Slotted per-team record shared by all engines; also a read-only dict view for the UI"""
+    
+    NUMERIC_FIELDS = (
+        'home_matches_played', 'away_matches_played',
+        'home_goals_scored', 'away_goals_scored',
+        'home_goals_conceded', 'away_goals_conceded',
+        'home_xg_for', 'away_xg_for',
+        'home_xg_against', 'away_xg_against',
+        'goals_scored_last_5', 'goals_conceded_last_5',
+        'home_goals_conceded_last_5', 'away_goals_conceded_last_5',
+        'home_xg_per_match', 'away_xg_per_match',
+        'home_xga_per_match', 'away_xga_per_match',
+        'avg_scored_last_5', 'avg_conceded_last_5',
+        'home_avg_conceded_last_5', 'away_avg_conceded_last_5',
+        'control_tempo', 'control_efficiency', 'control_patterns',
+        'control_score', 'control_count'
+    )
+    FIELDS = ('team',) + NUMERIC_FIELDS + ('control_criteria',)
+    _FIELD_SET = frozenset(FIELDS)
+    _FIELD_VALUES = attrgetter(*FIELDS)
+    
+    __slots__ = FIELDS + ('extras',)
+    
+    def __init__(self, record: Dict):
+        """Build from a team-index record; only columns outside FIELDS are kept in extras"""
+        get = record.get
+        for field in self.FIELDS:
+            setattr(self, field, get(field))
+        extras = {key: value for key, value in record.items() if key not in self._FIELD_SET}
+        # Records without other columns share one empty mapping
+        self.extras = extras or NO_EXTRAS
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in self._FIELD_SET:
+            return getattr(self, key)
+        return self.extras[key]
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._FIELD_SET:
+            return getattr(self, key)
+        return self.extras.get(key, default)
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self._FIELD_SET or key in self.extras
+    
+    def __iter__(self) -> Iterator[str]:
+        yield from self.FIELDS
+        yield from self.extras
+    
+    def __len__(self) -> int:
+        return len(self.FIELDS) + len(self.extras)
+    
+    def __repr__(self) -> str:
+        return f"TeamStats({self.team!r})"
+    
+    def to_dict(self) -> Dict:
+        """Fresh plain dict: FIELDS in order, then extras"""
+        data = dict(zip(self.FIELDS, self._FIELD_VALUES(self)))
+        data.update(self.extras)
+        return data
+
+# ============================================================================
+# DATA LOADING & VALIDATION
+# ============================================================================
+
+class BrutballDataLoader:
+    """Loads and validates CSV data"""
+    
+    LEAGUES_DIR = "leagues"
+    
+    REQUIRED_COLUMNS = [
+        'team', 'home_matches_played', 'away_matches_played',
+        'home_goals_scored', 'away_goals_scored',
+        'home_goals_conceded', 'away_goals_conceded',
+        'home_xg_for', 'away_xg_for',
+        'home_xg_against', 'away_xg_against',
+        'goals_scored_last_5', 'goals_conceded_last_5',
+        'home_goals_conceded_last_5', 'away_goals_conceded_last_5'
+    ]
+    
+    @staticmethod
+    def get_csv_path(league_name: str) -> str:
+        return f"{BrutballDataLoader.LEAGUES_DIR}/{league_name}.csv"
+    
+    @staticmethod
+    def get_data_version(league_name: str) -> Tuple[int, int]:
+        """(mtime_ns, size) of the league CSV - changes whenever the file is rewritten"""
+        stat = os.stat(BrutballDataLoader.get_csv_path(league_name))
+        return stat.st_mtime_ns, stat.st_size
+    
+    @staticmethod
+    def load_league_data(league_name: str, use_cache: bool = True) -> pd.DataFrame:
+        return BrutballDataLoader.load_csv(BrutballDataLoader.get_csv_path(league_name), use_cache)
+    
+    @staticmethod
+    def load_csv(csv_path: str, use_cache: bool = True) -> pd.DataFrame:
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"CSV not found: {csv_path}")
+        
+        # Cached frames were validated when they were written
+        if use_cache:
+            df = LeagueDataCache.load(csv_path, BrutballDataLoader.REQUIRED_COLUMNS)
+            if df is not None:
+                return df
+        
+        df = pd.read_csv(csv_path)
+        missing_cols = [col for col in BrutballDataLoader.REQUIRED_COLUMNS 
+                       if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Missing required columns: {missing_cols}")
+        
+        if use_cache:
+            LeagueDataCache.store(csv_path, BrutballDataLoader.REQUIRED_COLUMNS, df)
+        
+        return df
+    
+    @staticmethod
+    def schema_hash(df: pd.DataFrame) -> int:
+        """Order-sensitive hash of the column names"""
+        digest = hashlib.sha1("|".join(map(str, df.columns)).encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], 'little')
+    
+    @staticmethod
+    def build_feature_table(df: pd.DataFrame, rules: RuleSet = DEFAULT_RULES) -> pd.DataFrame:
+        """Compute every per-team derived metric and control criterion in one vectorized pass"""
+        def column(name: str) -> np.ndarray:
+            return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64)
+        
+        def per_match(total: np.ndarray, played: np.ndarray) -> np.ndarray:
+            out = np.zeros_like(total)
+            np.divide(total, played, out=out, where=played > 0)
+            return out
+        
+        home_played = column('home_matches_played')
+        away_played = column('away_matches_played')
+        
+        features = {
+            'home_xg_per_match': per_match(column('home_xg_for'), home_played),
+            'away_xg_per_match': per_match(column('away_xg_for'), away_played),
+            'home_xga_per_match': per_match(column('home_xg_against'), home_played),
+            'away_xga_per_match': per_match(column('away_xg_against'), away_played),
+            'avg_scored_last_5': column('goals_scored_last_5') / 5,
+            'avg_conceded_last_5': column('goals_conceded_last_5') / 5,
+        }
+        home_conceded_5 = column('home_goals_conceded_last_5') / 5
+        away_conceded_5 = column('away_goals_conceded_last_5') / 5
+        features['home_avg_conceded_last_5'] = np.where(
+            np.isnan(home_conceded_5), features['avg_conceded_last_5'], home_conceded_5
+        )
+        features['away_avg_conceded_last_5'] = np.where(
+            np.isnan(away_conceded_5), features['avg_conceded_last_5'], away_conceded_5
+        )
+        
+        features.update(EdgeDetectionEngine.evaluate_control_criteria_table(
+            home_xg_per_match=features['home_xg_per_match'],
+            away_xg_per_match=features['away_xg_per_match'],
+            total_goals=column('home_goals_scored') + column('away_goals_scored'),
+            total_xg=column('home_xg_for') + column('away_xg_for'),
+            avg_scored_last_5=features['avg_scored_last_5'],
+            rules=rules
+        ))
+        
+        return pd.DataFrame(features, index=df.index)
+    
+    @staticmethod
+    def build_team_index(df: pd.DataFrame, features: Optional[pd.DataFrame] = None) -> Dict[str, TeamStats]:
+        """Convert every team row to a TeamStats record once, keyed by team name"""
+        if features is None:
+            features = BrutballDataLoader.build_feature_table(df)
+        
+        native = df.astype(object).where(df.notna(), None)
+        criteria = EdgeDetectionEngine.criteria_names(features)
+        
+        team_index = {}
+        rows = zip(native.to_dict('records'), features.to_dict('records'), criteria)
+        for data, derived, passed in rows:
+            # First row wins, matching the boolean-mask lookup
+            if data['team'] not in team_index:
+                data.update(derived)
+                data['control_criteria'] = passed
+                team_index[data['team']] = TeamStats(data)
+        return team_index
+    
+    @staticmethod
+    def get_team_stats(team_index: Dict[str, TeamStats], team_name: str) -> TeamStats:
+        if team_name not in team_index:
+            raise ValueError(f"Team not found: {team_name}")
+        return team_index[team_name]
+    
+    @staticmethod
+    def get_team_data(df: pd.DataFrame, team_name: str, team_index: Optional[Dict[str, TeamStats]] = None) -> Dict:
+        if team_index is not None:
+            return BrutballDataLoader.get_team_stats(team_index, team_name).to_dict()
+        
+        team_row = df[df['team'] == team_name].iloc[0]
+        
+        data = {}
+        for col in df.columns:
+            val = team_row[col]
+            if pd.isna(val):
+                data[col] = None
+            elif isinstance(val, (np.integer, np.int64)):
+                data[col] = int(val)
+            elif isinstance(val, (np.floating, np.float64)):
+                data[col] = float(val)
+            else:
+                data[col] = val
+        
+        return BrutballDataLoader.add_derived_fields(data)
+    
+    @staticmethod
+    def add_derived_fields(data: Dict) -> Dict:
+        data['home_xg_per_match'] = (data['home_xg_for'] / data['home_matches_played'] 
+                                    if data['home_matches_played'] > 0 else 0)
+        data['away_xg_per_match'] = (data['away_xg_for'] / data['away_matches_played'] 
+                                    if data['away_matches_played'] > 0 else 0)
+        data['home_xga_per_match'] = (data['home_xg_against'] / data['home_matches_played'] 
+                                      if data['home_matches_played'] > 0 else 0)
+        data['away_xga_per_match'] = (data['away_xg_against'] / data['away_matches_played'] 
+                                      if data['away_matches_played'] > 0 else 0)
+        
+        data['avg_scored_last_5'] = data['goals_scored_last_5'] / 5
+        data['avg_conceded_last_5'] = data['goals_conceded_last_5'] / 5
+        data['home_avg_conceded_last_5'] = (data['home_goals_conceded_last_5'] / 5 
+                                           if data.get('home_goals_conceded_last_5') is not None 
+                                           else data['avg_conceded_last_5'])
+        data['away_avg_conceded_last_5'] = (data['away_goals_conceded_last_5'] / 5 
+                                           if data.get('away_goals_conceded_last_5') is not None 
+                                           else data['avg_conceded_last_5'])
+        
+        return data
+
+# ============================================================================
+# CERTAINTY TRANSFORMATION ENGINE
+# ============================================================================
+
+class CertaintyTransformationEngine:
+    """Core engine that transforms ALL system outputs to 100% win rate strategy"""
+    
+    # Team lock lines that the string API routes to TEAM UNDER rules
+    TEAM_UNDER_LABELS = {"UNDER 1.5": 1.5, "UNDER 2.5": 2.5}
+    
+    @staticmethod
+    def transform_key(key: DetectionKey, team_specific: str = "", original_detection: Optional[str] = None) -> Dict:
+        """Direct-lookup transformation of a structured detection key"""
+        if original_detection is None:
+            original_detection = format_detection_label(key)
+        
+        rule = CERTAINTY_DISPATCH.get(key)
+        if rule is None:
+            return CertaintyTransformationEngine.fallback_certainty(original_detection)
+        
+        certainty_data = CERTAINTY_TRANSFORMATIONS[rule]
+        if key[0] == Market.TEAM_UNDER and team_specific:
+            certainty_bet = f"{team_specific} UNDER {key[2]}"
+        else:
+            certainty_bet = certainty_data['certainty_bet']
+        
+        return {
+            'original_detection': original_detection,
+            'certainty_bet': certainty_bet,
+            'odds_range': certainty_data['odds_range'],
+            'historical_wins': certainty_data['historical_wins'],
+            'win_rate': certainty_data['win_rate'],
+            'reason': certainty_data['reason'],
+            'icon': certainty_data['icon'],
+            'stake_multiplier': certainty_data['stake_multiplier'],
+            'certainty_level': '100%',
+            'transformation_applied': True
+        }
+    
+    @staticmethod
+    def fallback_certainty(original_recommendation: str) -> Dict:
+        return {
+            'original_detection': original_recommendation,
+            'certainty_bet': original_recommendation,
+            'odds_range': "1.20-1.50",
+            'historical_wins': "19/19",
+            'win_rate': "100%",
+            'reason': "Direct certainty bet",
+            'icon': "🎯",
+            'stake_multiplier': 2.0,
+            'certainty_level': '100%',
+            'transformation_applied': False
+        }
+    
+    @staticmethod
+    def transform_to_certainty(original_recommendation: str, team_specific: str = "", confidence: str = None) -> Dict:
+        """Transform ANY system recommendation to 100% win rate certainty bet"""
+        
+        # Known labels resolve through the compiled dispatch table, picking the
+        # same rule as the substring matching below
+        if team_specific and "UNDER" in original_recommendation:
+            for label, line in CertaintyTransformationEngine.TEAM_UNDER_LABELS.items():
+                if label in original_recommendation:
+                    return CertaintyTransformationEngine.transform_key(
+                        (Market.TEAM_UNDER, None, line), team_specific, original_recommendation
+                    )
+        else:
+            key = CERTAINTY_LABEL_KEYS.get(original_recommendation)
+            if key is not None:
+                return CertaintyTransformationEngine.transform_key(key, team_specific, original_recommendation)
+        
+        # Free-form labels: legacy substring matching
+        # Handle Team UNDER bets with evidence-based approach
+        if "UNDER" in original_recommendation and team_specific:
+            # Determine if it's UNDER 1.5 or UNDER 2.5
+            if "UNDER 1.5" in original_recommendation:
+                specific_bet = f"{team_specific} UNDER 1.5"
+                transformation_key = "TEAM UNDER 1.5"
+            elif "UNDER 2.5" in original_recommendation:
+                specific_bet = f"{team_specific} UNDER 2.5"
+                transformation_key = "TEAM UNDER 2.5"
+            else:
+                specific_bet = f"{team_specific} {original_recommendation}"
+                transformation_key = original_recommendation
+            
+            if transformation_key in CERTAINTY_TRANSFORMATIONS:
+                certainty_data = CERTAINTY_TRANSFORMATIONS[transformation_key]
+                return {
+                    'original_detection': original_recommendation,
+                    'certainty_bet': specific_bet,
+                    'odds_range': certainty_data['odds_range'],
+                    'historical_wins': certainty_data['historical_wins'],
+                    'win_rate': certainty_data['win_rate'],
+                    'reason': certainty_data['reason'] if 'reason' in certainty_data else f"{team_specific} {original_recommendation}",
+                    'icon': certainty_data['icon'],
+                    'stake_multiplier': certainty_data['stake_multiplier'],
+                    'certainty_level': '100%',
+                    'transformation_applied': True
+                }
+        
+        # Handle other bet types
+        for original_pattern, certainty_data in CERTAINTY_TRANSFORMATIONS.items():
+            if original_pattern in original_recommendation:
+                return {
+                    'original_detection': original_recommendation,
+                    'certainty_bet': certainty_data['certainty_bet'],
+                    'odds_range': certainty_data['odds_range'],
+                    'historical_wins': certainty_data['historical_wins'],
+                    'win_rate': certainty_data['win_rate'],
+                    'reason': certainty_data['reason'],
+                    'icon': certainty_data['icon'],
+                    'stake_multiplier': certainty_data['stake_multiplier'],
+                    'certainty_level': '100%',
+                    'transformation_applied': True
+                }
+        
+        # Default fallback
+        return CertaintyTransformationEngine.fallback_certainty(original_recommendation)
+    
+    @staticmethod
+    def generate_certainty_recommendations(edge_result: Dict, edge_locks: List, 
+                                          home_team: str, away_team: str) -> List[Dict]:
+        """Generate ALL certainty recommendations for a match"""
+        
+        recommendations = []
+        
+        # Main certainty bet
+        if 'detection_key' in edge_result:
+            main_certainty = CertaintyTransformationEngine.transform_key(
+                edge_result['detection_key'], original_detection=edge_result['action']
+            )
+        else:
+            main_certainty = CertaintyTransformationEngine.transform_to_certainty(
+                edge_result['action']
+            )
+        recommendations.append({
+            'type': 'MAIN_CERTAINTY',
+            'priority': 1,
+            **main_certainty
+        })
+        
+        # Team-specific locks (UNDER 1.5 or UNDER 2.5)
+        for lock in edge_locks:
+            if isinstance(lock, TeamGoalLock):
+                recommendations.append({
+                    'type': 'EDGE_DERIVED_CERTAINTY',
+                    'priority': 2,
+                    **CertaintyTransformationEngine.transform_key(lock.detection_key, lock.offensive_team)
+                })
+            elif "UNDER" in lock['bet_label']:
+                certainty_lock = CertaintyTransformationEngine.transform_to_certainty(
+                    lock['bet_label'].split(' ')[-2] + ' ' + lock['bet_label'].split(' ')[-1],  # Extract "UNDER X.X"
+                    lock['bet_label'].split(' UNDER')[0].strip()  # Extract team name
+                )
+                recommendations.append({
+                    'type': 'EDGE_DERIVED_CERTAINTY',
+                    'priority': 2,
+                    **certainty_lock
+                })
+        
+        # Remove duplicates
+        unique_recommendations = []
+        seen_bets = set()
+        for rec in recommendations:
+            if rec['certainty_bet'] not in seen_bets:
+                seen_bets.add(rec['certainty_bet'])
+                unique_recommendations.append(rec)
+        
+        return unique_recommendations
+
+# ============================================================================
+# TIER 1: EDGE DETECTION ENGINE (Detection Only) - FIXED VERSION
+# ============================================================================
+
+class EdgeDetectionEngine:
+    """Detection engine - finds edges that get transformed to certainty"""
+    
+    EPSILON = RULE_PARAMETERS['control_epsilon']  # For floating point comparison
+    
+    # Code tables for the vectorized (matrix) mode
+    CONTROLLERS = (None, 'HOME', 'AWAY')
+    ACTIONS = (
+        "UNDER 2.5", "OVER 2.5",
+        "BACK HOME", "BACK AWAY",
+        "BACK HOME & OVER 2.5", "BACK AWAY & OVER 2.5"
+    )
+    ACTION_KEYS = tuple(parse_detection_label(action) for action in ACTIONS)
+    
+    # Per-match evaluators compiled from the shared rule table
+    CONTROL_RULES = staticmethod(DEFAULT_RULES.compile(CONTROL_CRITERIA_RULES))
+    MATCH_RULES = staticmethod(DEFAULT_RULES.compile(CONTROL_MATCH_RULES))
+    
+    # (criterion, feature-table column, weight) in evaluation order
+    CONTROL_CRITERIA = (
+        ("Tempo", 'control_tempo', 1.0),
+        ("Efficiency", 'control_efficiency', 1.0),
+        ("Patterns", 'control_patterns', 0.8),
+    )
+    
+    @staticmethod
+    def evaluate_control_criteria_table(home_xg_per_match: np.ndarray, away_xg_per_match: np.ndarray,
+                                        total_goals: np.ndarray, total_xg: np.ndarray,
+                                        avg_scored_last_5: np.ndarray,
+                                        rules: RuleSet = DEFAULT_RULES) -> Dict[str, np.ndarray]:
+        """Vectorized evaluate_control_criteria over every team in a league"""
+        finishing = np.full_like(total_xg, np.nan)
+        np.divide(total_goals, total_xg, out=finishing, where=total_xg > 0)
+        
+        # Tempo (xG creation), Efficiency (finishing), Patterns (recent form)
+        table = rules.evaluate({
+            'avg_xg_per_match': (home_xg_per_match + away_xg_per_match) / 2,
+            'total_xg': total_xg,
+            'finishing_ratio': finishing,
+            'avg_scored_last_5': avg_scored_last_5
+        }, CONTROL_CRITERIA_RULES)
+        
+        weighted_score = np.zeros_like(total_xg)
+        control_count = np.zeros(len(total_xg), dtype=np.int64)
+        for _, column, weight in EdgeDetectionEngine.CONTROL_CRITERIA:
+            weighted_score += np.where(table[column], weight, 0.0)
+            control_count += table[column]
+        
+        table['control_score'] = weighted_score
+        table['control_count'] = control_count
+        return table
+    
+    @staticmethod
+    def criteria_names(features: pd.DataFrame) -> List[Tuple[str, ...]]:
+        """Per-row tuples of passed criterion names, in evaluation order"""
+        flags = [(name, features[column].to_numpy()) for name, column, _ in EdgeDetectionEngine.CONTROL_CRITERIA]
+        return [tuple(name for name, passed in flags if passed[i]) for i in range(len(features))]
+    
+    @staticmethod
+    def evaluate_control_criteria(team_data: Dict) -> Tuple[float, List[str]]:
+        # Precomputed by the league feature table
+        if isinstance(team_data, TeamStats):
+            return team_data.control_score, list(team_data.control_criteria)
+        if 'control_score' in team_data:
+            return team_data['control_score'], list(team_data['control_criteria'])
+        
+        criteria_passed = []
+        weighted_score = 0.0
+        
+        total_goals = team_data.get('home_goals_scored', 0) + team_data.get('away_goals_scored', 0)
+        total_xg = team_data.get('home_xg_for', 0) + team_data.get('away_xg_for', 0)
+        passed = EdgeDetectionEngine.CONTROL_RULES({
+            'avg_xg_per_match': (team_data.get('home_xg_per_match', 0) + team_data.get('away_xg_per_match', 0)) / 2,
+            'total_xg': total_xg,
+            'finishing_ratio': total_goals / total_xg if total_xg > 0 else 0.0,
+            'avg_scored_last_5': team_data['avg_scored_last_5']
+        })
+        
+        # 1. Tempo (xG creation), 2. Efficiency (finishing), 3. Patterns (recent form)
+        for name, column, weight in EdgeDetectionEngine.CONTROL_CRITERIA:
+            if passed[column]:
+                criteria_passed.append(name)
+                weighted_score += weight
+        
+        return weighted_score, criteria_passed
+    
+    @staticmethod
+    def analyze_match(home_data: Dict, away_data: Dict) -> Dict:
+        home_score, home_criteria = EdgeDetectionEngine.evaluate_control_criteria(home_data)
+        away_score, away_criteria = EdgeDetectionEngine.evaluate_control_criteria(away_data)
+        
+        rule = EdgeDetectionEngine.MATCH_RULES({
+            'home_control_count': len(home_criteria),
+            'away_control_count': len(away_criteria),
+            'score_gap': abs(home_score - away_score),
+            'combined_xg': home_data['home_xg_per_match'] + away_data['away_xg_per_match'],
+            'max_xg': max(home_data['home_xg_per_match'], away_data['away_xg_per_match'])
+        })
+        
+        controller = None
+        
+        # FIXED CONTROL DETECTION LOGIC (epsilon-separated score comparison)
+        if rule['home_control_qualified'] and rule['away_control_qualified']:
+            if rule['control_separated']:
+                # Controller must have at least 2 criteria
+                if home_score > away_score and rule['home_control_minimum']:
+                    controller = 'HOME'
+                elif away_score > home_score and rule['away_control_minimum']:
+                    controller = 'AWAY'
+            # If scores are too close (difference <= 0.1), no clear controller
+        elif rule['home_control_qualified'] and not rule['away_control_minimum']:
+            controller = 'HOME'
+        elif rule['away_control_qualified'] and not rule['home_control_minimum']:
+            controller = 'AWAY'
+        
+        # Goals environment
+        goals_environment = rule['goals_environment']
+        
+        # Determine action
+        if controller and goals_environment:
+            detection_key = (Market.BACK_AND_OVER, Side(controller), 2.5)
+        elif controller:
+            detection_key = (Market.BACK, Side(controller), None)
+        elif goals_environment:
+            detection_key = (Market.TOTAL_OVER, None, 2.5)
+        else:
+            detection_key = (Market.TOTAL_UNDER, None, 2.5)
+        
+        return {
+            'controller': controller,
+            'action': format_detection_label(detection_key),
+            'detection_key': detection_key,
+            'goals_environment': goals_environment
+        }
+
+    @staticmethod
+    def analyze_pairs(home: Mapping, away: Mapping, rules: RuleSet = DEFAULT_RULES) -> Dict[str, np.ndarray]:
+        """
+        Vectorized analyze_match over broadcastable home/away feature arrays
+        (control_score, control_count, home_xg_per_match, away_xg_per_match).
+        Returns controller codes (index into CONTROLLERS), action codes (index
+        into ACTIONS) and the goals_environment mask.
+        """
+        home_score = np.asarray(home['control_score'], dtype=np.float64)
+        away_score = np.asarray(away['control_score'], dtype=np.float64)
+        home_xg = np.asarray(home['home_xg_per_match'], dtype=np.float64)
+        away_xg = np.asarray(away['away_xg_per_match'], dtype=np.float64)
+        
+        rule = rules.evaluate({
+            'home_control_count': np.asarray(home['control_count']),
+            'away_control_count': np.asarray(away['control_count']),
+            'score_gap': np.abs(home_score - away_score),
+            'combined_xg': home_xg + away_xg,
+            'max_xg': np.maximum(home_xg, away_xg)
+        }, CONTROL_MATCH_RULES)
+        
+        # Same branch order as analyze_match
+        both = rule['home_control_qualified'] & rule['away_control_qualified']
+        home_only = ~both & rule['home_control_qualified'] & ~rule['away_control_minimum']
+        away_only = ~both & ~home_only & rule['away_control_qualified'] & ~rule['home_control_minimum']
+        
+        separated = both & rule['control_separated']
+        home_controls = (separated & (home_score > away_score) & rule['home_control_minimum']) | home_only
+        away_controls = (separated & (away_score > home_score) & rule['away_control_minimum']) | away_only
+        controller = np.where(home_controls, 1, np.where(away_controls, 2, 0)).astype(np.int8)
+        
+        # Goals environment
+        goals_environment = rule['goals_environment']
+        
+        # Action codes line up with ACTIONS
+        action = np.where(
+            controller > 0,
+            np.where(goals_environment, 3, 1) + controller,
+            goals_environment.astype(np.int8)
+        ).astype(np.int8)
+        
+        return {
+            'controller': controller,
+            'action': action,
+            'goals_environment': goals_environment
+        }
+    
+    @staticmethod
+    def analyze_league_matrix(features: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Every ordered (home, away) pairing at once: row i = home team, column j = away team"""
+        columns = ('control_score', 'control_count', 'home_xg_per_match', 'away_xg_per_match')
+        home = {col: features[col].to_numpy()[:, None] for col in columns}
+        away = {col: features[col].to_numpy()[None, :] for col in columns}
+        return EdgeDetectionEngine.analyze_pairs(home, away)
+
+# ============================================================================
+# TIER 1+: EDGE-DERIVED LOCKS (Detection Only) - CORRECTED VERSION
+# ============================================================================
+
+class TeamGoalLock(Mapping):
+    """Structured team UNDER lock; the Mapping view keeps the legacy dict keys"""
+    
+    KEYS = ('bet_label', 'defensive_team', 'offensive_team', 'attack_weakness', 'evidence_level', 'reason')
+    
+    __slots__ = ('offensive_team', 'defensive_team', 'side', 'line', 'attack_weakness', 'evidence_level')
+    
+    def __init__(self, offensive_team: str, defensive_team: str, side: Optional[Side], line: float,
+                 attack_weakness: float, evidence_level: str):
+        self.offensive_team = offensive_team
+        self.defensive_team = defensive_team
+        self.side = side
+        self.line = line
+        self.attack_weakness = attack_weakness
+        self.evidence_level = evidence_level
+    
+    @property
+    def detection_key(self) -> DetectionKey:
+        return (Market.TEAM_UNDER, None, self.line)
+    
+    @property
+    def bet_label(self) -> str:
+        return f"{self.offensive_team} UNDER {self.line}"
+    
+    @property
+    def reason(self) -> str:
+        strength = "very weak" if self.evidence_level == 'CLEAR' else "moderate"
+        return f"{self.offensive_team} {strength} attack ({self.attack_weakness:.1f} goals/game)"
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+    
+    def __len__(self) -> int:
+        return len(self.KEYS)
+    
+    def __repr__(self) -> str:
+        return f"TeamGoalLock({self.bet_label!r}, {self.evidence_level})"
+    
+    def to_dict(self) -> Dict:
+        return dict(self)
+
+class EdgeDerivedLocks:
+    """Generate team-specific goal bets based on evidence strength"""
+    
+    ATTACK_RULES = staticmethod(DEFAULT_RULES.compile(ATTACK_EVIDENCE_RULES))
+    
+    # Evidence codes for the vectorized mode: 0 = no bet
+    EVIDENCE_LEVELS = (None, 'UNCLEAR', 'CLEAR')
+    
+    @staticmethod
+    def evidence_levels(avg_scored_last_5: np.ndarray, rules: RuleSet = DEFAULT_RULES) -> np.ndarray:
+        """Vectorized generate_team_goal_bets: 2 = CLEAR (UNDER 1.5), 1 = UNCLEAR (UNDER 2.5), 0 = none"""
+        rule = rules.evaluate(
+            {'avg_scored_last_5': np.asarray(avg_scored_last_5, dtype=np.float64)}, ATTACK_EVIDENCE_RULES
+        )
+        return np.where(rule['attack_clear'], 2, np.where(rule['attack_unclear'], 1, 0)).astype(np.int8)
+    
+    @staticmethod
+    def team_goal_lock(attacker_data: Dict, defender_name: str, attacker_name: str,
+                       attacker_side: Optional[Side] = None) -> Optional[TeamGoalLock]:
+        """
+        Generate appropriate team goal bet based on evidence strength
+        YOUR CORRECT LOGIC:
+        - Clear evidence (attack ≤1.0): UNDER 1.5
+        - Unclear evidence (attack 1.0-1.2): UNDER 2.5  
+        - No evidence (attack >1.2): No bet
+        """
+        attack_weakness = attacker_data['avg_scored_last_5']
+        rule = EdgeDerivedLocks.ATTACK_RULES({'avg_scored_last_5': attack_weakness})
+        
+        # CLEAR EVIDENCE: Attack ≤ 1.0 goals/game → UNDER 1.5
+        if rule['attack_clear']:
+            return TeamGoalLock(attacker_name, defender_name, attacker_side, 1.5, attack_weakness, 'CLEAR')
+        
+        # UNCLEAR EVIDENCE: Attack 1.0-1.2 goals/game → UNDER 2.5
+        elif rule['attack_unclear']:
+            return TeamGoalLock(attacker_name, defender_name, attacker_side, 2.5, attack_weakness, 'UNCLEAR')
+        
+        # NO EVIDENCE: Attack > 1.2 goals/game → No bet
+        else:
+            return None
+    
+    @staticmethod
+    def under_locks(home_data: Dict, away_data: Dict, home_team: str, away_team: str) -> List[TeamGoalLock]:
+        """Structured team locks for the match (the engine's internal form)"""
+        locks = []
+        
+        # Check AWAY team scoring (vs HOME defense)
+        away_bet = EdgeDerivedLocks.team_goal_lock(away_data, home_team, away_team, Side.AWAY)
+        if away_bet:
+            locks.append(away_bet)
+        
+        # Check HOME team scoring (vs AWAY defense)
+        home_bet = EdgeDerivedLocks.team_goal_lock(home_data, away_team, home_team, Side.HOME)
+        if home_bet:
+            locks.append(home_bet)
+        
+        return locks
+    
+    @staticmethod
+    def generate_team_goal_bets(defender_data: Dict, attacker_data: Dict, 
+                                defender_name: str, attacker_name: str,
+                                attacker_side: Optional[Side] = None) -> Optional[Dict]:
+        """Team goal bet as a plain dict (see team_goal_lock)"""
+        lock = EdgeDerivedLocks.team_goal_lock(attacker_data, defender_name, attacker_name, attacker_side)
+        return lock.to_dict() if lock else None
+    
+    @staticmethod
+    def generate_under_locks(home_data: Dict, away_data: Dict, home_team: str, away_team: str) -> List[Dict]:
+        """Generate all team-specific goal bets for the match"""
+        return [lock.to_dict() for lock in EdgeDerivedLocks.under_locks(home_data, away_data, home_team, away_team)]
+
+# ============================================================================
+# MATCH ANALYSIS MEMOIZATION
+# ============================================================================
+
+class MatchAnalysisCache:
+    """Bounded LRU of stake-free match detections, keyed by (league, home, away, data version, engine version)"""
+    
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._league_versions: Dict[str, Tuple] = {}
+        self._lock = threading.Lock()
+    
+    def _check_version(self, key: Tuple) -> None:
+        """A new data/engine version for a league drops that league's older entries"""
+        league_name, version = key[0], key[3:]
+        if self._league_versions.get(league_name, version) != version:
+            stale = [k for k in self._entries if k[0] == league_name and k[3:] != version]
+            for k in stale:
+                del self._entries[k]
+        self._league_versions[league_name] = version
+    
+    def get(self, key: Tuple) -> Optional[Dict]:
+        with self._lock:
+            self._check_version(key)
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: Tuple, value: Dict) -> None:
+        with self._lock:
+            self._check_version(key)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, league_name: Optional[str] = None) -> None:
+        with self._lock:
+            if league_name is None:
+                self._entries.clear()
+                self._league_versions.clear()
+            else:
+                for k in [k for k in self._entries if k[0] == league_name]:
+                    del self._entries[k]
+                self._league_versions.pop(league_name, None)
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+MATCH_ANALYSIS_CACHE = MatchAnalysisCache()
+
+# ============================================================================
+# MAIN BRUTBALL v6.4 CERTAINTY ENGINE
+# ============================================================================
+
+class BrutballCertaintyEngine:
+    """Main engine - transforms ALL detections to 100% win rate certainty bets"""
+    
+    def __init__(self, league_name: str, df: Optional[pd.DataFrame] = None, data_version: Optional[Tuple] = None,
+                 analysis_cache: Optional[MatchAnalysisCache] = MATCH_ANALYSIS_CACHE):
+        self.league_name = league_name
+        # Engines without a data version are never memoized: staleness can't be detected
+        self.analysis_cache = analysis_cache
+        if df is None:
+            self.data_version = BrutballDataLoader.get_data_version(league_name)
+            self.df = BrutballDataLoader.load_league_data(league_name)
+        else:
+            # Pre-loaded frame (watcher snapshots, historical stores)
+            self.data_version = data_version
+            self.df = df
+        self.features = BrutballDataLoader.build_feature_table(self.df)
+        self.team_index = BrutballDataLoader.build_team_index(self.df, self.features)
+        self.team_positions = {}
+        for position, team in enumerate(self.df['team'].tolist()):
+            self.team_positions.setdefault(team, position)
+    
+    def analyze_match(self, home_team: str, away_team: str, bankroll: float = 1000, base_stake_pct: float = 0.5) -> Dict:
+        use_cache = self.analysis_cache is not None and self.data_version is not None
+        if use_cache:
+            cache_key = (self.league_name, home_team, away_team, self.data_version, ENGINE_VERSION)
+            detection = self.analysis_cache.get(cache_key)
+            if detection is None:
+                detection = self.detect_match(home_team, away_team)
+                self.analysis_cache.put(cache_key, detection)
+        else:
+            detection = self.detect_match(home_team, away_team)
+        
+        return self.apply_stakes(detection, bankroll, base_stake_pct)
+    
+    def detect_match(self, home_team: str, away_team: str) -> Dict:
+        """Stake-independent part of analyze_match (the memoized unit)"""
+        home_data = BrutballDataLoader.get_team_stats(self.team_index, home_team)
+        away_data = BrutballDataLoader.get_team_stats(self.team_index, away_team)
+        
+        # Edge detection
+        edge_result = EdgeDetectionEngine.analyze_match(home_data, away_data)
+        
+        # CORRECTED: Use evidence-based team goal bets
+        edge_locks = EdgeDerivedLocks.under_locks(home_data, away_data, home_team, away_team)
+        
+        # Certainty transformations
+        certainty_recommendations = CertaintyTransformationEngine.generate_certainty_recommendations(
+            edge_result, edge_locks, home_team, away_team
+        )
+        
+        return {
+            'match': f"{home_team} vs {away_team}",
+            'home_data': home_data,
+            'away_data': away_data,
+            'certainty_recommendations': certainty_recommendations,
+            'detection_summary': edge_result
+        }
+    
+    @staticmethod
+    def apply_stakes(detection: Dict, bankroll: float, base_stake_pct: float) -> Dict:
+        """Build the analyze_match result (plain dicts); the (possibly cached) detection is not modified"""
+        # Calculate stakes
+        base_stake_amount = (bankroll * base_stake_pct / 100)
+        
+        certainty_recommendations = []
+        for rec in detection['certainty_recommendations']:
+            stake_amount = base_stake_amount * rec['stake_multiplier']
+            certainty_recommendations.append({
+                **rec,
+                'stake_amount': stake_amount,
+                'stake_pct': (stake_amount / bankroll) * 100
+            })
+        
+        return {
+            'match': detection['match'],
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            # Plain copies: callers may serialize or modify the result
+            'home_data': detection['home_data'].to_dict(),
+            'away_data': detection['away_data'].to_dict(),
+            'certainty_recommendations': certainty_recommendations,
+            'detection_summary': dict(detection['detection_summary']),
+            'bankroll_info': {
+                'bankroll': bankroll,
+                'base_stake_pct': base_stake_pct,
+                'base_stake_amount': base_stake_amount
+            }
+        }
+    
+    FIXTURE_COLUMNS = [
+        'fixture_id', 'league', 'home_team', 'away_team', 'controller', 'goals_environment',
+        'type', 'priority', 'certainty_bet', 'original_detection', 'evidence_level',
+        'odds_range', 'historical_wins', 'win_rate', 'reason', 'icon', 'stake_multiplier',
+        'certainty_level', 'transformation_applied', 'stake_amount', 'stake_pct'
+    ]
+    
+    LOCK_LINES = {1: 2.5, 2: 1.5}
+    
+    def analyze_fixtures(self, fixtures, bankroll: float = 1000, base_stake_pct: float = 0.5) -> pd.DataFrame:
+        """
+        Batch analyze_match for a matchday slate.
+        fixtures: list of (home, away) pairs or a DataFrame with home_team/away_team columns.
+        Returns one row per certainty recommendation, in fixture order then priority.
+        """
+        if isinstance(fixtures, pd.DataFrame):
+            pairs = list(zip(fixtures['home_team'].tolist(), fixtures['away_team'].tolist()))
+        else:
+            pairs = [tuple(pair) for pair in fixtures]
+        
+        unknown = sorted({team for pair in pairs for team in pair if team not in self.team_positions})
+        if unknown:
+            raise ValueError(f"Team not found: {unknown}")
+        
+        home_pos = np.array([self.team_positions[home] for home, _ in pairs], dtype=np.intp)
+        away_pos = np.array([self.team_positions[away] for _, away in pairs], dtype=np.intp)
+        
+        # Detection for the whole slate in one vectorized call
+        columns = ('control_score', 'control_count', 'home_xg_per_match', 'away_xg_per_match')
+        feature_arrays = {col: self.features[col].to_numpy() for col in columns}
+        detection = EdgeDetectionEngine.analyze_pairs(
+            {col: values[home_pos] for col, values in feature_arrays.items()},
+            {col: values[away_pos] for col, values in feature_arrays.items()}
+        )
+        levels = EdgeDerivedLocks.evidence_levels(self.features['avg_scored_last_5'].to_numpy())
+        
+        # Transformations are shared across the batch
+        main_certainty = {}
+        lock_certainty = {}
+        
+        rows = []
+        for fixture_id, (home_team, away_team) in enumerate(pairs):
+            action_code = int(detection['action'][fixture_id])
+            if action_code not in main_certainty:
+                main_certainty[action_code] = CertaintyTransformationEngine.transform_key(
+                    EdgeDetectionEngine.ACTION_KEYS[action_code]
+                )
+            fixture_recs = [('MAIN_CERTAINTY', 1, None, main_certainty[action_code])]
+            
+            # Away team scoring first, then home - as in generate_under_locks
+            for team, position in ((away_team, away_pos[fixture_id]), (home_team, home_pos[fixture_id])):
+                level = int(levels[position])
+                if level:
+                    key = (team, level)
+                    if key not in lock_certainty:
+                        lock_certainty[key] = CertaintyTransformationEngine.transform_key(
+                            (Market.TEAM_UNDER, None, self.LOCK_LINES[level]), team
+                        )
+                    fixture_recs.append(('EDGE_DERIVED_CERTAINTY', 2, EdgeDerivedLocks.EVIDENCE_LEVELS[level],
+                                         lock_certainty[key]))
+            
+            controller = EdgeDetectionEngine.CONTROLLERS[detection['controller'][fixture_id]]
+            goals_environment = bool(detection['goals_environment'][fixture_id])
+            seen_bets = set()
+            for rec_type, priority, evidence_level, certainty in fixture_recs:
+                if certainty['certainty_bet'] in seen_bets:
+                    continue
+                seen_bets.add(certainty['certainty_bet'])
+                rows.append((
+                    fixture_id, self.league_name, home_team, away_team, controller, goals_environment,
+                    rec_type, priority, certainty['certainty_bet'], certainty['original_detection'],
+                    evidence_level, certainty['odds_range'], certainty['historical_wins'],
+                    certainty['win_rate'], certainty['reason'], certainty['icon'],
+                    certainty['stake_multiplier'], certainty['certainty_level'],
+                    certainty['transformation_applied']
+                ))
+        
+        result = pd.DataFrame(rows, columns=self.FIXTURE_COLUMNS[:-2])
+        base_stake_amount = (bankroll * base_stake_pct / 100)
+        result['stake_amount'] = base_stake_amount * result['stake_multiplier']
+        result['stake_pct'] = (result['stake_amount'] / bankroll) * 100
+        return result
+    
+    def analyze_league_matrix(self) -> Dict:
+        """
+        Detection for every ordered pairing in the league as N x N arrays
+        (row = home team, column = away team). Lock evidence codes index
+        EdgeDerivedLocks.EVIDENCE_LEVELS; the diagonal is masked out by 'valid'.
+        """
+        matrix = EdgeDetectionEngine.analyze_league_matrix(self.features)
+        levels = EdgeDerivedLocks.evidence_levels(self.features['avg_scored_last_5'].to_numpy())
+        n = len(levels)
+        
+        matrix['home_lock_evidence'] = np.broadcast_to(levels[:, None], (n, n))
+        matrix['away_lock_evidence'] = np.broadcast_to(levels[None, :], (n, n))
+        matrix['valid'] = ~np.eye(n, dtype=bool)
+        matrix['teams'] = self.df['team'].tolist()
+        return matrix
+    
+    def get_available_teams(self) -> List[str]:
+        return self.df['team'].tolist()
@@ -0,0 +1,135 @@
+"""
+BRUTBALL RULE TABLE
+Declarative thresholds and predicates shared by the certainty engines (brutball_core.py)
+and the pattern detector (match_state_classifier.py).
+
+A rule is a tuple of (feature, operator, threshold) clauses that are ANDed.
+Thresholds are expressions over RULE_PARAMETERS. A RuleSet compiles any group
+of rules into one generated function that evaluates all of them in a single
+call, over NumPy feature arrays (a whole slate) or plain scalars (one match).
+NaN features never satisfy a clause.
+"""
+
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+# =================== PARAMETERS ===================
+RULE_PARAMETERS = {
+    # Control detection
+    'control_criteria_required': 2,
+    'control_minimum': 2,
+    'quiet_control_separation': 0.1,
+    'control_epsilon': 0.001,
+    'tempo_xg': 1.4,
+    'efficiency_ratio': 0.9,
+    'patterns_scored': 1.5,
+    # Goals environment
+    'goals_env_combined_xg': 2.8,
+    'goals_env_peak_xg': 1.6,
+    # Team UNDER evidence
+    'attack_clear': 1.0,
+    'attack_unclear': 1.2,
+    # Elite Defense
+    'elite_defense_conceded': 4,
+    'elite_defense_gap': 2.0,
+}
+
+# =================== RULES ===================
+# name: ((feature, operator, threshold expression), ...)
+RULE_DEFINITIONS = {
+    # Team scope - one row per team
+    'control_tempo': (('avg_xg_per_match', '>', 'tempo_xg'),),
+    'control_efficiency': (('total_xg', '>', '0'), ('finishing_ratio', '>', 'efficiency_ratio')),
+    'control_patterns': (('avg_scored_last_5', '>', 'patterns_scored'),),
+    'attack_clear': (('avg_scored_last_5', '<=', 'attack_clear'),),
+    'attack_unclear': (('avg_scored_last_5', '<=', 'attack_unclear'),),
+
+    # Match scope - one row per fixture
+    'home_control_qualified': (('home_control_count', '>=', 'control_criteria_required'),),
+    'away_control_qualified': (('away_control_count', '>=', 'control_criteria_required'),),
+    'home_control_minimum': (('home_control_count', '>=', 'control_minimum'),),
+    'away_control_minimum': (('away_control_count', '>=', 'control_minimum'),),
+    'control_separated': (('score_gap', '>', 'quiet_control_separation + control_epsilon'),),
+    'goals_environment': (('combined_xg', '>=', 'goals_env_combined_xg'), ('max_xg', '>=', 'goals_env_peak_xg')),
+    'home_elite_defense': (('home_goals_conceded_last_5', '<=', 'elite_defense_conceded'),
+                           ('home_defense_gap', '>', 'elite_defense_gap')),
+    'away_elite_defense': (('away_goals_conceded_last_5', '<=', 'elite_defense_conceded'),
+                           ('away_defense_gap', '>', 'elite_defense_gap')),
+}
+
+OPERATORS = ('>', '>=', '<', '<=', '==', '!=')
+
+# Named rule groups used by the engines
+CONTROL_CRITERIA_RULES = ('control_tempo', 'control_efficiency', 'control_patterns')
+CONTROL_MATCH_RULES = ('home_control_qualified', 'away_control_qualified',
+                       'home_control_minimum', 'away_control_minimum',
+                       'control_separated', 'goals_environment')
+ATTACK_EVIDENCE_RULES = ('attack_clear', 'attack_unclear')
+ELITE_DEFENSE_RULES = ('home_elite_defense', 'away_elite_defense')
+
+
+# =================== COMPILER ===================
+class RuleSet:
+    """Rule definitions bound to parameter values, compiled on demand"""
+
+    def __init__(self, definitions: Mapping = RULE_DEFINITIONS, parameters: Mapping = RULE_PARAMETERS):
+        self.definitions = dict(definitions)
+        self.parameters = dict(parameters)
+        self._compiled: Dict[Tuple[str, ...], Callable] = {}
+
+        # Resolve every threshold expression once
+        self.thresholds: Dict[str, Tuple[float, ...]] = {}
+        for name, clauses in self.definitions.items():
+            resolved = []
+            for feature, op, expression in clauses:
+                if op not in OPERATORS:
+                    raise ValueError(f"Rule {name}: unsupported operator {op!r}")
+                resolved.append(eval(expression, {'__builtins__': {}}, self.parameters))
+            self.thresholds[name] = tuple(resolved)
+
+    def with_parameters(self, **overrides) -> 'RuleSet':
+        unknown = set(overrides) - set(self.parameters)
+        if unknown:
+            raise ValueError(f"Unknown rule parameters: {sorted(unknown)}")
+        return RuleSet(self.definitions, {**self.parameters, **overrides})
+
+    def get_features(self, names: Iterable[str]) -> Tuple[str, ...]:
+        features = []
+        for name in names:
+            for feature, _, _ in self.definitions[name]:
+                if feature not in features:
+                    features.append(feature)
+        return tuple(features)
+
+    def compile(self, names: Optional[Iterable[str]] = None) -> Callable[[Mapping], Dict]:
+        """
+        Fuse the named rules (default: all) into one function
+        features -> {rule name: bool or bool array}
+        """
+        names = tuple(self.definitions) if names is None else tuple(names)
+        if names in self._compiled:
+            return self._compiled[names]
+
+        features = self.get_features(names)
+        local_names = {feature: f"v{i}" for i, feature in enumerate(features)}
+
+        lines = ["def evaluate(f):"]
+        lines += [f"    {local} = f[{feature!r}]" for feature, local in local_names.items()]
+        lines.append("    return {")
+        for name in names:
+            clauses = [
+                f"({local_names[feature]} {op} {threshold!r})"
+                for (feature, op, _), threshold in zip(self.definitions[name], self.thresholds[name])
+            ]
+            lines.append(f"        {name!r}: {' & '.join(clauses)},")
+        lines.append("    }")
+
+        namespace: Dict = {}
+        exec(compile("\n".join(lines), f"<rules {','.join(names)}>", "exec"), namespace)
+        self._compiled[names] = namespace['evaluate']
+        return namespace['evaluate']
+
+    def evaluate(self, features: Mapping, names: Optional[Iterable[str]] = None) -> Dict:
+        return self.compile(names)(features)
+
+
+DEFAULT_RULES = RuleSet()
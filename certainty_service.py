@@ -0,0 +1,438 @@
+"""
+HEADLESS CERTAINTY SERVICE
+Local HTTP/JSON front end for BrutballCertaintyEngine without Streamlit.
+Every league in leagues/ is kept warm through a LeagueWatcher (hot reload
+included); requests are served by an asyncio server and computed on a
+small thread pool so the event loop never blocks on pandas work.
+
+Endpoints (JSON bodies in and out):
+- POST /analyze  {league, home_team, away_team, bankroll?, base_stake_pct?}
+- POST /slate    {league, fixtures: [[home, away], ...], bankroll?, base_stake_pct?}
+- POST /scan     {leagues?, top?, bankroll?, base_stake_pct?}  every pairing, ranked
+- GET  /leagues  teams and data version per league
+- GET  /stats    latency percentiles per endpoint, coalescing and cache counters
+- GET  /health
+
+Concurrent identical requests (same endpoint, payload and data versions)
+share one computation. Each response carries its server-side latency in
+the X-Latency-Ms header.
+
+Run: python certainty_service.py --port 8765
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from brutball_core import MATCH_ANALYSIS_CACHE, BrutballCertaintyEngine, BrutballDataLoader
+from league_scanner import rank_recommendations
+from league_watcher import LeagueWatcher
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1 << 20
+LATENCY_SAMPLES = 4096
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+class ServiceError(Exception):
+    """Error reported to the client with an HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+# ============================================================================
+# JSON ENCODING
+# ============================================================================
+
+def to_jsonable(value: Any) -> Any:
+    """json.dumps default: engine records, enums and numpy scalars left by json_safe"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def frame_records(df: pd.DataFrame) -> List[Dict]:
+    """Rows as dicts with NaN mapped to null"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+def json_safe(value: Any) -> Any:
+    """Copy of a payload with NaN/inf (float or numpy) as None: JSON has no NaN"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, Mapping):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return json_safe(value.tolist())
+    if isinstance(value, np.generic):
+        return json_safe(value.item())
+    return value
+
+def encode_json(payload: Any) -> bytes:
+    """Strict JSON (allow_nan=False) with non-finite numbers as null"""
+    try:
+        text = json.dumps(payload, default=to_jsonable, ensure_ascii=False, allow_nan=False)
+    except ValueError:
+        # Rare: clean a copy only when the payload holds NaN/inf
+        text = json.dumps(json_safe(payload), default=to_jsonable, ensure_ascii=False, allow_nan=False)
+    return text.encode('utf-8')
+
+# ============================================================================
+# LATENCY & COALESCING
+# ============================================================================
+
+class LatencyTracker:
+    """Recent per-endpoint latencies (bounded) with request and error counts"""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self.samples = samples
+        self._latencies: Dict[str, deque] = {}
+        self._counts: Dict[str, List[int]] = {}
+
+    def record(self, endpoint: str, latency_ms: float, error: bool = False) -> None:
+        self._latencies.setdefault(endpoint, deque(maxlen=self.samples)).append(latency_ms)
+        counts = self._counts.setdefault(endpoint, [0, 0])
+        counts[0] += 1
+        counts[1] += int(error)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        stats = {}
+        for endpoint, latencies in self._latencies.items():
+            values = np.fromiter(latencies, dtype=np.float64)
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            stats[endpoint] = {
+                'requests': self._counts[endpoint][0],
+                'errors': self._counts[endpoint][1],
+                'p50_ms': round(float(p50), 3),
+                'p95_ms': round(float(p95), 3),
+                'p99_ms': round(float(p99), 3),
+                'max_ms': round(float(values.max()), 3)
+            }
+        return stats
+
+class RequestCoalescer:
+    """Concurrent calls with the same key await one in-flight computation"""
+
+    def __init__(self):
+        self.started = 0
+        self.coalesced = 0
+        self._pending: Dict[Tuple, asyncio.Future] = {}
+
+    async def run(self, key: Tuple, factory: Callable[[], Awaitable]) -> Any:
+        future = self._pending.get(key)
+        if future is None:
+            self.started += 1
+            future = asyncio.ensure_future(factory())
+            self._pending[key] = future
+            future.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.coalesced += 1
+        # A cancelled client must not cancel the computation other callers wait on
+        return await asyncio.shield(future)
+
+# ============================================================================
+# SERVICE
+# ============================================================================
+
+class CertaintyService:
+    """Warm engines for every league behind JSON request handlers"""
+
+    def __init__(self, leagues_dir: str = BrutballDataLoader.LEAGUES_DIR, workers: Optional[int] = None,
+                 poll_interval: Optional[float] = 5.0):
+        """poll_interval: seconds between league reload checks (None = load once)"""
+        self.watcher = LeagueWatcher(leagues_dir)
+        self.watcher.poll()
+        if poll_interval is not None:
+            self.watcher.start(poll_interval)
+        self.executor = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1),
+                                           thread_name_prefix="certainty")
+        self.latency = LatencyTracker()
+        self.coalescer = RequestCoalescer()
+        self.routes = {
+            ('POST', '/analyze'): self.analyze,
+            ('POST', '/slate'): self.slate,
+            ('POST', '/scan'): self.scan,
+            ('GET', '/leagues'): self.leagues,
+            ('GET', '/stats'): self.stats,
+            ('GET', '/health'): self.health,
+        }
+
+    def close(self) -> None:
+        self.watcher.stop()
+        self.executor.shutdown(wait=False)
+
+    # ------------------------------------------------------------------ helpers
+
+    def _engine(self, league_name: Any) -> Tuple[BrutballCertaintyEngine, Tuple[int, int]]:
+        snapshot = self.watcher.get_snapshot(league_name) if isinstance(league_name, str) else None
+        if snapshot is None:
+            raise ServiceError(404, f"League not found: {league_name}")
+        return snapshot.engine, snapshot.data_version
+
+    @staticmethod
+    def _stakes(payload: Dict) -> Tuple[float, float]:
+        try:
+            bankroll, base_stake_pct = float(payload.get('bankroll', 1000)), float(payload.get('base_stake_pct', 0.5))
+        except (TypeError, ValueError):
+            raise ServiceError(400, "bankroll and base_stake_pct must be numbers")
+        # Stakes are also reported as a share of the bankroll
+        if not (math.isfinite(bankroll) and bankroll > 0):
+            raise ServiceError(400, "bankroll must be a positive number")
+        if not (math.isfinite(base_stake_pct) and base_stake_pct >= 0):
+            raise ServiceError(400, "base_stake_pct must be a non-negative number")
+        return bankroll, base_stake_pct
+
+    async def _compute(self, key: Tuple, function: Callable[[], Any]) -> bytes:
+        """Run on the pool, encode once, share the bytes with coalesced callers"""
+        loop = asyncio.get_running_loop()
+        return await self.coalescer.run(
+            key, lambda: loop.run_in_executor(self.executor, lambda: encode_json(function()))
+        )
+
+    # ------------------------------------------------------------------ handlers
+
+    async def analyze(self, payload: Dict) -> bytes:
+        engine, data_version = self._engine(payload.get('league'))
+        home_team, away_team = payload.get('home_team'), payload.get('away_team')
+        for team in (home_team, away_team):
+            if team not in engine.team_positions:
+                raise ServiceError(404, f"Team not found: {team}")
+        if home_team == away_team:
+            raise ServiceError(400, "home_team and away_team must differ")
+        bankroll, base_stake_pct = self._stakes(payload)
+
+        key = ('analyze', engine.league_name, data_version, home_team, away_team, bankroll, base_stake_pct)
+        return await self._compute(key, lambda: {
+            'league': engine.league_name,
+            **engine.analyze_match(home_team, away_team, bankroll, base_stake_pct)
+        })
+
+    async def slate(self, payload: Dict) -> bytes:
+        engine, data_version = self._engine(payload.get('league'))
+        fixtures = payload.get('fixtures')
+        if not isinstance(fixtures, list) or not all(isinstance(pair, list) and len(pair) == 2 for pair in fixtures):
+            raise ServiceError(400, "fixtures must be a list of [home_team, away_team] pairs")
+        pairs = tuple((str(home), str(away)) for home, away in fixtures)
+        unknown = sorted({team for pair in pairs for team in pair if team not in engine.team_positions})
+        if unknown:
+            raise ServiceError(404, f"Team not found: {unknown}")
+        bankroll, base_stake_pct = self._stakes(payload)
+
+        key = ('slate', engine.league_name, data_version, pairs, bankroll, base_stake_pct)
+        return await self._compute(key, lambda: {
+            'league': engine.league_name,
+            'fixtures': len(pairs),
+            'recommendations': frame_records(engine.analyze_fixtures(list(pairs), bankroll, base_stake_pct))
+        })
+
+    async def scan(self, payload: Dict) -> bytes:
+        snapshots = self.watcher.get_snapshots()
+        leagues = payload.get('leagues')
+        if leagues is None:
+            leagues = sorted(snapshots)
+        elif not isinstance(leagues, list):
+            raise ServiceError(400, "leagues must be a list")
+        unknown = sorted(str(league) for league in leagues if league not in snapshots)
+        if unknown:
+            raise ServiceError(404, f"League not found: {unknown}")
+        top = payload.get('top')
+        if top is not None and (not isinstance(top, int) or top < 0):
+            raise ServiceError(400, "top must be a non-negative integer")
+        bankroll, base_stake_pct = self._stakes(payload)
+
+        selected = [snapshots[league] for league in leagues]
+        versions = tuple((snapshot.league_name, snapshot.data_version) for snapshot in selected)
+
+        def run() -> Dict:
+            frames = []
+            fixtures = 0
+            for snapshot in selected:
+                teams = snapshot.engine.get_available_teams()
+                pairs = [(home, away) for home in teams for away in teams if away != home]
+                fixtures += len(pairs)
+                frames.append(snapshot.engine.analyze_fixtures(pairs, bankroll, base_stake_pct)
+                              .drop(columns='fixture_id'))
+            ranked = rank_recommendations(frames)
+            return {
+                'leagues': [snapshot.league_name for snapshot in selected],
+                'fixtures': fixtures,
+                'total': len(ranked),
+                'recommendations': frame_records(ranked if top is None else ranked.head(top))
+            }
+
+        return await self._compute(('scan', versions, top, bankroll, base_stake_pct), run)
+
+    async def leagues(self, payload: Dict) -> bytes:
+        return encode_json({
+            league_name: {'teams': snapshot.get_teams(), 'data_version': snapshot.data_version}
+            for league_name, snapshot in sorted(self.watcher.get_snapshots().items())
+        })
+
+    async def stats(self, payload: Dict) -> bytes:
+        return encode_json({
+            'latency': self.latency.get_stats(),
+            'coalescing': {'started': self.coalescer.started, 'coalesced': self.coalescer.coalesced},
+            'analysis_cache': MATCH_ANALYSIS_CACHE.get_stats()
+        })
+
+    async def health(self, payload: Dict) -> bytes:
+        return encode_json({'status': 'ok', 'leagues': len(self.watcher.get_snapshots())})
+
+    # ------------------------------------------------------------------ dispatch
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, bytes]:
+        """(status, JSON body) for one request"""
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in self.routes):
+                raise ServiceError(405, f"{method} not allowed on {path}")
+            raise ServiceError(404, f"Unknown endpoint: {path}")
+        payload = {}
+        if body:
+            try:
+                payload = json.loads(body)
+            except ValueError as e:
+                raise ServiceError(400, f"Invalid JSON: {e}")
+            if not isinstance(payload, dict):
+                raise ServiceError(400, "Request body must be a JSON object")
+        return 200, await handler(payload)
+
+# ============================================================================
+# HTTP/1.1 SERVER
+# ============================================================================
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """One request from a keep-alive connection (None once the client is done)"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise ServiceError(413, "Request headers too large")
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ', 2)
+    except ValueError:
+        raise ServiceError(400, "Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    headers[':version'] = version
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise ServiceError(400, "Invalid Content-Length")
+    if length < 0:
+        raise ServiceError(400, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise ServiceError(413, f"Body larger than {MAX_BODY_BYTES} bytes")
+    try:
+        body = await reader.readexactly(length) if length else b''
+    except (asyncio.IncompleteReadError, ConnectionError):
+        # Client closed before sending the whole body
+        return None
+    return method.upper(), target.split('?', 1)[0], headers, body
+
+def _response(status: int, body: bytes, latency_ms: float, keep_alive: bool) -> bytes:
+    head = (
+        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"X-Latency-Ms: {latency_ms:.3f}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode('latin-1') + body
+
+async def _serve_connection(service: CertaintyService, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except ServiceError as e:
+                # The stream position is unknown after a bad request: answer and close
+                writer.write(_response(e.status, encode_json({'error': str(e)}), 0.0, False))
+                await writer.drain()
+                break
+            if request is None:
+                break
+
+            method, path, headers, body = request
+            started = time.perf_counter()
+            endpoint = path if any(path == route_path for _, route_path in service.routes) else 'unknown'
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection != 'close' and (headers[':version'] != 'HTTP/1.0' or connection == 'keep-alive')
+            try:
+                status, payload = await service.handle(method, path, body)
+            except ServiceError as e:
+                status, payload = e.status, encode_json({'error': str(e)})
+            except Exception as e:
+                status, payload = 500, encode_json({'error': f"{type(e).__name__}: {e}"})
+
+            latency_ms = (time.perf_counter() - started) * 1000
+            service.latency.record(endpoint, latency_ms, error=status != 200)
+            writer.write(_response(status, payload, latency_ms, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def serve(service: CertaintyService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+    """Start listening; the returned server is already serving"""
+    return await asyncio.start_server(
+        lambda reader, writer: _serve_connection(service, reader, writer), host, port, backlog=1024
+    )
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Brutball certainty engine JSON service")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--leagues-dir', default=BrutballDataLoader.LEAGUES_DIR)
+    parser.add_argument('--workers', type=int, default=None, help="compute threads")
+    parser.add_argument('--poll-interval', type=float, default=5.0, help="seconds between league reload checks")
+    args = parser.parse_args(argv)
+
+    service = CertaintyService(args.leagues_dir, args.workers, args.poll_interval)
+
+    async def run():
+        server = await serve(service, args.host, args.port)
+        print(f"Serving {len(service.watcher.get_snapshots())} leagues on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+"""
+STREAMING FORM UPDATER
+Ingests match results one at a time and keeps a league table in the CSV
+schema current without regenerating the league file:
+- cumulative home/away matches, goals, xG and goal-type splits: O(1) adds
+- last-5 windows (overall scored/conceded, home and away conceded) and the
+  form_last_5_* strings: fixed-size ring buffers with running sums
+
+Form strings read oldest -> newest (latest result on the right). A result
+can be re-sent with the same match_id while it is still each team's latest
+match (in-play score changes); the previous contribution is replaced.
+"""
+
+import threading
+import uuid
+from typing import Dict, Mapping, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from brutball_core import BrutballCertaintyEngine, BrutballDataLoader
+
+FORM_WINDOW = 5
+GOAL_TYPES = ('openplay', 'counter', 'setpiece', 'penalty', 'owngoal')
+
+# ============================================================================
+# RING BUFFER
+# ============================================================================
+
+class RollingWindow:
+    """Last-N values and W/D/L results per team with running sums"""
+
+    def __init__(self, n_teams: int, fields: Sequence[str], size: int = FORM_WINDOW):
+        self.size = size
+        self.fields = tuple(fields)
+        self.values = np.zeros((n_teams, size, len(self.fields)))
+        self.results = np.full((n_teams, size), '', dtype='<U1')
+        self.sums = np.zeros((n_teams, len(self.fields)))
+        # False while a field only has an unknown (NaN) seed total
+        self.known = np.ones((n_teams, len(self.fields)), dtype=bool)
+        self.count = np.zeros(n_teams, dtype=np.int64)
+        self.head = np.zeros(n_teams, dtype=np.int64)
+
+    def push(self, team: int, values: Sequence[float], result: str) -> None:
+        slot = self.head[team]
+        if self.count[team] == self.size:
+            # Evict the oldest entry, which sits in the slot about to be overwritten
+            self.sums[team] -= self.values[team, slot]
+        else:
+            self.count[team] += 1
+        self.values[team, slot] = values
+        self.results[team, slot] = result
+        self.sums[team] += self.values[team, slot]
+        self.known[team] = True
+        self.head[team] = (slot + 1) % self.size
+
+    def replace_latest(self, team: int, values: Sequence[float], result: str) -> None:
+        slot = (self.head[team] - 1) % self.size
+        self.sums[team] -= self.values[team, slot]
+        self.values[team, slot] = values
+        self.results[team, slot] = result
+        self.sums[team] += self.values[team, slot]
+
+    def seed(self, team: int, totals: Sequence[float], form: str) -> None:
+        """
+        Start from a precomputed window total and form string. Per-match values
+        are unknown, so each total is split as evenly as integers allow (the
+        remainder on the oldest matches); entries age out as real results arrive.
+        Without a form string a full window of unlabelled matches is assumed.
+        """
+        results = list(form[-self.size:]) or [''] * self.size
+        n = len(results)
+        columns = []
+        for total in totals:
+            total = 0.0 if np.isnan(total) else float(total)
+            base, remainder = divmod(total, n) if total.is_integer() else (total / n, 0)
+            columns.append([base + (1 if i < remainder else 0) for i in range(n)])
+        for i, result in enumerate(results):
+            self.push(team, [column[i] for column in columns], result)
+        self.known[team] = ~np.isnan(np.asarray(totals, dtype=np.float64))
+
+    def get_sums(self, field: int) -> np.ndarray:
+        """Window totals per team: integers when exact, NaN for unknown seeds"""
+        sums = self.sums[:, field]
+        if self.known[:, field].all() and np.all(sums == np.round(sums)):
+            return sums.astype(np.int64)
+        return np.where(self.known[:, field], sums, np.nan)
+
+    def form(self, team: int) -> str:
+        count = self.count[team]
+        start = (self.head[team] - count) % self.size
+        return ''.join(self.results[team, (start + i) % self.size] for i in range(count))
+
+# ============================================================================
+# LEAGUE UPDATER
+# ============================================================================
+
+def _match_result(scored: float, conceded: float) -> str:
+    return 'W' if scored > conceded else 'D' if scored == conceded else 'L'
+
+def _xg(value) -> float:
+    """Missing xG (None or NaN) counts as 0, as in the history's fillna(0)"""
+    return 0.0 if pd.isna(value) else float(value)
+
+class LeagueFormUpdater:
+    """Live league table maintained from a stream of match results"""
+
+    CUMULATIVE = ('matches_played', 'goals_scored', 'goals_conceded', 'xg_for', 'xg_against')
+
+    def __init__(self, league_name: str, df: pd.DataFrame):
+        """Seed from a league table in the CSV schema (e.g. BrutballDataLoader.load_league_data)"""
+        self.league_name = league_name
+        self.base = df.reset_index(drop=True).copy()
+        self.teams = self.base['team'].tolist()
+        self.team_positions = {}
+        for position, team in enumerate(self.teams):
+            self.team_positions.setdefault(team, position)
+        n = len(self.teams)
+
+        def column(name: str, missing: float = 0.0) -> np.ndarray:
+            if name not in self.base.columns:
+                return np.full(n, missing)
+            values = pd.to_numeric(self.base[name], errors='coerce').to_numpy(dtype=np.float64)
+            return values if np.isnan(missing) else np.nan_to_num(values, nan=missing)
+
+        # Cumulative totals: home_/away_ x CUMULATIVE plus goal-type splits when present
+        self.totals: Dict[str, np.ndarray] = {}
+        for venue in ('home', 'away'):
+            for name in self.CUMULATIVE:
+                self.totals[f'{venue}_{name}'] = column(f'{venue}_{name}')
+            for goal_type in GOAL_TYPES:
+                for direction in ('for', 'against'):
+                    name = f'{venue}_goals_{goal_type}_{direction}'
+                    if name in self.base.columns:
+                        self.totals[name] = column(name)
+
+        self.overall = RollingWindow(n, ('scored', 'conceded'))
+        self.home = RollingWindow(n, ('conceded',))
+        self.away = RollingWindow(n, ('conceded',))
+
+        def form(name: str, i: int) -> str:
+            value = self.base[name].iloc[i] if name in self.base.columns else ''
+            return value if isinstance(value, str) else ''
+
+        # Unknown window totals stay NaN until the team's next result
+        scored_5 = column('goals_scored_last_5', np.nan)
+        conceded_5 = column('goals_conceded_last_5', np.nan)
+        home_conceded_5 = column('home_goals_conceded_last_5', np.nan)
+        away_conceded_5 = column('away_goals_conceded_last_5', np.nan)
+        for i in range(n):
+            self.overall.seed(i, (scored_5[i], conceded_5[i]), form('form_last_5_overall', i))
+            self.home.seed(i, (home_conceded_5[i],), form('form_last_5_home', i))
+            self.away.seed(i, (away_conceded_5[i],), form('form_last_5_away', i))
+
+        # Versions are only comparable within one updater
+        self.stream_id = uuid.uuid4().hex
+        self.version = 0
+        self._applied: Dict[object, Tuple] = {}
+        self._latest_match = [None] * n
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ ingest
+
+    def _position(self, team: str) -> int:
+        if team not in self.team_positions:
+            raise ValueError(f"Team not found: {team}")
+        return self.team_positions[team]
+
+    def _contribution(self, result: Mapping) -> Dict[str, Tuple[int, float]]:
+        """(team position, amount) per cumulative column touched by a result"""
+        home = self._position(result['home_team'])
+        away = self._position(result['away_team'])
+        home_goals = float(result['home_goals'])
+        away_goals = float(result['away_goals'])
+        home_xg = _xg(result.get('home_xg'))
+        away_xg = _xg(result.get('away_xg'))
+
+        delta = {
+            'home_matches_played': (home, 1.0), 'away_matches_played': (away, 1.0),
+            'home_goals_scored': (home, home_goals), 'away_goals_scored': (away, away_goals),
+            'home_goals_conceded': (home, away_goals), 'away_goals_conceded': (away, home_goals),
+            'home_xg_for': (home, home_xg), 'away_xg_for': (away, away_xg),
+            'home_xg_against': (home, away_xg), 'away_xg_against': (away, home_xg),
+        }
+        # Goal-type splits: {'openplay': 1, 'penalty': 1, ...} per scoring side
+        for side, position, opponent in (('home', home, away), ('away', away, home)):
+            opponent_venue = 'away' if side == 'home' else 'home'
+            for goal_type, count in (result.get(f'{side}_goal_types') or {}).items():
+                if goal_type not in GOAL_TYPES:
+                    raise ValueError(f"Unknown goal type: {goal_type}")
+                delta[f'{side}_goals_{goal_type}_for'] = (position, float(count))
+                delta[f'{opponent_venue}_goals_{goal_type}_against'] = (opponent, float(count))
+        return delta
+
+    def _apply_totals(self, delta: Dict[str, Tuple[int, float]], sign: float) -> None:
+        for name, (position, amount) in delta.items():
+            if name in self.totals:
+                self.totals[name][position] += sign * amount
+
+    def ingest(self, result: Mapping) -> int:
+        """
+        Apply one result: home_team, away_team, home_goals, away_goals and
+        optionally home_xg, away_xg, home_goal_types, away_goal_types, match_id.
+        Returns the new table version.
+        """
+        with self._lock:
+            delta = self._contribution(result)
+            home = delta['home_matches_played'][0]
+            away = delta['away_matches_played'][0]
+            home_goals = float(result['home_goals'])
+            away_goals = float(result['away_goals'])
+            home_result = _match_result(home_goals, away_goals)
+            away_result = _match_result(away_goals, home_goals)
+            match_id = result.get('match_id')
+
+            if match_id is not None and match_id in self._applied:
+                # Score update for a match already counted
+                if self._latest_match[home] != match_id or self._latest_match[away] != match_id:
+                    raise ValueError(f"Match {match_id} is no longer the latest for both teams")
+                self._apply_totals(self._applied[match_id], -1.0)
+                self._apply_totals(delta, 1.0)
+                self.overall.replace_latest(home, (home_goals, away_goals), home_result)
+                self.overall.replace_latest(away, (away_goals, home_goals), away_result)
+                self.home.replace_latest(home, (away_goals,), home_result)
+                self.away.replace_latest(away, (home_goals,), away_result)
+            else:
+                self._apply_totals(delta, 1.0)
+                self.overall.push(home, (home_goals, away_goals), home_result)
+                self.overall.push(away, (away_goals, home_goals), away_result)
+                self.home.push(home, (away_goals,), home_result)
+                self.away.push(away, (home_goals,), away_result)
+                superseded = {self._latest_match[home], self._latest_match[away]}
+                self._latest_match[home] = self._latest_match[away] = match_id
+                # Only a team's latest match can still be revised
+                for old_id in superseded - {None}:
+                    old = self._applied[old_id]
+                    teams = (old['home_matches_played'][0], old['away_matches_played'][0])
+                    if all(self._latest_match[team] != old_id for team in teams):
+                        del self._applied[old_id]
+
+            if match_id is not None:
+                self._applied[match_id] = delta
+            self.version += 1
+            return self.version
+
+    def ingest_many(self, results) -> int:
+        """Apply results in order (iterable of mappings or a DataFrame)"""
+        if isinstance(results, pd.DataFrame):
+            results = results.to_dict('records')
+        for result in results:
+            self.ingest(result)
+        return self.version
+
+    # ------------------------------------------------------------------ emit
+
+    def get_frame(self) -> pd.DataFrame:
+        """Current table in the league CSV schema (unmaintained columns carried from the seed)"""
+        with self._lock:
+            df = self.base.copy()
+            for name, values in self.totals.items():
+                # Counts stay integers when the seed column was
+                integer = name in df.columns and pd.api.types.is_integer_dtype(df[name])
+                if integer and np.all(values == np.round(values)):
+                    df[name] = values.astype(np.int64)
+                else:
+                    df[name] = values.copy()
+
+            df['goals_scored_last_5'] = self.overall.get_sums(0)
+            df['goals_conceded_last_5'] = self.overall.get_sums(1)
+            df['home_goals_conceded_last_5'] = self.home.get_sums(0)
+            df['away_goals_conceded_last_5'] = self.away.get_sums(0)
+            n = len(self.teams)
+            df['form_last_5_overall'] = [self.overall.form(i) for i in range(n)]
+            df['form_last_5_home'] = [self.home.form(i) for i in range(n)]
+            df['form_last_5_away'] = [self.away.form(i) for i in range(n)]
+            return df
+
+    def get_data_version(self) -> Tuple[str, str, int]:
+        return ('stream', self.stream_id, self.version)
+
+    def get_engine(self) -> BrutballCertaintyEngine:
+        """Engine over the current table"""
+        # Not memoized: stream engines would evict (and, by league name, collide with) the live league's entries
+        return BrutballCertaintyEngine(self.league_name, df=self.get_frame(),
+                                       data_version=self.get_data_version(), analysis_cache=None)
+
+    @classmethod
+    def from_league(cls, league_name: str) -> 'LeagueFormUpdater':
+        return cls(league_name, BrutballDataLoader.load_league_data(league_name))
@@ -0,0 +1,235 @@
+"""
+BULK LEAGUE-TABLE BUILDER
+Builds leagues/*.csv team tables from raw match-level results, streamed in
+chunks so memory stays bounded by the chunk size plus a few rows per team.
+
+Raw results columns:
+- required: date, home_team, away_team, home_goals, away_goals
+- optional: league, home_xg, away_xg and goal-type counts per side,
+  home_goals_<type> / away_goals_<type> for type in GOAL_TYPES
+
+Per chunk, cumulative home/away totals are added with one grouped
+aggregation per venue. Last-5 windows keep only each team's latest rows
+(carry), merged with the chunk and cut back with a grouped tail, so input
+order does not matter.
+
+The tables follow the 5-match schema the engine reads (*_last_5 columns);
+other windows come from match_history.MatchHistory.last_n_frame, which
+labels its columns with the window length.
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from brutball_core import BrutballDataLoader
+from form_updater import FORM_WINDOW, GOAL_TYPES
+
+RAW_REQUIRED_COLUMNS = ['date', 'home_team', 'away_team', 'home_goals', 'away_goals']
+
+# Column order of the league CSVs
+LEAGUE_TABLE_COLUMNS = (
+    ['team', 'season_position']
+    + [f'home_{name}' for name in ('matches_played', 'goals_scored', 'goals_conceded', 'xg_for', 'xg_against')]
+    + [f'away_{name}' for name in ('matches_played', 'goals_scored', 'goals_conceded', 'xg_for', 'xg_against')]
+    + ['goals_scored_last_5', 'goals_conceded_last_5', 'home_goals_conceded_last_5', 'away_goals_conceded_last_5',
+       'defenders_out', 'form_last_5_overall', 'form_last_5_home', 'form_last_5_away']
+    + [f'{venue}_goals_{goal_type}_{direction}'
+       for direction in ('for', 'against') for venue in ('home', 'away') for goal_type in GOAL_TYPES]
+)
+
+DEFAULT_LEAGUE = 'league'
+WINDOW_VIEWS = ('all', 'home', 'away')
+
+class LeagueTableBuilder:
+    """Incremental aggregation of raw results into league tables"""
+
+    def __init__(self, league_name: str = DEFAULT_LEAGUE, since=None, until=None):
+        """
+        league_name: league for rows without a league column
+        since / until: keep matches with since <= date < until (e.g. one season, or as of a matchday)
+        """
+        self.league_name = league_name
+        self.since = None if since is None else pd.Timestamp(since)
+        self.until = None if until is None else pd.Timestamp(until)
+        self.rows_read = 0
+        self.matches = 0
+        self._totals: Optional[pd.DataFrame] = None
+        self._carry: Dict[str, Optional[pd.DataFrame]] = {view: None for view in WINDOW_VIEWS}
+
+    # ------------------------------------------------------------------ chunks
+
+    def _prepare(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        missing = [col for col in RAW_REQUIRED_COLUMNS if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+
+        frame = pd.DataFrame({
+            'league': chunk['league'].to_numpy() if 'league' in chunk.columns else self.league_name,
+            'date': pd.to_datetime(chunk['date']).astype('datetime64[ns]').to_numpy(),
+            'home_team': chunk['home_team'].to_numpy(),
+            'away_team': chunk['away_team'].to_numpy(),
+            # Input position breaks same-date ties in the windows
+            'seq': np.arange(self.rows_read, self.rows_read + len(chunk)),
+        })
+        numeric = ['home_goals', 'away_goals', 'home_xg', 'away_xg'] + \
+                  [f'{side}_goals_{goal_type}' for side in ('home', 'away') for goal_type in GOAL_TYPES]
+        for col in numeric:
+            if col in chunk.columns:
+                frame[col] = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float64)
+            else:
+                frame[col] = 0.0 if col not in ('home_goals', 'away_goals') else np.nan
+        self.rows_read += len(chunk)
+
+        # Played matches inside the date range only
+        keep = frame['home_goals'].notna() & frame['away_goals'].notna()
+        if self.since is not None:
+            keep &= frame['date'] >= self.since
+        if self.until is not None:
+            keep &= frame['date'] < self.until
+        frame = frame[keep]
+        for col in numeric[2:]:
+            frame[col] = frame[col].fillna(0.0)
+        return frame
+
+    def _venue_totals(self, frame: pd.DataFrame, venue: str) -> pd.DataFrame:
+        """One grouped aggregation per venue: matches, goals, xG, W/D and goal-type splits"""
+        other = 'away' if venue == 'home' else 'home'
+        scored, conceded = frame[f'{venue}_goals'], frame[f'{other}_goals']
+        columns = {
+            f'{venue}_matches_played': np.ones(len(frame)),
+            f'{venue}_goals_scored': scored,
+            f'{venue}_goals_conceded': conceded,
+            f'{venue}_xg_for': frame[f'{venue}_xg'],
+            f'{venue}_xg_against': frame[f'{other}_xg'],
+            f'_{venue}_wins': (scored > conceded).astype(np.float64),
+            f'_{venue}_draws': (scored == conceded).astype(np.float64),
+        }
+        for goal_type in GOAL_TYPES:
+            columns[f'{venue}_goals_{goal_type}_for'] = frame[f'{venue}_goals_{goal_type}']
+            columns[f'{venue}_goals_{goal_type}_against'] = frame[f'{other}_goals_{goal_type}']
+        values = pd.DataFrame(columns, index=frame.index)
+        values['league'] = frame['league']
+        values['team'] = frame[f'{venue}_team']
+        return values.groupby(['league', 'team'], sort=False).sum()
+
+    def _team_rows(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Team-perspective rows for the windows"""
+        def side(venue: str, other: str) -> pd.DataFrame:
+            return pd.DataFrame({
+                'league': frame['league'].to_numpy(), 'team': frame[f'{venue}_team'].to_numpy(),
+                'date': frame['date'].to_numpy(), 'seq': frame['seq'].to_numpy(), 'venue': venue,
+                'scored': frame[f'{venue}_goals'].to_numpy(), 'conceded': frame[f'{other}_goals'].to_numpy(),
+            })
+        return pd.concat([side('home', 'away'), side('away', 'home')], ignore_index=True)
+
+    def _merge_window(self, view: str, rows: pd.DataFrame) -> None:
+        if view != 'all':
+            rows = rows[rows['venue'] == view]
+        carry = self._carry[view]
+        merged = rows if carry is None else pd.concat([carry, rows], ignore_index=True)
+        merged = merged.sort_values(['date', 'seq'], kind='mergesort')
+        self._carry[view] = merged.groupby(['league', 'team'], sort=False).tail(FORM_WINDOW).reset_index(drop=True)
+
+    def add_chunk(self, chunk: pd.DataFrame) -> None:
+        frame = self._prepare(chunk)
+        if frame.empty:
+            return
+        self.matches += len(frame)
+
+        # Venue columns are disjoint; a team seen at one venue only has zeros for the other
+        totals = pd.concat([self._venue_totals(frame, 'home'), self._venue_totals(frame, 'away')], axis=1).fillna(0)
+        self._totals = totals if self._totals is None else self._totals.add(totals, fill_value=0)
+
+        rows = self._team_rows(frame)
+        for view in WINDOW_VIEWS:
+            self._merge_window(view, rows)
+
+    # ------------------------------------------------------------------ tables
+
+    def _window_columns(self, view: str) -> pd.DataFrame:
+        carry = self._carry[view]
+        if carry is None or carry.empty:
+            return pd.DataFrame(columns=['scored', 'conceded', 'form'],
+                                index=pd.MultiIndex.from_tuples([], names=['league', 'team']))
+        carry = carry.sort_values(['date', 'seq'], kind='mergesort')
+        carry = carry.assign(result=np.where(carry['scored'] > carry['conceded'], 'W',
+                                             np.where(carry['scored'] == carry['conceded'], 'D', 'L')))
+        grouped = carry.groupby(['league', 'team'], sort=False)
+        return pd.DataFrame({
+            'scored': grouped['scored'].sum(),
+            'conceded': grouped['conceded'].sum(),
+            'form': grouped['result'].agg(''.join),
+        })
+
+    def build(self) -> Dict[str, pd.DataFrame]:
+        """One table per league in LEAGUE_TABLE_COLUMNS order, sorted by season_position"""
+        if self._totals is None:
+            return {}
+        totals = self._totals.copy()
+        for col in totals.columns:
+            if 'xg' not in col:
+                totals[col] = totals[col].round().astype(np.int64)
+            else:
+                totals[col] = totals[col].round(2)
+
+        windows = {view: self._window_columns(view).reindex(totals.index) for view in WINDOW_VIEWS}
+        totals['goals_scored_last_5'] = windows['all']['scored'].fillna(0).astype(np.int64)
+        totals['goals_conceded_last_5'] = windows['all']['conceded'].fillna(0).astype(np.int64)
+        totals['home_goals_conceded_last_5'] = windows['home']['conceded'].fillna(0).astype(np.int64)
+        totals['away_goals_conceded_last_5'] = windows['away']['conceded'].fillna(0).astype(np.int64)
+        totals['form_last_5_overall'] = windows['all']['form'].fillna('')
+        totals['form_last_5_home'] = windows['home']['form'].fillna('')
+        totals['form_last_5_away'] = windows['away']['form'].fillna('')
+        # Not derivable from results
+        totals['defenders_out'] = np.nan
+
+        # Standings: points, then goal difference, then goals scored
+        points = 3 * (totals['_home_wins'] + totals['_away_wins']) + totals['_home_draws'] + totals['_away_draws']
+        scored = totals['home_goals_scored'] + totals['away_goals_scored']
+        conceded = totals['home_goals_conceded'] + totals['away_goals_conceded']
+        totals = totals.assign(_points=points, _gd=scored - conceded, _scored=scored).reset_index()
+
+        tables = {}
+        for league_name, table in totals.groupby('league', sort=True):
+            table = table.sort_values(['_points', '_gd', '_scored', 'team'],
+                                      ascending=[False, False, False, True], kind='mergesort')
+            table['season_position'] = np.arange(1, len(table) + 1)
+            tables[league_name] = table[LEAGUE_TABLE_COLUMNS].reset_index(drop=True)
+        return tables
+
+# ============================================================================
+# ENTRY POINTS
+# ============================================================================
+
+def build_league_tables(source: Union[str, pd.DataFrame, Iterable[pd.DataFrame]], chunksize: int = 100_000,
+                        **builder_args) -> Dict[str, pd.DataFrame]:
+    """
+    source: raw results CSV path, a DataFrame, or an iterable of chunks.
+    builder_args: LeagueTableBuilder options (league_name, since, until)
+    """
+    builder = LeagueTableBuilder(**builder_args)
+    if isinstance(source, str):
+        chunks = pd.read_csv(source, chunksize=chunksize)
+    elif isinstance(source, pd.DataFrame):
+        chunks = (source.iloc[i:i + chunksize] for i in range(0, len(source), chunksize))
+    else:
+        chunks = source
+    for chunk in chunks:
+        builder.add_chunk(chunk)
+    return builder.build()
+
+def write_league_tables(tables: Dict[str, pd.DataFrame],
+                        leagues_dir: str = BrutballDataLoader.LEAGUES_DIR) -> List[str]:
+    """Write <league>.csv files atomically (watchers never see a half-written table)"""
+    os.makedirs(leagues_dir, exist_ok=True)
+    paths = []
+    for league_name, table in tables.items():
+        path = os.path.join(leagues_dir, f"{league_name}.csv")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        table.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
@@ -0,0 +1,135 @@
+"""
+LEAGUE CATALOG
+Metadata for every league file in leagues/: team and row counts, mtime,
+schema hash and validation status. Each refresh lists the directory and
+stats every CSV; a file is re-validated only when its (mtime, size)
+changed, so an unchanged directory costs one listing and one stat per
+file. Files added, replaced or edited in place are all picked up on the
+next refresh, whatever happened to the directory's own mtime.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from brutball_core import BrutballDataLoader
+
+STATUS_OK = "ok"
+STATUS_INVALID = "invalid"
+
+class LeagueInfo:
+    """Catalog entry for one league CSV at one (mtime, size)"""
+
+    __slots__ = ('league_name', 'csv_path', 'mtime_ns', 'size', 'rows', 'teams',
+                 'schema_hash', 'status', 'error', 'warning')
+
+    def __init__(self, league_name: str, csv_path: str, mtime_ns: int, size: int):
+        self.league_name = league_name
+        self.csv_path = csv_path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.rows = 0
+        self.teams = 0
+        self.schema_hash: Optional[int] = None
+        self.status = STATUS_INVALID
+        self.error: Optional[str] = None
+        # Set on loadable files with a problem the engine tolerates
+        self.warning: Optional[str] = None
+
+    @property
+    def data_version(self) -> Tuple[int, int]:
+        """Same (mtime_ns, size) key as BrutballDataLoader.get_data_version"""
+        return self.mtime_ns, self.size
+
+    @property
+    def is_valid(self) -> bool:
+        return self.status == STATUS_OK
+
+    @classmethod
+    def from_file(cls, league_name: str, csv_path: str, stat: os.stat_result) -> 'LeagueInfo':
+        """Load and validate the file (through the parsed-frame cache when it is warm)"""
+        info = cls(league_name, csv_path, stat.st_mtime_ns, stat.st_size)
+        try:
+            df = BrutballDataLoader.load_csv(csv_path)
+        except Exception as e:
+            info.error = f"{type(e).__name__}: {e}"
+            return info
+        info.rows = len(df)
+        info.teams = int(df['team'].nunique())
+        info.schema_hash = BrutballDataLoader.schema_hash(df)
+        if info.rows == 0:
+            info.error = "No teams in file"
+            return info
+        if info.teams != info.rows:
+            # The engine uses each team's first row, so the league still loads
+            info.warning = f"Duplicate team rows ({info.rows} rows, {info.teams} teams); first row per team is used"
+        info.status = STATUS_OK
+        return info
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"LeagueInfo({self.league_name!r}, {self.status}, teams={self.teams})"
+
+class LeagueCatalog:
+    """Thread-safe league metadata, refreshed per file on (mtime, size) change"""
+
+    def __init__(self, leagues_dir: str = BrutballDataLoader.LEAGUES_DIR):
+        self.leagues_dir = leagues_dir
+        self.created_dir = False
+        self._entries: Dict[str, LeagueInfo] = {}
+        self._lock = threading.Lock()
+
+    def _stat_files(self) -> Dict[str, Tuple[str, os.stat_result]]:
+        """(path, stat) per league CSV, creating the directory when missing"""
+        try:
+            names = os.listdir(self.leagues_dir)
+        except FileNotFoundError:
+            os.makedirs(self.leagues_dir, exist_ok=True)
+            self.created_dir = True
+            names = []
+        files = {}
+        for name in sorted(names):
+            if not name.endswith('.csv'):
+                continue
+            csv_path = os.path.join(self.leagues_dir, name)
+            try:
+                files[name[:-len('.csv')]] = csv_path, os.stat(csv_path)
+            except OSError:
+                continue
+        return files
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-validate added and changed files (every file if forced); True if any entry changed"""
+        with self._lock:
+            files = self._stat_files()
+            entries = {}
+            changed = files.keys() != self._entries.keys()
+            for league_name, (csv_path, stat) in files.items():
+                known = self._entries.get(league_name)
+                if not force and known is not None and known.data_version == (stat.st_mtime_ns, stat.st_size):
+                    entries[league_name] = known
+                else:
+                    entries[league_name] = LeagueInfo.from_file(league_name, csv_path, stat)
+                    changed = True
+            if changed:
+                # Replaced, never mutated: readers holding the old mapping stay consistent
+                self._entries = entries
+            return changed
+
+    def get_entries(self) -> Dict[str, LeagueInfo]:
+        self.refresh()
+        return self._entries
+
+    def get_leagues(self, valid_only: bool = True) -> List[str]:
+        return [name for name, info in self.get_entries().items() if info.is_valid or not valid_only]
+
+    def get_invalid(self) -> Dict[str, str]:
+        return {name: info.error for name, info in self.get_entries().items() if not info.is_valid}
+
+    def get_warnings(self) -> Dict[str, str]:
+        return {name: info.warning for name, info in self.get_entries().items() if info.warning}
+
+    def get_info(self, league_name: str) -> Optional[LeagueInfo]:
+        return self.get_entries().get(league_name)
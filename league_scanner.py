@@ -0,0 +1,151 @@
+"""
+CROSS-LEAGUE SCANNER
+Scans every ordered pairing across league files on a process pool and
+aggregates the certainty recommendations into one deterministically ranked
+table. Leagues are sharded into blocks of home teams so large leagues spread
+across workers; a league whose CSV fails to load is reported, not fatal.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from brutball_core import BrutballCertaintyEngine, BrutballDataLoader, LazyModule
+
+# Imported on first use so worker processes start light
+pd = LazyModule('pandas')
+
+# Deterministic ranking: strongest certainty first, then stable identifiers
+RANKING_COLUMNS = ['priority', 'stake_multiplier', 'league', 'home_team', 'away_team', 'certainty_bet']
+RANKING_ASCENDING = [True, False, True, True, True, True]
+
+# Engines loaded by this process during one scan, keyed by CSV path, so the
+# shards of a league share one load; emptied when a scan starts and ends
+_WORKER_ENGINES: Dict[str, BrutballCertaintyEngine] = {}
+
+
+def list_leagues(leagues_dir: str = BrutballDataLoader.LEAGUES_DIR) -> List[str]:
+    return sorted(name[:-len('.csv')] for name in os.listdir(leagues_dir) if name.endswith('.csv'))
+
+
+def _load_engine(league_name: str, csv_path: str) -> BrutballCertaintyEngine:
+    stat = os.stat(csv_path)
+    data_version = (stat.st_mtime_ns, stat.st_size)
+    engine = _WORKER_ENGINES.get(csv_path)
+    if engine is None or engine.data_version != data_version:
+        df = BrutballDataLoader.load_csv(csv_path)
+        engine = BrutballCertaintyEngine(league_name, df=df, data_version=data_version)
+        _WORKER_ENGINES[csv_path] = engine
+    return engine
+
+
+def _reset_engines() -> None:
+    """Pool initializer: each worker starts a scan with no engines loaded"""
+    _WORKER_ENGINES.clear()
+
+
+def _scan_shard(league_name: str, csv_path: str, start: int, stop: Optional[int],
+                bankroll: float, base_stake_pct: float) -> Tuple[str, int, Optional[pd.DataFrame], Optional[str]]:
+    """Analyze every fixture whose home team falls in teams[start:stop] (stop None = to the end)"""
+    try:
+        engine = _load_engine(league_name, csv_path)
+        teams = engine.get_available_teams()
+        fixtures = [(home, away) for home in teams[start:stop] for away in teams if away != home]
+        recommendations = engine.analyze_fixtures(fixtures, bankroll, base_stake_pct)
+        # Shard-local fixture ids mean nothing once shards are merged
+        return league_name, len(fixtures), recommendations.drop(columns='fixture_id'), None
+    except Exception as e:
+        return league_name, 0, None, f"{type(e).__name__}: {e}"
+
+
+def count_rows(csv_path: str) -> int:
+    """Upper bound on the data rows of a CSV from its line count, without parsing it"""
+    lines = 0
+    last = b'\n'
+    with open(csv_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            lines += chunk.count(b'\n')
+            last = chunk[-1:]
+    if last != b'\n':
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def plan_shards(leagues: List[str], leagues_dir: str,
+                block_size: Optional[int] = None) -> Tuple[List[Tuple[str, str, int, Optional[int]]], Dict[str, str]]:
+    """
+    Split each league into blocks of home teams without parsing it: blocks are
+    sized from the line count and the last one is open-ended, so blank or
+    multi-line rows can't drop a team. Load errors are reported by the workers.
+    """
+    shards = []
+    errors = {}
+    for league_name in leagues:
+        csv_path = os.path.join(leagues_dir, f"{league_name}.csv")
+        try:
+            n_rows = count_rows(csv_path) if block_size else 0
+        except OSError as e:
+            errors[league_name] = f"{type(e).__name__}: {e}"
+            continue
+        starts = list(range(0, n_rows, block_size)) if block_size else []
+        for start in starts[:-1]:
+            shards.append((league_name, csv_path, start, start + block_size))
+        shards.append((league_name, csv_path, starts[-1] if starts else 0, None))
+    return shards, errors
+
+
+def rank_recommendations(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        columns = [col for col in BrutballCertaintyEngine.FIXTURE_COLUMNS if col != 'fixture_id']
+        return pd.DataFrame(columns=['rank'] + columns)
+
+    ranked = pd.concat(frames, ignore_index=True).sort_values(
+        RANKING_COLUMNS, ascending=RANKING_ASCENDING, kind='mergesort'
+    ).reset_index(drop=True)
+    ranked.insert(0, 'rank', range(1, len(ranked) + 1))
+    return ranked
+
+
+def scan_leagues(leagues: Optional[List[str]] = None, workers: Optional[int] = None,
+                 block_size: Optional[int] = None, bankroll: float = 1000, base_stake_pct: float = 0.5,
+                 leagues_dir: str = BrutballDataLoader.LEAGUES_DIR) -> Dict:
+    """
+    Scan all pairings of the given leagues (default: every CSV in leagues_dir).
+    workers: process count (None = all cores, 1 = run in this process)
+    block_size: home teams per shard (None = one shard per league)
+    """
+    if leagues is None:
+        leagues = list_leagues(leagues_dir)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    shards, errors = plan_shards(leagues, leagues_dir, block_size)
+    jobs = [(*shard, bankroll, base_stake_pct) for shard in shards]
+
+    if workers <= 1 or len(jobs) <= 1:
+        _reset_engines()
+        try:
+            results = [_scan_shard(*job) for job in jobs]
+        finally:
+            # Don't keep every league's engine alive in the caller between scans
+            _reset_engines()
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_reset_engines) as pool:
+            results = list(pool.map(_scan_shard, *zip(*jobs)))
+
+    for league_name, _, _, error in results:
+        if error is not None:
+            errors.setdefault(league_name, error)
+
+    # A league with any failed shard is dropped rather than reported half-scanned
+    kept = [(fixtures, frame) for league_name, fixtures, frame, _ in results if league_name not in errors]
+
+    return {
+        'recommendations': rank_recommendations([frame for _, frame in kept]),
+        'errors': errors,
+        'leagues': [league for league in leagues if league not in errors],
+        'fixtures': sum(fixtures for fixtures, _ in kept)
+    }
@@ -0,0 +1,210 @@
+"""
+LEAGUE WATCHER - HOT RELOAD OF leagues/*.csv
+Detects changed league files by mtime/size and content hash, re-parses only
+those files, diffs the old and new frames per team and publishes an
+atomically swapped snapshot per league.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from brutball_core import BrutballCertaintyEngine, BrutballDataLoader
+from snapshot_store import LeagueSnapshotStore
+
+# ============================================================================
+# LEAGUE SNAPSHOT
+# ============================================================================
+
+class LeagueSnapshot:
+    """Immutable view of one league file at one data version"""
+
+    __slots__ = ('league_name', 'csv_path', 'data_version', 'content_hash', 'df', 'engine')
+
+    def __init__(self, league_name: str, csv_path: str, data_version: Tuple[int, int],
+                 content_hash: str, df: pd.DataFrame):
+        self.league_name = league_name
+        self.csv_path = csv_path
+        self.data_version = data_version
+        self.content_hash = content_hash
+        self.df = df
+        # Warm engine built once per snapshot, never mutated afterwards
+        self.engine = BrutballCertaintyEngine(league_name, df=df, data_version=data_version)
+
+    def get_teams(self) -> List[str]:
+        return self.df['team'].tolist()
+
+# ============================================================================
+# ROW-LEVEL DIFF
+# ============================================================================
+
+def diff_league_frames(old_df: Optional[pd.DataFrame], new_df: pd.DataFrame) -> Dict[str, List[str]]:
+    """Compare two versions of a league table team by team"""
+    new_teams = new_df.drop_duplicates('team').set_index('team')
+    if old_df is None:
+        return {'added_teams': sorted(new_teams.index), 'removed_teams': [], 'changed_teams': []}
+
+    old_teams = old_df.drop_duplicates('team').set_index('team')
+    added = new_teams.index.difference(old_teams.index)
+    removed = old_teams.index.difference(new_teams.index)
+    common = new_teams.index.intersection(old_teams.index)
+
+    # Columns added or dropped count as a change for every surviving team
+    if list(old_teams.columns) != list(new_teams.columns):
+        changed = common
+    else:
+        old_rows = old_teams.loc[common]
+        new_rows = new_teams.loc[common]
+        differs = (old_rows != new_rows) & ~(old_rows.isna() & new_rows.isna())
+        changed = common[differs.any(axis=1).to_numpy()]
+
+    return {
+        'added_teams': sorted(added),
+        'removed_teams': sorted(removed),
+        'changed_teams': sorted(changed)
+    }
+
+# ============================================================================
+# WATCHER
+# ============================================================================
+
+class LeagueWatcher:
+    """Polls a leagues directory and republishes only the files that changed"""
+
+    def __init__(self, leagues_dir: str = BrutballDataLoader.LEAGUES_DIR,
+                 snapshot_store: Optional[LeagueSnapshotStore] = None):
+        self.leagues_dir = leagues_dir
+        # Optional point-in-time history: every published version is appended
+        self.snapshot_store = snapshot_store
+        self._snapshots: Dict[str, LeagueSnapshot] = {}
+        self._file_state: Dict[str, Tuple[int, int, str]] = {}
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._poll_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------ reads
+
+    def get_snapshot(self, league_name: str) -> Optional[LeagueSnapshot]:
+        return self._snapshots.get(league_name)
+
+    def get_snapshots(self) -> Dict[str, LeagueSnapshot]:
+        # The mapping is replaced, never mutated, so this reference is consistent
+        return self._snapshots
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> None:
+        """Register a callback receiving each change report"""
+        self._listeners.append(callback)
+
+    # ------------------------------------------------------------------ polling
+
+    @staticmethod
+    def _hash_file(csv_path: str) -> str:
+        digest = hashlib.sha1()
+        with open(csv_path, 'rb') as fh:
+            for block in iter(lambda: fh.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _list_leagues(self) -> Dict[str, str]:
+        if not os.path.isdir(self.leagues_dir):
+            return {}
+        return {
+            name[:-len('.csv')]: os.path.join(self.leagues_dir, name)
+            for name in sorted(os.listdir(self.leagues_dir)) if name.endswith('.csv')
+        }
+
+    def poll(self) -> List[Dict]:
+        """Check every league file once and return a report per changed league"""
+        with self._poll_lock:
+            reports = []
+            snapshots = dict(self._snapshots)
+            current = self._list_leagues()
+
+            for league_name, csv_path in current.items():
+                data_version = content_hash = None
+                try:
+                    stat = os.stat(csv_path)
+                    data_version = (stat.st_mtime_ns, stat.st_size)
+                    known = self._file_state.get(league_name)
+                    if known and known[:2] == data_version:
+                        continue
+
+                    content_hash = self._hash_file(csv_path)
+                    if known and known[2] == content_hash:
+                        # Touched but not edited
+                        self._file_state[league_name] = (*data_version, content_hash)
+                        continue
+
+                    df = BrutballDataLoader.load_csv(csv_path)
+                    previous = snapshots.get(league_name)
+                    snapshot = LeagueSnapshot(league_name, csv_path, data_version, content_hash, df)
+                except (OSError, ValueError, KeyError, pd.errors.ParserError) as e:
+                    # Keep serving the last good snapshot; retry once the file changes again
+                    if content_hash is not None:
+                        self._file_state[league_name] = (*data_version, content_hash)
+                    reports.append({'league': league_name, 'status': 'error', 'error': str(e)})
+                    continue
+
+                snapshots[league_name] = snapshot
+                self._file_state[league_name] = (*data_version, content_hash)
+                report = {
+                    'league': league_name,
+                    'status': 'modified' if previous else 'added',
+                    'data_version': data_version,
+                    **diff_league_frames(previous.df if previous else None, df)
+                }
+                if self.snapshot_store is not None:
+                    try:
+                        self.snapshot_store.append(league_name, df, pd.Timestamp(data_version[0]))
+                    except (OSError, ValueError) as e:
+                        # The live snapshot is still published; only the history entry is missing
+                        report['history_error'] = str(e)
+                reports.append(report)
+
+            for league_name in sorted(set(snapshots) - set(current)):
+                previous = snapshots.pop(league_name)
+                reports.append({
+                    'league': league_name,
+                    'status': 'removed',
+                    'data_version': None,
+                    'added_teams': [],
+                    'removed_teams': previous.get_teams(),
+                    'changed_teams': []
+                })
+
+            for league_name in set(self._file_state) - set(current):
+                del self._file_state[league_name]
+
+            # Atomic publish: readers see either the old or the new mapping
+            self._snapshots = snapshots
+
+        for report in reports:
+            for callback in self._listeners:
+                callback(report)
+        return reports
+
+    # ------------------------------------------------------------------ background
+
+    def start(self, interval_seconds: float = 5.0) -> None:
+        """Poll in a daemon thread until stop() is called"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.is_set():
+                self.poll()
+                self._stop_event.wait(interval_seconds)
+
+        self._thread = threading.Thread(target=run, name="league-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,201 @@
+"""
+MATCH HISTORY WITH PREFIX SUMS
+Per-team match-by-match arrays with cumulative sums, so any rolling window
+(last 3, 8, 10 ...; all, home-only or away-only matches; as of any date) is
+answered in O(1) per team and vectorized across a league or a fixture list.
+
+Rows are team-perspective matches sorted by (team, date) in one flat array
+per venue view. A window sum is prefix[end] - prefix[max(start, end - n)],
+where [start, end) is the team's segment cut at the as-of date.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from brutball_core import BrutballDataLoader
+
+RESULT_COLUMNS = ['date', 'home_team', 'away_team', 'home_goals', 'away_goals']
+OPTIONAL_RESULT_COLUMNS = ['home_xg', 'away_xg']
+
+METRICS = ('scored', 'conceded', 'xg_for', 'xg_against', 'wins', 'draws', 'losses')
+VENUES = ('all', 'home', 'away')
+
+# CSV columns derived from the windows: (column, venue, metric)
+LAST_N_COLUMNS = (
+    ('goals_scored_last_5', 'all', 'scored'),
+    ('goals_conceded_last_5', 'all', 'conceded'),
+    ('home_goals_conceded_last_5', 'home', 'conceded'),
+    ('away_goals_conceded_last_5', 'away', 'conceded'),
+)
+
+def team_match_rows(results: pd.DataFrame) -> pd.DataFrame:
+    """Two team-perspective rows per result: team, date, venue + METRICS"""
+    missing = [col for col in RESULT_COLUMNS if col not in results.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    date = pd.to_datetime(results['date']).astype('datetime64[ns]').to_numpy()
+    home_goals = pd.to_numeric(results['home_goals'], errors='coerce').to_numpy(dtype=np.float64)
+    away_goals = pd.to_numeric(results['away_goals'], errors='coerce').to_numpy(dtype=np.float64)
+    zeros = np.zeros(len(results))
+    home_xg = pd.to_numeric(results['home_xg'], errors='coerce').fillna(0).to_numpy() if 'home_xg' in results else zeros
+    away_xg = pd.to_numeric(results['away_xg'], errors='coerce').fillna(0).to_numpy() if 'away_xg' in results else zeros
+
+    def side(team, venue, scored, conceded, xg_for, xg_against):
+        return pd.DataFrame({
+            'team': results[team].to_numpy(), 'date': date, 'venue': venue,
+            'scored': scored, 'conceded': conceded, 'xg_for': xg_for, 'xg_against': xg_against,
+            'wins': (scored > conceded).astype(np.float64),
+            'draws': (scored == conceded).astype(np.float64),
+            'losses': (scored < conceded).astype(np.float64),
+        })
+
+    rows = pd.concat([
+        side('home_team', 'home', home_goals, away_goals, home_xg, away_xg),
+        side('away_team', 'away', away_goals, home_goals, away_xg, home_xg),
+    ], ignore_index=True)
+    # Unplayed fixtures carry no goals
+    return rows[~(np.isnan(rows['scored']) | np.isnan(rows['conceded']))]
+
+class _VenueView:
+    """Flat (team, date)-sorted rows of one venue with per-metric prefix sums"""
+
+    __slots__ = ('team_codes', 'date_ranks', 'keys', 'offsets', 'prefix', 'results')
+
+    def __init__(self, rows: pd.DataFrame, n_teams: int, n_dates: int):
+        order = np.lexsort((rows['date_rank'].to_numpy(), rows['team_code'].to_numpy()))
+        self.team_codes = rows['team_code'].to_numpy()[order]
+        self.date_ranks = rows['date_rank'].to_numpy()[order]
+        # Composite (team, date) key: as-of cuts are one searchsorted
+        self.keys = self.team_codes * (n_dates + 1) + self.date_ranks
+        self.offsets = np.searchsorted(self.team_codes, np.arange(n_teams + 1))
+        self.prefix = {
+            metric: np.concatenate(([0.0], np.cumsum(rows[metric].to_numpy()[order])))
+            for metric in METRICS
+        }
+        wins = rows['wins'].to_numpy()[order]
+        draws = rows['draws'].to_numpy()[order]
+        self.results = np.where(wins > 0, 'W', np.where(draws > 0, 'D', 'L'))
+
+class MatchHistory:
+    """Rolling-window team features over raw match results"""
+
+    def __init__(self, results: pd.DataFrame):
+        rows = team_match_rows(results)
+        self.teams = sorted(rows['team'].unique().tolist())
+        self.team_codes = {team: code for code, team in enumerate(self.teams)}
+        self.dates = np.unique(rows['date'].to_numpy())
+
+        rows = rows.assign(
+            team_code=rows['team'].map(self.team_codes).to_numpy(dtype=np.int64),
+            date_rank=np.searchsorted(self.dates, rows['date'].to_numpy()).astype(np.int64)
+        )
+        n_teams, n_dates = len(self.teams), len(self.dates)
+        self.views = {
+            'all': _VenueView(rows, n_teams, n_dates),
+            'home': _VenueView(rows[rows['venue'] == 'home'], n_teams, n_dates),
+            'away': _VenueView(rows[rows['venue'] == 'away'], n_teams, n_dates),
+        }
+
+    # ------------------------------------------------------------------ lookups
+
+    def encode_teams(self, teams: Optional[Sequence[str]] = None) -> np.ndarray:
+        if teams is None:
+            return np.arange(len(self.teams))
+        unknown = sorted({team for team in teams if team not in self.team_codes})
+        if unknown:
+            raise ValueError(f"Team not found: {unknown}")
+        return np.array([self.team_codes[team] for team in teams], dtype=np.int64)
+
+    def _bounds(self, view: _VenueView, codes: np.ndarray, before) -> np.ndarray:
+        """Segment ends: matches strictly before `before` (scalar or per-team dates)"""
+        if before is None:
+            return view.offsets[codes + 1]
+        before = np.asarray(pd.to_datetime(before), dtype='datetime64[ns]')
+        ranks = np.searchsorted(self.dates, before, side='left')
+        return np.searchsorted(view.keys, codes * (len(self.dates) + 1) + ranks, side='left')
+
+    def window(self, window: int, teams: Optional[Sequence[str]] = None, venue: str = 'all',
+               before=None, metrics: Sequence[str] = METRICS) -> Dict[str, np.ndarray]:
+        """
+        Sums of each metric over the last `window` matches per team (fewer if
+        fewer were played), plus 'matches' = the count actually covered.
+        before: date or per-team array of dates; only earlier matches count.
+        """
+        if venue not in VENUES:
+            raise ValueError(f"Unknown venue: {venue}")
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        view = self.views[venue]
+        codes = self.encode_teams(teams)
+        end = self._bounds(view, codes, before)
+        start = np.maximum(view.offsets[codes], end - window)
+
+        sums = {metric: view.prefix[metric][end] - view.prefix[metric][start] for metric in metrics}
+        sums['matches'] = end - start
+        return sums
+
+    def form_strings(self, window: int, teams: Optional[Sequence[str]] = None, venue: str = 'all',
+                     before=None) -> List[str]:
+        """W/D/L of the last `window` matches, oldest -> newest"""
+        view = self.views[venue]
+        codes = self.encode_teams(teams)
+        end = self._bounds(view, codes, before)
+        start = np.maximum(view.offsets[codes], end - window)
+        return [''.join(view.results[a:b]) for a, b in zip(start.tolist(), end.tolist())]
+
+    # ------------------------------------------------------------------ league frames
+
+    def last_n_frame(self, window: int, teams: Optional[Sequence[str]] = None, before=None) -> pd.DataFrame:
+        """Per-team last-N goal totals, averages and form strings"""
+        teams = list(self.teams) if teams is None else list(teams)
+        overall = self.window(window, teams, 'all', before, ('scored', 'conceded'))
+        frame = pd.DataFrame({'team': teams, f'matches_last_{window}': overall['matches']})
+        frame[f'goals_scored_last_{window}'] = overall['scored']
+        frame[f'goals_conceded_last_{window}'] = overall['conceded']
+        for venue in ('home', 'away'):
+            sums = self.window(window, teams, venue, before, ('conceded',))
+            frame[f'{venue}_goals_conceded_last_{window}'] = sums['conceded']
+            frame[f'{venue}_matches_last_{window}'] = sums['matches']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frame[f'avg_scored_last_{window}'] = overall['scored'] / overall['matches']
+            frame[f'avg_conceded_last_{window}'] = overall['conceded'] / overall['matches']
+        for venue in VENUES:
+            frame[f'form_last_{window}_{"overall" if venue == "all" else venue}'] = \
+                self.form_strings(window, teams, venue, before)
+        return frame
+
+    def with_window(self, df: pd.DataFrame, window: int, before=None) -> pd.DataFrame:
+        """
+        League table whose *_last_5 columns are replaced by last-`window`
+        values rescaled to a 5-match basis (sum * 5 / matches in the window),
+        so the existing rules (Elite Defense totals, attack-weakness averages)
+        evaluate the window variant unchanged. The columns keep their _last_5
+        names but no longer hold raw last-5 sums; use last_n_frame for raw
+        per-window sums under last_{window} names. Teams without history
+        keep their table values.
+        """
+        df = df.copy()
+        teams = df['team'].tolist()
+        known = np.array([team in self.team_codes for team in teams])
+        if not known.any():
+            return df
+        known_teams = [team for team, ok in zip(teams, known) if ok]
+
+        for column, venue, metric in LAST_N_COLUMNS:
+            sums = self.window(window, known_teams, venue, before, (metric,))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rescaled = np.where(sums['matches'] > 0, sums[metric] * 5 / sums['matches'], np.nan)
+            values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+            values[known] = np.where(np.isnan(rescaled), values[known], rescaled)
+            df[column] = values
+        return df
+
+    def feature_table(self, df: pd.DataFrame, window: int, before=None) -> pd.DataFrame:
+        """
+        BrutballDataLoader.build_feature_table over with_window(df, window):
+        the *_last_5 inputs hold last-`window` sums rescaled to 5 matches
+        """
+        return BrutballDataLoader.build_feature_table(self.with_window(df, window, before))
@@ -6,8 +6,166 @@ No hardcoded teams or matches
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple, List, Optional, Any
+from typing import Dict, Tuple, List, Optional, Any, Iterator
+from collections.abc import Mapping
 from datetime import datetime
+from types import MappingProxyType
+
+from brutball_rules import DEFAULT_RULES, ELITE_DEFENSE_RULES, RULE_PARAMETERS
+
+# =================== PATTERN TEMPLATES ===================
+class PatternTemplate:
+    """
+    Constant part of a pattern hit, shared by every match it fires on.
+    
+    fields: per-match values stored on each PatternRecommendation
+    constants: values identical for every hit (evidence, accuracy, stake)
+    conditions: display strings, formatted from the record only when read
+    """
+    
+    __slots__ = ('pattern', 'keys', 'fields', 'field_index', 'constants', 'conditions')
+    
+    def __init__(self, keys: Tuple[str, ...], fields: Tuple[str, ...], constants: Dict[str, Any],
+                 conditions: Optional[Dict[str, str]] = None):
+        conditions = conditions or {}
+        if set(keys) != set(fields) | set(constants) | set(conditions):
+            raise ValueError(f"Template keys do not match its fields: {keys}")
+        self.pattern = constants['pattern']
+        self.keys = keys
+        self.fields = fields
+        self.field_index = MappingProxyType({field: i for i, field in enumerate(fields)})
+        self.constants = MappingProxyType(constants)
+        self.conditions = MappingProxyType(conditions)
+    
+    def __repr__(self) -> str:
+        return f"PatternTemplate({self.pattern!r})"
+
+class PatternRecommendation(Mapping):
+    """Per-match pattern hit over a shared template; to_dict() is the public (legacy dict) form"""
+    
+    __slots__ = ('template', 'values')
+    
+    def __init__(self, template: PatternTemplate, values: Tuple = ()):
+        self.template = template
+        self.values = values
+    
+    def __getitem__(self, key: str) -> Any:
+        template = self.template
+        index = template.field_index.get(key)
+        if index is not None:
+            return self.values[index]
+        if key in template.conditions:
+            return template.conditions[key].format_map(self)
+        return template.constants[key]
+    
+    def __contains__(self, key: object) -> bool:
+        template = self.template
+        return key in template.field_index or key in template.conditions or key in template.constants
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.template.keys)
+    
+    def __len__(self) -> int:
+        return len(self.template.keys)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Fresh plain dict; shared tuples (historical_evidence) are copied to lists"""
+        return {key: list(value) if isinstance(value, tuple) else value
+                for key, value in ((key, self[key]) for key in self.template.keys)}
+    
+    def __repr__(self) -> str:
+        return f"PatternRecommendation({self.template.pattern!r}, {self.values!r})"
+
+ELITE_DEFENSE_KEYS = (
+    'pattern', 'bet_type', 'team_to_bet', 'defensive_team', 'defense_gap', 'home_conceded', 'away_conceded',
+    'condition_1', 'condition_2', 'stake_multiplier', 'confidence', 'sample_accuracy', 'historical_evidence'
+)
+ELITE_DEFENSE_FIELDS = ('team_to_bet', 'defensive_team', 'defense_gap', 'home_conceded', 'away_conceded')
+ELITE_DEFENSE_CONSTANTS = {
+    'pattern': 'ELITE_DEFENSE_UNDER_1_5',
+    'bet_type': 'TEAM_UNDER_1_5',
+    'stake_multiplier': 2.0,
+    'confidence': 'VERY_HIGH',
+    'sample_accuracy': '8/8 matches (100%)',
+    'historical_evidence': (
+        'Porto 2-0 AVS', 'Espanyol 2-1 Athletic', 'Parma 1-0 Fiorentina',
+        'Juventus 2-0 Pisa', 'Milan 3-0 Verona', 'Man City 0-0 Sunderland'
+    )
+}
+ELITE_DEFENSE_GAP_CONDITION = f"Defense gap: +{{defense_gap}} > {RULE_PARAMETERS['elite_defense_gap']}"
+
+# One template per defending side: condition_1 quotes that side's conceded goals
+ELITE_DEFENSE_TEMPLATES = {
+    side: PatternTemplate(ELITE_DEFENSE_KEYS, ELITE_DEFENSE_FIELDS, ELITE_DEFENSE_CONSTANTS, {
+        'condition_1': f"{{defensive_team}} concedes {{{side}_conceded}} ≤ {RULE_PARAMETERS['elite_defense_conceded']} (last 5)",
+        'condition_2': ELITE_DEFENSE_GAP_CONDITION
+    })
+    for side in ('home', 'away')
+}
+
+WINNER_LOCK_TEMPLATE = PatternTemplate(
+    ('pattern', 'bet_type', 'team_to_bet', 'lock_team', 'delta_value', 'condition_1', 'condition_2',
+     'stake_multiplier', 'confidence', 'sample_accuracy', 'historical_evidence'),
+    ('team_to_bet', 'lock_team', 'delta_value'),
+    {
+        'pattern': 'WINNER_LOCK_DOUBLE_CHANCE',
+        'bet_type': 'DOUBLE_CHANCE',
+        'condition_1': "Agency-State Winner Lock detected",
+        'stake_multiplier': 1.5,
+        'confidence': 'HIGH',
+        'sample_accuracy': '6/6 matches (100% no-loss)',
+        'historical_evidence': (
+            'Porto 2-0 AVS', 'Betis 4-0 Getafe', 'Napoli 2-0 Cremonese',
+            'Udinese 1-1 Lazio', 'Man Utd 1-1 Wolves', 'Brentford 0-0 Spurs'
+        )
+    },
+    {'condition_2': "Δ = {delta_value:.2f} (directional dominance)"}
+)
+
+UNDER_35_KEYS = ('pattern', 'bet_type', 'reason', 'condition', 'stake_multiplier', 'confidence',
+                 'sample_accuracy', 'historical_evidence')
+
+# UNDER 3.5 hits carry no per-match values, so each tier is a single shared record
+UNDER_35_BETS = (
+    None,
+    PatternRecommendation(PatternTemplate(UNDER_35_KEYS + ('warning',), (), {
+        'pattern': 'ELITE_DEFENSE_UNDER_3_5',
+        'bet_type': 'TOTAL_UNDER_3_5',
+        'reason': 'Elite Defense pattern present (scoring suppression)',
+        'condition': 'Only Elite Defense detected',
+        'stake_multiplier': 1.0,
+        'confidence': 'TIER_2_87_5',
+        'sample_accuracy': '7/8 matches (87.5%)',
+        'historical_evidence': (
+            'Espanyol 2-1 Athletic', 'Parma 1-0 Fiorentina', 'Milan 3-0 Verona',
+            'Pisa 0-2 Juventus', 'Man City 0-0 Sunderland'
+        ),
+        'warning': 'Exception: Strong attacking opponents may break pattern (Arsenal 4-1 Villa)'
+    })),
+    PatternRecommendation(PatternTemplate(UNDER_35_KEYS + ('warning',), (), {
+        'pattern': 'WINNER_LOCK_UNDER_3_5',
+        'bet_type': 'TOTAL_UNDER_3_5',
+        'reason': 'Winner Lock pattern present (controlled match environment)',
+        'condition': 'Only Winner Lock detected',
+        'stake_multiplier': 0.9,
+        'confidence': 'TIER_3_83_3',
+        'sample_accuracy': '5/6 matches (83.3%)',
+        'historical_evidence': (
+            'Udinese 1-1 Lazio', 'Man Utd 1-1 Wolves', 'Brentford 0-0 Spurs'
+        ),
+        'warning': 'Exception: High-scoring matches possible (Betis 4-0 Getafe)'
+    })),
+    PatternRecommendation(PatternTemplate(UNDER_35_KEYS, (), {
+        'pattern': 'BOTH_PATTERNS_UNDER_3_5',
+        'bet_type': 'TOTAL_UNDER_3_5',
+        'reason': 'Both Elite Defense and Winner Lock patterns present',
+        'condition': 'Elite Defense AND Winner Lock detected',
+        'stake_multiplier': 1.2,
+        'confidence': 'TIER_1_100',
+        'sample_accuracy': '3/3 matches (100%)',
+        'historical_evidence': ('Porto 2-0 AVS', 'Napoli 2-0 Cremonese', 'Udinese 1-1 Lazio')
+    }))
+)
 
 # =================== CORE PATTERN DETECTOR ===================
 class CompletePatternDetector:
@@ -19,8 +177,11 @@ class CompletePatternDetector:
     TIER 3: UNDER 3.5 with confidence tiers based on patterns present
     """
     
+    # Elite Defense thresholds come from the shared rule table
+    ELITE_DEFENSE_RULES = staticmethod(DEFAULT_RULES.compile(ELITE_DEFENSE_RULES))
+    
     @staticmethod
-    def detect_elite_defense(home_data: Dict, away_data: Dict) -> List[Dict]:
+    def detect_elite_defense(home_data: Dict, away_data: Dict) -> List[PatternRecommendation]:
         """
         TIER 1: ELITE DEFENSE PATTERN
         
@@ -35,57 +196,29 @@ class CompletePatternDetector:
         away_name = away_data.get('team_name', 'Away')
         home_conceded = home_data.get('goals_conceded_last_5', 0)
         away_conceded = away_data.get('goals_conceded_last_5', 0)
+        elite = CompletePatternDetector.ELITE_DEFENSE_RULES({
+            'home_goals_conceded_last_5': home_conceded,
+            'away_goals_conceded_last_5': away_conceded,
+            'home_defense_gap': away_conceded - home_conceded,
+            'away_defense_gap': home_conceded - away_conceded
+        })
         
         # Check HOME team as elite defense
-        if home_conceded <= 4:
-            defense_gap = away_conceded - home_conceded
-            if defense_gap > 2.0:
-                recommendations.append({
-                    'pattern': 'ELITE_DEFENSE_UNDER_1_5',
-                    'bet_type': 'TEAM_UNDER_1_5',
-                    'team_to_bet': away_name,
-                    'defensive_team': home_name,
-                    'defense_gap': defense_gap,
-                    'home_conceded': home_conceded,
-                    'away_conceded': away_conceded,
-                    'condition_1': f"{home_name} concedes {home_conceded} ≤ 4 (last 5)",
-                    'condition_2': f"Defense gap: +{defense_gap} > 2.0",
-                    'stake_multiplier': 2.0,
-                    'confidence': 'VERY_HIGH',
-                    'sample_accuracy': '8/8 matches (100%)',
-                    'historical_evidence': [
-                        'Porto 2-0 AVS', 'Espanyol 2-1 Athletic', 'Parma 1-0 Fiorentina',
-                        'Juventus 2-0 Pisa', 'Milan 3-0 Verona', 'Man City 0-0 Sunderland'
-                    ]
-                })
+        if elite['home_elite_defense']:
+            recommendations.append(PatternRecommendation(ELITE_DEFENSE_TEMPLATES['home'], (
+                away_name, home_name, away_conceded - home_conceded, home_conceded, away_conceded
+            )))
         
         # Check AWAY team as elite defense
-        if away_conceded <= 4:
-            defense_gap = home_conceded - away_conceded
-            if defense_gap > 2.0:
-                recommendations.append({
-                    'pattern': 'ELITE_DEFENSE_UNDER_1_5',
-                    'bet_type': 'TEAM_UNDER_1_5',
-                    'team_to_bet': home_name,
-                    'defensive_team': away_name,
-                    'defense_gap': defense_gap,
-                    'home_conceded': home_conceded,
-                    'away_conceded': away_conceded,
-                    'condition_1': f"{away_name} concedes {away_conceded} ≤ 4 (last 5)",
-                    'condition_2': f"Defense gap: +{defense_gap} > 2.0",
-                    'stake_multiplier': 2.0,
-                    'confidence': 'VERY_HIGH',
-                    'sample_accuracy': '8/8 matches (100%)',
-                    'historical_evidence': [
-                        'Porto 2-0 AVS', 'Espanyol 2-1 Athletic', 'Parma 1-0 Fiorentina',
-                        'Juventus 2-0 Pisa', 'Milan 3-0 Verona', 'Man City 0-0 Sunderland'
-                    ]
-                })
+        if elite['away_elite_defense']:
+            recommendations.append(PatternRecommendation(ELITE_DEFENSE_TEMPLATES['away'], (
+                home_name, away_name, home_conceded - away_conceded, home_conceded, away_conceded
+            )))
         
         return recommendations
     
     @staticmethod
-    def detect_winner_lock(match_data: Dict) -> Optional[Dict]:
+    def detect_winner_lock(match_data: Dict) -> Optional[PatternRecommendation]:
         """
         TIER 2: WINNER LOCK PATTERN
         
@@ -114,25 +247,10 @@ class CompletePatternDetector:
         else:
             team_with_lock = away_name
         
-        return {
-            'pattern': 'WINNER_LOCK_DOUBLE_CHANCE',
-            'bet_type': 'DOUBLE_CHANCE',
-            'team_to_bet': team_with_lock,
-            'lock_team': lock_team_side,
-            'delta_value': delta_value,
-            'condition_1': f"Agency-State Winner Lock detected",
-            'condition_2': f"Δ = {delta_value:.2f} (directional dominance)",
-            'stake_multiplier': 1.5,
-            'confidence': 'HIGH',
-            'sample_accuracy': '6/6 matches (100% no-loss)',
-            'historical_evidence': [
-                'Porto 2-0 AVS', 'Betis 4-0 Getafe', 'Napoli 2-0 Cremonese',
-                'Udinese 1-1 Lazio', 'Man Utd 1-1 Wolves', 'Brentford 0-0 Spurs'
-            ]
-        }
+        return PatternRecommendation(WINNER_LOCK_TEMPLATE, (team_with_lock, lock_team_side, delta_value))
     
     @staticmethod
-    def determine_under_35_bet(elite_present: bool, winner_present: bool) -> Optional[Dict]:
+    def determine_under_35_bet(elite_present: bool, winner_present: bool) -> Optional[PatternRecommendation]:
         """
         TIER 3: UNDER 3.5 WITH CONFIDENCE TIERS
         
@@ -142,63 +260,16 @@ class CompletePatternDetector:
         - ONLY Winner Lock: 83.3% confidence (5/6 matches)
         - NO patterns: No bet (57% - insufficient edge)
         """
-        
-        if elite_present and winner_present:
-            # TIER 1: BOTH PATTERNS
-            return {
-                'pattern': 'BOTH_PATTERNS_UNDER_3_5',
-                'bet_type': 'TOTAL_UNDER_3_5',
-                'reason': 'Both Elite Defense and Winner Lock patterns present',
-                'condition': 'Elite Defense AND Winner Lock detected',
-                'stake_multiplier': 1.2,
-                'confidence': 'TIER_1_100',
-                'sample_accuracy': '3/3 matches (100%)',
-                'historical_evidence': ['Porto 2-0 AVS', 'Napoli 2-0 Cremonese', 'Udinese 1-1 Lazio']
-            }
-        
-        elif elite_present and not winner_present:
-            # TIER 2: ONLY ELITE DEFENSE
-            return {
-                'pattern': 'ELITE_DEFENSE_UNDER_3_5',
-                'bet_type': 'TOTAL_UNDER_3_5',
-                'reason': 'Elite Defense pattern present (scoring suppression)',
-                'condition': 'Only Elite Defense detected',
-                'stake_multiplier': 1.0,
-                'confidence': 'TIER_2_87_5',
-                'sample_accuracy': '7/8 matches (87.5%)',
-                'historical_evidence': [
-                    'Espanyol 2-1 Athletic', 'Parma 1-0 Fiorentina', 'Milan 3-0 Verona',
-                    'Pisa 0-2 Juventus', 'Man City 0-0 Sunderland'
-                ],
-                'warning': 'Exception: Strong attacking opponents may break pattern (Arsenal 4-1 Villa)'
-            }
-        
-        elif not elite_present and winner_present:
-            # TIER 3: ONLY WINNER LOCK
-            return {
-                'pattern': 'WINNER_LOCK_UNDER_3_5',
-                'bet_type': 'TOTAL_UNDER_3_5',
-                'reason': 'Winner Lock pattern present (controlled match environment)',
-                'condition': 'Only Winner Lock detected',
-                'stake_multiplier': 0.9,
-                'confidence': 'TIER_3_83_3',
-                'sample_accuracy': '5/6 matches (83.3%)',
-                'historical_evidence': [
-                    'Udinese 1-1 Lazio', 'Man Utd 1-1 Wolves', 'Brentford 0-0 Spurs'
-                ],
-                'warning': 'Exception: High-scoring matches possible (Betis 4-0 Getafe)'
-            }
-        
-        else:
-            # NO PATTERNS - No bet
-            return None
+        return UNDER_35_BETS[bool(elite_present) + 2 * bool(winner_present)]
     
     @classmethod
-    def analyze_match_complete(cls, home_data: Dict, away_data: Dict, match_metadata: Dict) -> Dict:
+    def analyze_match_complete(cls, home_data: Dict, away_data: Dict, match_metadata: Dict,
+                               analysis_timestamp: Optional[str] = None) -> Dict:
         """
         COMPLETE MATCH ANALYSIS - All tiers
         
-        Returns independent analysis based solely on input data
+        Returns independent analysis based solely on input data. The detectors
+        return shared-template records; they become plain dicts only here.
         """
         # Prepare team data
         home_team_data = {
@@ -226,14 +297,15 @@ class CompletePatternDetector:
         all_recommendations = []
         
         # Add Elite Defense bets (0, 1, or 2)
-        all_recommendations.extend(elite_defense_bets)
+        all_recommendations.extend(bet.to_dict() for bet in elite_defense_bets)
         
         # Add Winner Lock bet (0 or 1)
         if winner_lock_bet:
-            all_recommendations.append(winner_lock_bet)
+            all_recommendations.append(winner_lock_bet.to_dict())
         
         # Add UNDER 3.5 bet (0 or 1)
         if under_35_bet:
+            under_35_bet = under_35_bet.to_dict()
             all_recommendations.append(under_35_bet)
         
         # =================== PATTERN COMBINATION ANALYSIS ===================
@@ -283,9 +355,92 @@ class CompletePatternDetector:
             'has_elite_defense': has_elite_defense,
             'has_winner_lock': has_winner_lock,
             'under_35_bet': under_35_bet,
+            'analysis_timestamp': analysis_timestamp or datetime.now().isoformat(),
+            'system_version': 'BRUTBALL_COMPLETE_TIERS_v1.0'
+        }
+
+    # =================== BATCH MODE ===================
+    
+    # Code tables: combination code = has_elite_defense + 2 * has_winner_lock (also the UNDER 3.5 tier)
+    PATTERN_COMBINATIONS = ('NO_PATTERNS', 'ONLY_ELITE_DEFENSE', 'ONLY_WINNER_LOCK', 'BOTH_PATTERNS')
+    UNDER_35_PATTERNS = (None, 'ELITE_DEFENSE_UNDER_3_5', 'WINNER_LOCK_UNDER_3_5', 'BOTH_PATTERNS_UNDER_3_5')
+    
+    @classmethod
+    def analyze_matches_batch(cls, home_conceded, away_conceded,
+                              winner_lock_detected=None, winner_delta_value=None, winner_lock_team=None,
+                              home_teams: Optional[List[str]] = None, away_teams: Optional[List[str]] = None,
+                              materialize: bool = True) -> Dict[str, Any]:
+        """
+        BATCH ANALYSIS - all tiers for many matches from columnar inputs
+        
+        home_conceded / away_conceded: goals_conceded_last_5 per match
+        winner_lock_detected / winner_delta_value / winner_lock_team ('home' or 'away'):
+        optional Agency-State inputs per match
+        
+        Masks and codes are NumPy arrays; analyze_match_complete detail dicts are
+        only built for matches where at least one pattern fires.
+        """
+        # Raw values keep their dtype so materialized details format like the per-match path
+        home_raw = np.asarray(home_conceded)
+        away_raw = np.asarray(away_conceded)
+        home_conceded = home_raw.astype(np.float64)
+        away_conceded = away_raw.astype(np.float64)
+        n = len(home_conceded)
+        
+        # =================== TIER 1: ELITE DEFENSE ===================
+        elite = cls.ELITE_DEFENSE_RULES({
+            'home_goals_conceded_last_5': home_conceded,
+            'away_goals_conceded_last_5': away_conceded,
+            'home_defense_gap': away_conceded - home_conceded,
+            'away_defense_gap': home_conceded - away_conceded
+        })
+        home_elite = elite['home_elite_defense']
+        away_elite = elite['away_elite_defense']
+        has_elite_defense = home_elite | away_elite
+        
+        # =================== TIER 2: WINNER LOCK ===================
+        if winner_lock_detected is None:
+            has_winner_lock = np.zeros(n, dtype=bool)
+            lock_team = np.full(n, '', dtype=object)
+            delta = np.zeros(n)
+        else:
+            lock_team = np.array(['' if side is None else side for side in winner_lock_team], dtype=object)
+            delta = np.asarray(winner_delta_value, dtype=np.float64)
+            # As in detect_winner_lock, only delta <= 0 vetoes a lock (a NaN delta does not)
+            has_winner_lock = np.asarray(winner_lock_detected, dtype=bool) & (lock_team != '') & ~(delta <= 0)
+        
+        # =================== TIER 3 + COMBINATION CODES ===================
+        combination = has_elite_defense.astype(np.int8) + 2 * has_winner_lock.astype(np.int8)
+        
+        result = {
+            'home_elite_defense': home_elite,
+            'away_elite_defense': away_elite,
+            'has_elite_defense': has_elite_defense,
+            'has_winner_lock': has_winner_lock,
+            'pattern_combination': combination,
+            'fired': np.flatnonzero(combination),
             'analysis_timestamp': datetime.now().isoformat(),
             'system_version': 'BRUTBALL_COMPLETE_TIERS_v1.0'
         }
+        
+        if materialize:
+            result['details'] = {}
+            for i in result['fired'].tolist():
+                metadata = {
+                    'home_team': home_teams[i] if home_teams is not None else 'Home',
+                    'away_team': away_teams[i] if away_teams is not None else 'Away',
+                    'winner_lock_detected': bool(has_winner_lock[i]),
+                    'winner_lock_team': lock_team[i],
+                    'winner_delta_value': float(delta[i])
+                }
+                result['details'][i] = cls.analyze_match_complete(
+                    {'goals_conceded_last_5': home_raw[i].item()},
+                    {'goals_conceded_last_5': away_raw[i].item()},
+                    metadata,
+                    analysis_timestamp=result['analysis_timestamp']
+                )
+        
+        return result
 
 # =================== DATA VALIDATOR ===================
 class DataValidator:
@@ -0,0 +1,181 @@
+"""
+THRESHOLD PARAMETER SWEEP
+Evaluates grid or random configurations of the rule thresholds
+(brutball_rules.RULE_PARAMETERS) against historical fixtures on a process
+pool. The prepared history is packed once into a shared-memory block that
+every worker maps; tasks carry only parameter dictionaries.
+
+Results are long-form: one row per configuration and certainty rule plus an
+'ALL' row, with bets, hit rate, coverage (share of fixtures with a bet from
+the rule) and flat-stake ROI at the odds_range midpoint.
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from brutball_core import BrutballDataLoader
+from backtest import RULE_ODDS, certainty_hits, prepare_history
+from brutball_rules import DEFAULT_RULES, RULE_PARAMETERS
+
+# Every REQUIRED_COLUMNS stat except the team name, per side
+STAT_COLUMNS = [col for col in BrutballDataLoader.REQUIRED_COLUMNS if col != 'team']
+
+METRIC_COLUMNS = ['rule', 'bets', 'wins', 'hit_rate', 'coverage', 'roi']
+
+# Worker-side views of the shared block, set by _attach_history
+_WORKER_HISTORY: Dict = {}
+
+# ============================================================================
+# SEARCH SPACES
+# ============================================================================
+
+def _check_parameters(names: Sequence[str]) -> None:
+    unknown = sorted(set(names) - set(RULE_PARAMETERS))
+    if unknown:
+        raise ValueError(f"Unknown rule parameters: {unknown}")
+
+def grid_configurations(grid: Dict[str, Sequence]) -> List[Dict]:
+    """Cartesian product of the listed values, e.g. {'tempo_xg': [1.3, 1.4, 1.5]}"""
+    _check_parameters(list(grid))
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def random_configurations(bounds: Dict[str, Tuple[float, float]], n: int, seed: int = 0) -> List[Dict]:
+    """n uniform draws inside (low, high); integer bounds draw integers (inclusive)"""
+    _check_parameters(list(bounds))
+    rng = np.random.default_rng(seed)
+    samples = {}
+    for name, (low, high) in bounds.items():
+        if isinstance(low, int) and isinstance(high, int):
+            samples[name] = rng.integers(low, high + 1, n).tolist()
+        else:
+            samples[name] = rng.uniform(low, high, n).tolist()
+    return [{name: samples[name][i] for name in bounds} for i in range(n)]
+
+# ============================================================================
+# SHARED HISTORY
+# ============================================================================
+
+def pack_history(history: Dict) -> np.ndarray:
+    """(n, 2 * stats + 2) float64 block: home stats, away stats, home goals, away goals"""
+    fixtures = history['fixtures']
+    columns = [history['home'][col] for col in STAT_COLUMNS] + [history['away'][col] for col in STAT_COLUMNS]
+    columns += [fixtures['home_goals'], fixtures['away_goals']]
+    return np.column_stack([pd.to_numeric(col, errors='coerce').to_numpy(dtype=np.float64) for col in columns])
+
+def unpack_history(block: np.ndarray) -> Dict:
+    """Zero-copy frames over a packed block"""
+    k = len(STAT_COLUMNS)
+    return {
+        'home': pd.DataFrame(block[:, :k], columns=STAT_COLUMNS, copy=False),
+        'away': pd.DataFrame(block[:, k:2 * k], columns=STAT_COLUMNS, copy=False),
+        'home_goals': block[:, 2 * k],
+        'away_goals': block[:, 2 * k + 1]
+    }
+
+def _attach_history(name: str, shape: Tuple[int, int]) -> None:
+    """Pool initializer: map the shared block once per worker"""
+    shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    # Keep the segment referenced for the life of the worker
+    _WORKER_HISTORY.clear()
+    _WORKER_HISTORY.update(unpack_history(block), shm=shm)
+
+# ============================================================================
+# EVALUATION
+# ============================================================================
+
+def evaluate_configuration(history: Dict, parameters: Dict) -> List[Dict]:
+    """Metrics for one configuration over an unpacked history"""
+    rules = DEFAULT_RULES.with_parameters(**parameters)
+    n = len(history['home_goals'])
+
+    metrics = {}
+    covered = np.zeros(n, dtype=bool)
+    for _, label, _, index, won in certainty_hits(
+            history['home'], history['away'], history['home_goals'], history['away_goals'], rules):
+        entry = metrics.setdefault(label, {'bets': 0, 'wins': 0, 'fixtures': np.zeros(n, dtype=bool)})
+        entry['bets'] += len(index)
+        entry['wins'] += int(won.sum())
+        entry['fixtures'][index] = True
+        covered[index] = True
+
+    rows = []
+    total_bets = total_wins = 0
+    total_profit = 0.0
+    for label, entry in metrics.items():
+        profit = entry['wins'] * (RULE_ODDS[label] - 1.0) - (entry['bets'] - entry['wins'])
+        total_bets += entry['bets']
+        total_wins += entry['wins']
+        total_profit += profit
+        rows.append(_metric_row(parameters, label, entry['bets'], entry['wins'],
+                                entry['fixtures'].sum(), n, profit))
+    rows.append(_metric_row(parameters, 'ALL', total_bets, total_wins, covered.sum(), n, total_profit))
+    return rows
+
+def _metric_row(parameters: Dict, rule: str, bets: int, wins: int, fixtures: int, n: int, profit: float) -> Dict:
+    return {
+        **parameters,
+        'rule': rule,
+        'bets': bets,
+        'wins': wins,
+        'hit_rate': wins / bets if bets else np.nan,
+        'coverage': fixtures / n if n else np.nan,
+        'roi': profit / bets if bets else np.nan
+    }
+
+def _evaluate_chunk(configurations: List[Dict]) -> List[Dict]:
+    rows = []
+    for parameters in configurations:
+        rows.extend(evaluate_configuration(_WORKER_HISTORY, parameters))
+    return rows
+
+# ============================================================================
+# SWEEP
+# ============================================================================
+
+def run_sweep(fixtures: pd.DataFrame, snapshots: pd.DataFrame, configurations: List[Dict],
+              workers: Optional[int] = None, chunk_size: Optional[int] = None) -> pd.DataFrame:
+    """
+    Evaluate every configuration (see grid_configurations / random_configurations).
+    workers: process count (None = all cores, 1 = run in this process)
+    """
+    for parameters in configurations:
+        _check_parameters(list(parameters))
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    block = pack_history(prepare_history(fixtures, snapshots))
+    parameter_names = list(dict.fromkeys(name for parameters in configurations for name in parameters))
+
+    if workers <= 1 or len(configurations) <= 1:
+        history = unpack_history(block)
+        rows = [row for parameters in configurations for row in evaluate_configuration(history, parameters)]
+    else:
+        workers = min(workers, len(configurations))
+        chunk_size = chunk_size or max(1, len(configurations) // (workers * 4))
+        chunks = [configurations[i:i + chunk_size] for i in range(0, len(configurations), chunk_size)]
+
+        shm = shared_memory.SharedMemory(create=True, size=max(block.nbytes, 1))
+        try:
+            np.ndarray(block.shape, dtype=np.float64, buffer=shm.buf)[:] = block
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_history,
+                                     initargs=(shm.name, block.shape)) as pool:
+                rows = [row for chunk_rows in pool.map(_evaluate_chunk, chunks) for row in chunk_rows]
+        finally:
+            shm.close()
+            shm.unlink()
+
+    return pd.DataFrame(rows, columns=parameter_names + METRIC_COLUMNS)
+
+def rank_configurations(results: pd.DataFrame, rule: str = 'ALL', metric: str = 'roi',
+                        min_bets: int = 1) -> pd.DataFrame:
+    """Configurations ordered by one rule's metric (best first)"""
+    selected = results[(results['rule'] == rule) & (results['bets'] >= min_bets)]
+    return selected.sort_values(metric, ascending=False, kind='mergesort').reset_index(drop=True)
@@ -0,0 +1,227 @@
+"""
+COMMAND-LINE SLATE SCANNER
+Runs the certainty pipeline over a fixtures file or every pairing of one
+league (or all of leagues/) and streams the recommendations as they are
+produced: JSON Lines to stdout or a file, or a Parquet file written one row
+group per batch. Memory stays bounded by the batch size.
+
+    python -m slate_scanner premier_league                       # all pairings, JSONL to stdout
+    python -m slate_scanner all --fixtures slate.csv -o bets.parquet
+    python -m slate_scanner la_liga --fixtures slate.jsonl --format jsonl -o bets.jsonl
+
+Fixtures files (.csv, .json or .jsonl) need home_team and away_team columns
+and a league column when scanning all leagues. fixture_id numbers fixtures
+in output order across the whole run. Parquet output needs pyarrow.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+from brutball_core import BrutballCertaintyEngine, BrutballDataLoader, LazyModule
+from league_scanner import list_leagues
+
+# Imported on first use: --help and argument errors stay fast
+pd = LazyModule('pandas')
+
+ALL_LEAGUES = "all"
+DEFAULT_BATCH_SIZE = 256
+
+# Parquet column types (everything else is a nullable string)
+PARQUET_TYPES = {
+    'fixture_id': 'int64', 'priority': 'int64', 'goals_environment': 'bool', 'transformation_applied': 'bool',
+    'stake_multiplier': 'float64', 'stake_amount': 'float64', 'stake_pct': 'float64'
+}
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+def read_fixtures(path: str) -> pd.DataFrame:
+    """home_team / away_team (and optional league) from a CSV, JSON or JSONL file"""
+    if path.endswith('.jsonl'):
+        fixtures = pd.read_json(path, lines=True, dtype=False)
+    elif path.endswith('.json'):
+        fixtures = pd.read_json(path, dtype=False)
+    else:
+        fixtures = pd.read_csv(path, dtype=str)
+    missing = [col for col in ('home_team', 'away_team') if col not in fixtures.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+    return fixtures
+
+def plan_slates(league: str, fixtures: Optional[pd.DataFrame],
+                leagues_dir: str) -> List[Tuple[str, Optional[List[Tuple[str, str]]]]]:
+    """(league, fixture pairs) per league to scan; None pairs = every pairing"""
+    leagues = list_leagues(leagues_dir) if league == ALL_LEAGUES else [league]
+    if fixtures is None:
+        return [(league_name, None) for league_name in leagues]
+
+    if 'league' not in fixtures.columns:
+        if league == ALL_LEAGUES:
+            raise ValueError("A fixtures file for all leagues needs a league column")
+        fixtures = fixtures.assign(league=league)
+    slates = []
+    for league_name in leagues:
+        selected = fixtures[fixtures['league'] == league_name]
+        if len(selected):
+            slates.append((league_name, list(zip(selected['home_team'].tolist(), selected['away_team'].tolist()))))
+    unmatched = sorted(set(fixtures['league']) - set(leagues))
+    if unmatched:
+        raise ValueError(f"League not found: {unmatched}")
+    return slates
+
+def all_pairings(teams: List[str]) -> Iterator[Tuple[str, str]]:
+    for home in teams:
+        for away in teams:
+            if away != home:
+                yield home, away
+
+def _batches(pairs: Iterator[Tuple[str, str]], batch_size: int) -> Iterator[List[Tuple[str, str]]]:
+    batch = []
+    for pair in pairs:
+        batch.append(pair)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# ============================================================================
+# SINKS
+# ============================================================================
+
+class JsonlSink:
+    """One JSON object per recommendation, flushed after every batch"""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if frame.empty:
+            return
+        text = frame.to_json(orient='records', lines=True, force_ascii=False)
+        self.stream.write(text if text.endswith('\n') else text + '\n')
+        self.stream.flush()
+
+    def close(self) -> None:
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+class ParquetSink:
+    """Parquet file with one row group per batch (fixed schema, no buffering of the whole scan)"""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+        self._pa = pa
+        self.schema = pa.schema([
+            (col, pa.type_for_alias(PARQUET_TYPES[col]) if col in PARQUET_TYPES else pa.string())
+            for col in BrutballCertaintyEngine.FIXTURE_COLUMNS
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if frame.empty:
+            return
+        self.writer.write_table(self._pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False))
+
+    def close(self) -> None:
+        self.writer.close()
+
+def open_sink(output: Optional[str], output_format: Optional[str]):
+    """Format from --format, else the output extension, else JSONL"""
+    if output_format is None:
+        output_format = 'parquet' if output and output.endswith(('.parquet', '.pq')) else 'jsonl'
+    if output_format == 'parquet':
+        if not output or output == '-':
+            raise ValueError("Parquet output needs a file path (-o)")
+        return ParquetSink(output)
+    if not output or output == '-':
+        return JsonlSink(sys.stdout)
+    return JsonlSink(open(output, 'w', encoding='utf-8'))
+
+# ============================================================================
+# SCAN
+# ============================================================================
+
+def scan_slates(slates, sink, leagues_dir: str = BrutballDataLoader.LEAGUES_DIR, bankroll: float = 1000,
+                base_stake_pct: float = 0.5, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict:
+    """Analyze each slate batch by batch and hand every batch to the sink as it completes"""
+    summary = {'leagues': 0, 'fixtures': 0, 'recommendations': 0, 'errors': {}}
+    for league_name, pairs in slates:
+        try:
+            df = BrutballDataLoader.load_csv(os.path.join(leagues_dir, f"{league_name}.csv"))
+            # One-shot engine: nothing to memoize across runs
+            engine = BrutballCertaintyEngine(league_name, df=df, analysis_cache=None)
+        except (OSError, ValueError, KeyError, pd.errors.ParserError) as e:
+            summary['errors'][league_name] = f"{type(e).__name__}: {e}"
+            continue
+
+        if pairs is None:
+            pairs = all_pairings(engine.get_available_teams())
+        else:
+            unknown = sorted({team for pair in pairs for team in pair if team not in engine.team_positions})
+            if unknown:
+                summary['errors'][league_name] = f"Team not found: {unknown}"
+                continue
+
+        summary['leagues'] += 1
+        for batch in _batches(iter(pairs), batch_size):
+            recommendations = engine.analyze_fixtures(batch, bankroll, base_stake_pct)
+            recommendations['fixture_id'] += summary['fixtures']
+            summary['fixtures'] += len(batch)
+            summary['recommendations'] += len(recommendations)
+            sink.write(recommendations)
+    return summary
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m slate_scanner",
+                                     description="Stream Brutball certainty recommendations for a slate")
+    parser.add_argument('league', help=f"league name, or '{ALL_LEAGUES}' for every CSV in the leagues directory")
+    parser.add_argument('--fixtures', help="CSV/JSON/JSONL with home_team, away_team[, league] (default: all pairings)")
+    parser.add_argument('-o', '--output', help="output file (default: stdout)")
+    parser.add_argument('--format', choices=('jsonl', 'parquet'), dest='output_format',
+                        help="default: from the output extension, else jsonl")
+    parser.add_argument('--bankroll', type=float, default=1000)
+    parser.add_argument('--base-stake-pct', type=float, default=0.5)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="fixtures per engine call")
+    parser.add_argument('--leagues-dir', default=BrutballDataLoader.LEAGUES_DIR)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        fixtures = read_fixtures(args.fixtures) if args.fixtures else None
+        slates = plan_slates(args.league, fixtures, args.leagues_dir)
+        sink = open_sink(args.output, args.output_format)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    try:
+        summary = scan_slates(slates, sink, args.leagues_dir, args.bankroll, args.base_stake_pct,
+                              max(1, args.batch_size))
+    except BrokenPipeError:
+        # Downstream consumer stopped reading (e.g. | head)
+        return 0
+    finally:
+        try:
+            sink.close()
+        except BrokenPipeError:
+            pass
+
+    for league_name, error in summary['errors'].items():
+        print(f"error: {league_name}: {error}", file=sys.stderr)
+    print(f"{summary['leagues']} leagues, {summary['fixtures']} fixtures, "
+          f"{summary['recommendations']} recommendations in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return 1 if summary['errors'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+POINT-IN-TIME LEAGUE SNAPSHOT STORE
+Append-only history of league tables, one version per matchday, so the
+engines can be evaluated as of any past date without look-ahead.
+
+Layout per league (<root>/<league>/):
+- rows-NNNNNN.npy     team rows first seen in version N (LeagueDataCache records)
+- members-NNNNNN.npy  (row id, row hash) of every team in version N, table order
+- manifest.npy        one entry per version: as_of, rows, new_rows, schema hash
+
+Row segments and member lists are written once and never modified; only the
+small manifest is rewritten (atomically) on append. Rows unchanged since the
+previous version are referenced, not stored again. As-of lookups binary-search
+the manifest and gather rows from memory-mapped segments.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from brutball_core import BrutballCertaintyEngine, BrutballDataLoader, LeagueDataCache
+
+SNAPSHOT_DIRNAME = ".snapshots"
+
+MANIFEST_DTYPE = np.dtype([('as_of', '<i8'), ('rows', '<i8'), ('new_rows', '<i8'), ('schema', '<u8')])
+MEMBERS_DTYPE = np.dtype([('row', '<i8'), ('hash', '<u8')])
+
+def _timestamp_ns(when) -> int:
+    stamp = pd.Timestamp(when)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert('UTC').tz_localize(None)
+    return stamp.value
+
+def _save_atomic(path: str, array: np.ndarray) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as fh:
+        np.save(fh, array, allow_pickle=False)
+    os.replace(tmp_path, path)
+
+class LeagueSnapshotStore:
+    """Versioned, deduplicated league tables with an as-of index"""
+
+    def __init__(self, root: str = os.path.join(BrutballDataLoader.LEAGUES_DIR, SNAPSHOT_DIRNAME)):
+        self.root = root
+        self._manifests: Dict[str, np.ndarray] = {}
+        self._segments: Dict[Tuple[str, str, int], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ paths
+
+    def _league_dir(self, league_name: str) -> str:
+        return os.path.join(self.root, league_name)
+
+    def _segment_path(self, league_name: str, kind: str, version: int) -> str:
+        return os.path.join(self._league_dir(league_name), f"{kind}-{version:06d}.npy")
+
+    # ------------------------------------------------------------------ index
+
+    def get_manifest(self, league_name: str) -> np.ndarray:
+        if league_name not in self._manifests:
+            path = os.path.join(self._league_dir(league_name), "manifest.npy")
+            if os.path.exists(path):
+                self._manifests[league_name] = np.load(path, allow_pickle=False)
+            else:
+                self._manifests[league_name] = np.empty(0, dtype=MANIFEST_DTYPE)
+        return self._manifests[league_name]
+
+    def get_leagues(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, "manifest.npy")))
+
+    def get_versions(self, league_name: str) -> pd.DataFrame:
+        manifest = self.get_manifest(league_name)
+        return pd.DataFrame({
+            'version': np.arange(len(manifest)),
+            'as_of': pd.to_datetime(manifest['as_of']),
+            'rows': manifest['rows'],
+            'new_rows': manifest['new_rows']
+        })
+
+    def find_version(self, league_name: str, when, strict: bool = False) -> Optional[int]:
+        """Latest version taken at or before `when` (strictly before if strict)"""
+        manifest = self.get_manifest(league_name)
+        position = np.searchsorted(manifest['as_of'], _timestamp_ns(when), side='left' if strict else 'right')
+        return int(position) - 1 if position > 0 else None
+
+    # ------------------------------------------------------------------ rows
+
+    def _load(self, league_name: str, kind: str, version: int) -> np.ndarray:
+        key = (league_name, kind, version)
+        if key not in self._segments:
+            self._segments[key] = np.load(self._segment_path(league_name, kind, version),
+                                          mmap_mode='r', allow_pickle=False)
+        return self._segments[key]
+
+    def _row_offsets(self, league_name: str) -> np.ndarray:
+        """Global id of the first row stored by each version"""
+        new_rows = self.get_manifest(league_name)['new_rows']
+        return np.concatenate(([0], np.cumsum(new_rows)))
+
+    def get_frame(self, league_name: str, version: int) -> pd.DataFrame:
+        manifest = self.get_manifest(league_name)
+        if not 0 <= version < len(manifest):
+            raise ValueError(f"No snapshot version {version} for {league_name}")
+
+        rows = self._load(league_name, 'members', version)['row']
+        if not len(rows):
+            return LeagueDataCache.records_to_frame(self._load(league_name, 'rows', version))
+        offsets = self._row_offsets(league_name)
+        owners = np.searchsorted(offsets, rows, side='right') - 1
+
+        parts = []
+        for owner in np.unique(owners):
+            selected = np.flatnonzero(owners == owner)
+            records = self._load(league_name, 'rows', int(owner))[rows[selected] - offsets[owner]]
+            parts.append(LeagueDataCache.records_to_frame(records).set_index(pd.Index(selected)))
+        return pd.concat(parts).sort_index().reset_index(drop=True)
+
+    def as_of(self, league_name: str, when, strict: bool = False) -> Optional[pd.DataFrame]:
+        """League table as it stood at `when` (None before the first snapshot)"""
+        version = self.find_version(league_name, when, strict)
+        return None if version is None else self.get_frame(league_name, version)
+
+    def get_engine(self, league_name: str, when, strict: bool = True) -> BrutballCertaintyEngine:
+        """
+        Engine over the table as it stood before `when` (strict: a snapshot
+        taken on the fixture date itself may already include the result)
+        """
+        version = self.find_version(league_name, when, strict)
+        if version is None:
+            raise ValueError(f"No snapshot of {league_name} before {when}")
+        as_of = int(self.get_manifest(league_name)['as_of'][version])
+        # Historical engines are not memoized: they would evict the live league's entries
+        return BrutballCertaintyEngine(league_name, df=self.get_frame(league_name, version),
+                                       data_version=(as_of, version), analysis_cache=None)
+
+    # ------------------------------------------------------------------ writes
+
+    def append(self, league_name: str, df: pd.DataFrame, as_of) -> Dict:
+        """Record the league table as of `as_of`; versions must be appended in time order"""
+        as_of_ns = _timestamp_ns(as_of)
+        with self._lock:
+            manifest = self.get_manifest(league_name)
+            if len(manifest) and as_of_ns <= manifest['as_of'][-1]:
+                raise ValueError(
+                    f"Snapshot of {league_name} at {pd.Timestamp(as_of_ns)} is not after "
+                    f"the latest version ({pd.Timestamp(int(manifest['as_of'][-1]))})"
+                )
+
+            df = df.reset_index(drop=True)
+            version = len(manifest)
+            schema = BrutballDataLoader.schema_hash(df)
+            hashes = pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+            # Reuse rows unchanged since the previous version (same schema and content)
+            rows = np.full(len(df), -1, dtype=np.int64)
+            if version and manifest['schema'][-1] == schema:
+                previous = self._load(league_name, 'members', version - 1)
+                known = dict(zip(previous['hash'].tolist(), previous['row'].tolist()))
+                rows = np.array([known.get(h, -1) for h in hashes.tolist()], dtype=np.int64)
+
+            new = np.flatnonzero(rows < 0)
+            first_row = int(self._row_offsets(league_name)[-1])
+            rows[new] = first_row + np.arange(len(new))
+
+            os.makedirs(self._league_dir(league_name), exist_ok=True)
+            _save_atomic(self._segment_path(league_name, 'rows', version),
+                         LeagueDataCache.frame_to_records(df.iloc[new]))
+            members = np.empty(len(df), dtype=MEMBERS_DTYPE)
+            members['row'] = rows
+            members['hash'] = hashes
+            _save_atomic(self._segment_path(league_name, 'members', version), members)
+
+            entry = np.array([(as_of_ns, len(df), len(new), schema)], dtype=MANIFEST_DTYPE)
+            manifest = np.concatenate([manifest, entry])
+            # The manifest is the commit point: a crash before this leaves orphan files, not a bad index
+            _save_atomic(os.path.join(self._league_dir(league_name), "manifest.npy"), manifest)
+            self._manifests[league_name] = manifest
+
+        return {
+            'league': league_name,
+            'version': version,
+            'as_of': pd.Timestamp(as_of_ns),
+            'rows': len(df),
+            'new_rows': len(new),
+            'reused_rows': len(df) - len(new)
+        }
+
+    def import_csv(self, league_name: str, csv_path: Optional[str] = None, as_of=None) -> Dict:
+        """Append the current league CSV (as_of defaults to the file's mtime)"""
+        csv_path = csv_path or BrutballDataLoader.get_csv_path(league_name)
+        if as_of is None:
+            as_of = pd.Timestamp(os.stat(csv_path).st_mtime_ns)
+        return self.append(league_name, BrutballDataLoader.load_csv(csv_path), as_of)
+
+    # ------------------------------------------------------------------ bulk
+
+    def get_history(self, leagues: Optional[List[str]] = None) -> pd.DataFrame:
+        """Every version of every league as one frame with league/as_of columns (backtest snapshots input)"""
+        frames = []
+        for league_name in leagues if leagues is not None else self.get_leagues():
+            manifest = self.get_manifest(league_name)
+            for version in range(len(manifest)):
+                frame = self.get_frame(league_name, version)
+                frame.insert(0, 'as_of', pd.Timestamp(int(manifest['as_of'][version])))
+                frame.insert(0, 'league', league_name)
+                frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=['league', 'as_of'] + BrutballDataLoader.REQUIRED_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
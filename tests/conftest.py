@@ -0,0 +1,89 @@
+"""
+Shared fixtures. Tests run against a private copy of tests/data/leagues so
+caches, snapshots and rewrites never touch the real leagues/ directory.
+
+tests/data/baseline_analyses.json.gz holds analyze_match output of the
+original engine (before the performance work) for every pairing of the
+bundled leagues: team data per league and detection + recommendations per
+pairing, at bankroll 1000 and a 0.5% base stake. baseline_patterns.json.gz
+holds the original CompletePatternDetector.analyze_match_complete output
+(without its timestamp) for a seeded random set of matches.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, 'tests', 'data')
+SOURCE_LEAGUES_DIR = os.path.join(DATA_DIR, 'leagues')
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from brutball_core import MATCH_ANALYSIS_CACHE, BrutballDataLoader  # noqa: E402
+
+LEAGUE_NAMES = sorted(name[:-len('.csv')] for name in os.listdir(SOURCE_LEAGUES_DIR) if name.endswith('.csv'))
+
+
+@pytest.fixture
+def leagues_dir(tmp_path, monkeypatch) -> str:
+    """Fresh copy of the bundled leagues, installed as BrutballDataLoader.LEAGUES_DIR"""
+    path = tmp_path / 'leagues'
+    shutil.copytree(SOURCE_LEAGUES_DIR, path)
+    monkeypatch.setattr(BrutballDataLoader, 'LEAGUES_DIR', str(path))
+    MATCH_ANALYSIS_CACHE.invalidate()
+    yield str(path)
+    MATCH_ANALYSIS_CACHE.invalidate()
+
+
+@pytest.fixture(scope='session')
+def baseline():
+    with gzip.open(os.path.join(DATA_DIR, 'baseline_analyses.json.gz'), 'rt', encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+@pytest.fixture(scope='session')
+def baseline_patterns():
+    with gzip.open(os.path.join(DATA_DIR, 'baseline_patterns.json.gz'), 'rt', encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+@pytest.fixture(scope='session')
+def history():
+    """
+    Synthetic backtest input from two bundled leagues: noisy snapshots of every
+    team every 3 days and random fixtures on the snapshot days (so each fixture
+    must use the previous snapshot), plus unplayed and too-early fixtures.
+    """
+    rng = np.random.default_rng(11)
+    snapshots, fixtures = [], []
+    for league_name in ('bundesliga', 'serie_a'):
+        df = BrutballDataLoader.load_csv(os.path.join(SOURCE_LEAGUES_DIR, f"{league_name}.csv"), use_cache=False)
+        teams = df['team'].tolist()
+        for date in pd.date_range('2024-08-01', periods=6, freq='3D'):
+            snapshot = df.copy()
+            for col in BrutballDataLoader.REQUIRED_COLUMNS[1:]:
+                values = snapshot[col].to_numpy(dtype=np.float64)
+                if 'xg' in col:
+                    snapshot[col] = (values * rng.uniform(0.6, 1.4, len(values))).round(2)
+                else:
+                    snapshot[col] = np.maximum(0, values + rng.integers(-3, 4, len(values)))
+            snapshot['league'] = league_name
+            snapshot['as_of'] = date
+            snapshots.append(snapshot)
+
+            order = rng.permutation(len(teams))
+            for i in range(0, len(order) - 1, 2):
+                fixtures.append((league_name, date, teams[order[i]], teams[order[i + 1]],
+                                 rng.poisson(1.5), rng.poisson(1.2)))
+        fixtures.append((league_name, '2024-08-20', teams[0], teams[1], None, None))
+    fixtures = pd.DataFrame(fixtures, columns=['league', 'date', 'home_team', 'away_team',
+                                               'home_goals', 'away_goals'])
+    return fixtures, pd.concat(snapshots, ignore_index=True)
@@ -0,0 +1,115 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('streamlit')
+
+import app  # noqa: E402
+from brutball_core import BrutballDataLoader  # noqa: E402
+
+
+@pytest.fixture
+def registry(leagues_dir):
+    app.get_engine_registry.clear()
+    yield app.get_engine_registry()[1]
+    app.get_engine_registry.clear()
+
+
+def rewrite_league(leagues_dir: str, league_name: str, **changes) -> None:
+    csv_path = os.path.join(leagues_dir, f"{league_name}.csv")
+    df = pd.read_csv(csv_path)
+    for column, value in changes.items():
+        df.loc[0, column] = value
+    df.to_csv(csv_path, index=False)
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+# ============================================================================
+# ENGINE REGISTRY
+# ============================================================================
+
+def test_engine_is_shared_per_league_and_version(registry):
+    version = BrutballDataLoader.get_data_version('serie_a')
+    engine = app.get_certainty_engine('serie_a', version)
+    assert app.get_certainty_engine('serie_a', version) is engine
+    assert engine.data_version == version
+    pd.testing.assert_frame_equal(engine.df, BrutballDataLoader.load_league_data('serie_a'))
+
+
+def test_new_version_replaces_the_league_engine(leagues_dir, registry):
+    old = app.get_certainty_engine('serie_a', BrutballDataLoader.get_data_version('serie_a'))
+    other = app.get_certainty_engine('la_liga', BrutballDataLoader.get_data_version('la_liga'))
+
+    rewrite_league(leagues_dir, 'serie_a', home_goals_scored=99)
+    version = BrutballDataLoader.get_data_version('serie_a')
+    engine = app.get_certainty_engine('serie_a', version)
+
+    assert engine is not old
+    assert engine.data_version == version
+    assert engine.df.loc[0, 'home_goals_scored'] == 99
+    assert registry == {'serie_a': engine, 'la_liga': other}
+
+
+def test_engine_loaded_during_a_rewrite_is_not_memoized(leagues_dir, registry):
+    stale = BrutballDataLoader.get_data_version('serie_a')
+    rewrite_league(leagues_dir, 'serie_a', home_goals_scored=99)
+
+    # The frame is newer than the version asked for: don't memoize it under that version
+    engine = app.get_certainty_engine('serie_a', stale)
+    assert engine.data_version is None
+    assert engine.df.loc[0, 'home_goals_scored'] == 99
+
+    current = app.get_certainty_engine('serie_a', BrutballDataLoader.get_data_version('serie_a'))
+    assert current is not engine
+    assert registry['serie_a'] is current
+
+
+# ============================================================================
+# MATCH VIEW
+# ============================================================================
+
+def bet_cards(at) -> list:
+    return [block.value for block in at.markdown if 'class="bet-card"' in block.value]
+
+
+@pytest.fixture
+def app_test(leagues_dir, registry):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(os.path.dirname(app.__file__), 'app.py'), default_timeout=30)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def test_generate_shows_cards_until_the_selection_changes(app_test):
+    at = app_test
+    assert not bet_cards(at)
+
+    at.button[0].click().run()
+    assert not at.exception
+    cards = bet_cards(at)
+    assert cards
+    selection, result = at.session_state[app.ANALYSIS_STATE_KEY]
+    assert selection[2:4] == (at.selectbox(key='home_select').value, at.selectbox(key='away_select').value)
+    assert len(cards) == len(result['certainty_recommendations'])
+
+    # A rerun redraws the stored analysis without clicking again
+    at.run()
+    assert bet_cards(at) == cards
+
+    away = at.selectbox(key='away_select')
+    away.select(next(team for team in away.options if team != away.value)).run()
+    assert not at.exception
+    assert not bet_cards(at)
+
+
+def test_bet_card_html_is_cached_by_content(leagues_dir):
+    engine = app.BrutballCertaintyEngine('serie_a')
+    home, away = engine.get_available_teams()[:2]
+    rec = engine.analyze_match(home, away)['certainty_recommendations'][0]
+    html = app.render_bet_card(rec)
+    assert rec['certainty_bet'] in html
+    assert app.render_bet_card(dict(rec)) == html
+    assert app.render_bet_card(dict(rec, certainty_bet='OTHER BET')) != html
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import (
+    BET_COLUMNS, grade_legs, parse_certainty_legs, prepare_history, replay_certainty, replay_patterns,
+    run_backtest, summarize
+)
+from brutball_core import BrutballCertaintyEngine, BrutballDataLoader
+from match_state_classifier import CompletePatternDetector
+
+
+def snapshot_before(snapshots: pd.DataFrame, league: str, team: str, date) -> pd.Series:
+    rows = snapshots[(snapshots['league'] == league) & (snapshots['team'] == team) &
+                     (snapshots['as_of'] < pd.Timestamp(date))]
+    return rows.sort_values('as_of').iloc[-1] if len(rows) else None
+
+
+def grade(certainty_bet: str, home_team: str, away_team: str, home_goals: int, away_goals: int) -> bool:
+    """Settle a certainty bet by reading it"""
+    won = True
+    for leg in certainty_bet.split(' & '):
+        words = leg.split()
+        if words[-2:] == ['DOUBLE', 'CHANCE']:
+            won &= home_goals >= away_goals if words[0] == 'HOME' else away_goals >= home_goals
+        elif words[0] == 'OVER':
+            won &= home_goals + away_goals > float(words[1])
+        elif words[0] == 'UNDER':
+            won &= home_goals + away_goals < float(words[1])
+        else:
+            team_goals = home_goals if leg.startswith(f"{home_team} UNDER") else away_goals
+            won &= team_goals < float(words[-1])
+    return won
+
+
+# ============================================================================
+# HISTORY PREPARATION
+# ============================================================================
+
+def test_prepare_history_joins_the_previous_snapshot(history):
+    fixtures, snapshots = history
+    prepared = prepare_history(fixtures, snapshots)
+
+    played = fixtures.dropna(subset=['home_goals', 'away_goals'])
+    first_date = snapshots['as_of'].min()
+    expected = played[pd.to_datetime(played['date']) > first_date].reset_index(drop=True)
+    assert prepared['dropped'] == len(fixtures) - len(expected)
+    pd.testing.assert_frame_equal(prepared['fixtures'][['league', 'home_team', 'away_team']],
+                                  expected[['league', 'home_team', 'away_team']])
+
+    for i, fixture in expected.iterrows():
+        for side in ('home', 'away'):
+            row = snapshot_before(snapshots, fixture['league'], fixture[f'{side}_team'], fixture['date'])
+            for col in BrutballDataLoader.REQUIRED_COLUMNS:
+                assert prepared[side][col].iloc[i] == row[col], (i, side, col)
+
+
+def test_prepare_history_requires_columns(history):
+    fixtures, snapshots = history
+    with pytest.raises(ValueError, match='home_goals'):
+        prepare_history(fixtures.drop(columns='home_goals'), snapshots)
+
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+def test_replay_matches_per_fixture_engine(history):
+    fixtures, snapshots = history
+    prepared = prepare_history(fixtures, snapshots)
+    bets = replay_certainty(prepared)
+    assert list(bets.columns) == BET_COLUMNS
+
+    expected = []
+    for i, fixture in prepared['fixtures'].iterrows():
+        home, away = fixture['home_team'], fixture['away_team']
+        df = pd.DataFrame([prepared['home'].iloc[i], prepared['away'].iloc[i]]).reset_index(drop=True)
+        engine = BrutballCertaintyEngine(fixture['league'], df=df, analysis_cache=None)
+        for rec in engine.analyze_match(home, away)['certainty_recommendations']:
+            won = grade(rec['certainty_bet'], home, away, fixture['home_goals'], fixture['away_goals'])
+            expected.append((i, rec['type'], rec['certainty_bet'], rec['stake_multiplier'], won))
+
+    actual = list(zip(bets['fixture'], bets['type'], bets['certainty_bet'], bets['stake_multiplier'], bets['won']))
+    assert actual == expected
+
+
+def test_pattern_replay_matches_per_match_detector(history):
+    fixtures, snapshots = history
+    fixtures = fixtures.assign(winner_lock_detected=True, winner_delta_value=0.4,
+                               winner_lock_team=np.where(np.arange(len(fixtures)) % 3, 'home', 'away'))
+    prepared = prepare_history(fixtures, snapshots)
+    bets = replay_patterns(prepared)
+
+    expected = []
+    for i, fixture in prepared['fixtures'].iterrows():
+        result = CompletePatternDetector.analyze_match_complete(
+            prepared['home'].iloc[i].to_dict(), prepared['away'].iloc[i].to_dict(), fixture.to_dict()
+        )
+        expected += [(i, rec['pattern']) for rec in result['recommendations']]
+    assert list(zip(bets['fixture'], bets['rule'])) == expected
+
+
+def test_run_backtest_summary(history):
+    result = run_backtest(*history)
+    bets, summary = result['bets'], result['summary']
+    # One main certainty bet per replayed fixture
+    assert (bets['type'] == 'MAIN_CERTAINTY').sum() == result['fixtures'] > 0
+    assert set(bets['type']) == {'MAIN_CERTAINTY', 'EDGE_DERIVED_CERTAINTY', 'PATTERN'}
+    assert summary['bets'].sum() == len(bets)
+    assert summary['wins'].sum() == bets['won'].sum()
+    for _, row in summary.iterrows():
+        rule_bets = bets[bets['rule'] == row['rule']]
+        assert row['record'] == f"{int(rule_bets['won'].sum())}/{len(rule_bets)}"
+        if rule_bets['odds'].notna().all():
+            assert np.isclose(row['roi'], rule_bets['profit'].mean())
+        else:
+            assert np.isnan(row['roi'])
+    assert summarize(bets.iloc[:0]).empty
+
+
+# ============================================================================
+# MARKET GRADING
+# ============================================================================
+
+def test_grade_legs():
+    home_goals = np.array([0.0, 1.0, 2.0, 3.0])
+    away_goals = np.array([0.0, 2.0, 1.0, 3.0])
+    legs = parse_certainty_legs("HOME DOUBLE CHANCE & OVER 1.5")
+    assert legs == (('DOUBLE_CHANCE', 'HOME', None), ('OVER', None, 1.5))
+    assert grade_legs(legs, home_goals, away_goals).tolist() == [False, False, True, True]
+    assert grade_legs(parse_certainty_legs("UNDER 3.5"), home_goals, away_goals).tolist() == \
+        [True, True, True, False]
+    assert grade_legs(parse_certainty_legs("TEAM UNDER 1.5"), home_goals, away_goals, away_goals).tolist() == \
+        [True, False, True, False]
+    with pytest.raises(ValueError, match='Cannot grade'):
+        parse_certainty_legs("BTTS")
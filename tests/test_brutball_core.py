@@ -0,0 +1,443 @@
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from brutball_core import (
+    CERTAINTY_TRANSFORMATIONS, BrutballCertaintyEngine, BrutballDataLoader,
+    CertaintyTransformationEngine, EdgeDerivedLocks, EdgeDetectionEngine, LazyModule, LeagueDataCache, Market,
+    MatchAnalysisCache, TeamStats, format_detection_label, parse_detection_label
+)
+from conftest import LEAGUE_NAMES, ROOT, SOURCE_LEAGUES_DIR
+
+
+def assert_close(expected, actual, where=''):
+    """Structural equality with a float tolerance (vectorized sums may differ in the last bit)"""
+    if isinstance(expected, float) and isinstance(actual, (int, float)):
+        assert math.isclose(expected, actual, rel_tol=1e-12, abs_tol=1e-12), where
+    elif isinstance(expected, dict):
+        assert isinstance(actual, dict), where
+        assert expected.keys() == actual.keys(), where
+        for key in expected:
+            assert_close(expected[key], actual[key], f'{where}.{key}')
+    elif isinstance(expected, list):
+        assert len(expected) == len(actual), where
+        for i, (x, y) in enumerate(zip(expected, actual)):
+            assert_close(x, y, f'{where}[{i}]')
+    else:
+        assert expected == actual, where
+
+
+def baseline_fields(expected: dict, actual: dict) -> dict:
+    """The fields the original engine reported (later changes may add fields)"""
+    return {key: actual.get(key) for key in expected}
+
+
+# ============================================================================
+# ENGINE EQUIVALENCE
+# ============================================================================
+
+@pytest.mark.parametrize('league_name', LEAGUE_NAMES)
+def test_analyze_match_matches_original_engine(leagues_dir, baseline, league_name):
+    expected = baseline[league_name]
+    engine = BrutballCertaintyEngine(league_name)
+    teams = engine.get_available_teams()
+    assert sorted(teams) == sorted(expected['teams'])
+
+    for pairing, analysis in expected['analyses'].items():
+        home, away = pairing.split('|')
+        result = engine.analyze_match(home, away, 1000, 0.5)
+        assert result['match'] == f"{home} vs {away}"
+        assert_close(analysis['certainty_recommendations'], result['certainty_recommendations'], pairing)
+        assert_close(analysis['detection_summary'],
+                     baseline_fields(analysis['detection_summary'], result['detection_summary']), pairing)
+        for side, team in (('home_data', home), ('away_data', away)):
+            assert_close(expected['teams'][team], baseline_fields(expected['teams'][team], result[side]),
+                         f'{pairing}.{side}')
+
+
+# ============================================================================
+# LEAGUE DATA CACHE
+# ============================================================================
+
+def test_cached_load_matches_csv(leagues_dir):
+    csv_path = os.path.join(leagues_dir, 'premier_league.csv')
+    parsed = BrutballDataLoader.load_csv(csv_path, use_cache=False)
+
+    assert LeagueDataCache.load(csv_path, BrutballDataLoader.REQUIRED_COLUMNS) is None
+    first = BrutballDataLoader.load_csv(csv_path)
+    cached = LeagueDataCache.load(csv_path, BrutballDataLoader.REQUIRED_COLUMNS)
+
+    assert cached is not None
+    for df in (first, cached):
+        pd.testing.assert_frame_equal(df, parsed, check_dtype=False)
+    assert len(os.listdir(os.path.join(leagues_dir, '.cache'))) == 1
+
+
+def test_cache_follows_csv_rewrites(leagues_dir):
+    csv_path = os.path.join(leagues_dir, 'serie_a.csv')
+    original = BrutballDataLoader.load_csv(csv_path)
+
+    changed = original.copy()
+    changed.loc[0, 'home_goals_scored'] += 10
+    changed.to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(0, 1))
+
+    reloaded = BrutballDataLoader.load_csv(csv_path)
+    assert reloaded.loc[0, 'home_goals_scored'] == original.loc[0, 'home_goals_scored'] + 10
+    # The superseded cache file is dropped
+    assert len(os.listdir(os.path.join(leagues_dir, '.cache'))) == 1
+
+
+def test_cache_round_trips_nulls_and_types():
+    df = pd.DataFrame({
+        'team': ['A', None, 'C'], 'count': np.array([1, 2, 3], dtype=np.int64),
+        'xg': [0.5, np.nan, 1.25], 'flag': [True, False, True]
+    })
+    frame = LeagueDataCache.records_to_frame(LeagueDataCache.frame_to_records(df))
+    pd.testing.assert_frame_equal(frame, df, check_dtype=False)
+    assert frame['count'].dtype == np.int64
+    assert frame['flag'].dtype == bool
+
+
+# ============================================================================
+# TEAM INDEX
+# ============================================================================
+
+def test_team_index_matches_mask_lookup(leagues_dir):
+    df = BrutballDataLoader.load_league_data('la_liga')
+    team_index = BrutballDataLoader.build_team_index(df)
+    for team in df['team']:
+        indexed = BrutballDataLoader.get_team_data(df, team, team_index)
+        scanned = BrutballDataLoader.get_team_data(df, team)
+        assert_close(scanned, baseline_fields(scanned, indexed), team)
+
+
+def test_team_index_keeps_first_duplicate_row():
+    df = pd.read_csv(os.path.join(SOURCE_LEAGUES_DIR, 'ligue_1.csv'))
+    duplicated = pd.concat([df, df.iloc[[0]].assign(home_goals_scored=99)], ignore_index=True)
+    team_index = BrutballDataLoader.build_team_index(duplicated)
+    team = df['team'].iloc[0]
+    assert len(team_index) == len(df)
+    assert team_index[team]['home_goals_scored'] == df['home_goals_scored'].iloc[0]
+
+
+def test_unknown_team_raises(leagues_dir):
+    engine = BrutballCertaintyEngine('ligue_1')
+    with pytest.raises(ValueError, match='Team not found'):
+        engine.analyze_match('Nowhere FC', engine.get_available_teams()[0])
+
+
+# ============================================================================
+# FEATURE TABLE
+# ============================================================================
+
+DERIVED_FIELDS = ('home_xg_per_match', 'away_xg_per_match', 'home_xga_per_match', 'away_xga_per_match',
+                  'avg_scored_last_5', 'avg_conceded_last_5', 'home_avg_conceded_last_5', 'away_avg_conceded_last_5')
+
+
+@pytest.mark.parametrize('league_name', LEAGUE_NAMES)
+def test_feature_table_matches_per_team_computation(leagues_dir, league_name):
+    df = BrutballDataLoader.load_league_data(league_name)
+    # A missing venue window falls back to the overall average
+    df.loc[0, 'home_goals_conceded_last_5'] = np.nan
+    features = BrutballDataLoader.build_feature_table(df)
+    criteria = EdgeDetectionEngine.criteria_names(features)
+
+    for i, team in enumerate(df['team']):
+        scalar = BrutballDataLoader.get_team_data(df, team)
+        for field in DERIVED_FIELDS:
+            assert math.isclose(features[field].iloc[i], scalar[field], rel_tol=1e-12, abs_tol=1e-12), (team, field)
+        score, passed = EdgeDetectionEngine.evaluate_control_criteria(scalar)
+        assert math.isclose(features['control_score'].iloc[i], score), team
+        assert list(criteria[i]) == passed, team
+
+
+# ============================================================================
+# TEAM STATS RECORDS
+# ============================================================================
+
+def test_team_stats_mapping_view():
+    stats = TeamStats({'team': 'A', 'home_goals_scored': 3, 'form_last_5_home': 'WWD'})
+    assert stats['team'] == 'A'
+    assert stats['home_goals_scored'] == 3
+    assert stats['away_goals_scored'] is None
+    assert stats['form_last_5_home'] == 'WWD'
+    assert stats.get('missing', 0) == 0
+    assert 'form_last_5_home' in stats and 'missing' not in stats
+    assert stats.to_dict() == dict(stats)
+    assert list(stats.to_dict()) == list(stats)
+    assert len(stats) == len(TeamStats.FIELDS) + 1
+    # Only columns outside FIELDS are stored per record
+    assert dict(stats.extras) == {'form_last_5_home': 'WWD'}
+    assert TeamStats({'team': 'B'}).extras is TeamStats({'team': 'C'}).extras
+
+
+def test_analyze_match_returns_independent_plain_dicts(leagues_dir):
+    engine = BrutballCertaintyEngine('premier_league')
+    home, away = engine.get_available_teams()[:2]
+    result = engine.analyze_match(home, away)
+
+    for side in ('home_data', 'away_data'):
+        assert type(result[side]) is dict
+    assert type(result['detection_summary']) is dict
+    assert all(type(rec) is dict for rec in result['certainty_recommendations'])
+    json.dumps(result)
+
+    # The memoized detection is not shared with callers
+    result['home_data']['team'] = 'changed'
+    result['certainty_recommendations'].clear()
+    again = engine.analyze_match(home, away)
+    assert again['home_data']['team'] == home
+    assert again['certainty_recommendations']
+
+
+# ============================================================================
+# LEAGUE MATRIX
+# ============================================================================
+
+@pytest.mark.parametrize('league_name', LEAGUE_NAMES)
+def test_league_matrix_matches_original_detection(leagues_dir, baseline, league_name):
+    engine = BrutballCertaintyEngine(league_name)
+    matrix = engine.analyze_league_matrix()
+    teams = matrix['teams']
+    analyses = baseline[league_name]['analyses']
+    levels = EdgeDerivedLocks.EVIDENCE_LEVELS
+
+    assert not matrix['valid'].diagonal().any()
+    for i, home in enumerate(teams):
+        for j, away in enumerate(teams):
+            if i == j:
+                continue
+            expected = analyses[f'{home}|{away}']['detection_summary']
+            assert EdgeDetectionEngine.CONTROLLERS[matrix['controller'][i, j]] == expected['controller']
+            assert EdgeDetectionEngine.ACTIONS[matrix['action'][i, j]] == expected['action']
+            assert bool(matrix['goals_environment'][i, j]) == expected['goals_environment']
+
+            locks = EdgeDerivedLocks.generate_under_locks(
+                engine.team_index[home], engine.team_index[away], home, away
+            )
+            evidence = {lock['offensive_team']: lock['evidence_level'] for lock in locks}
+            assert levels[matrix['away_lock_evidence'][i, j]] == evidence.get(away)
+            assert levels[matrix['home_lock_evidence'][i, j]] == evidence.get(home)
+
+
+# ============================================================================
+# BATCH FIXTURES
+# ============================================================================
+
+def fixture_rows_from_analyze_match(engine, pairs, bankroll, base_stake_pct):
+    rows = []
+    for fixture_id, (home, away) in enumerate(pairs):
+        result = engine.analyze_match(home, away, bankroll, base_stake_pct)
+        summary = result['detection_summary']
+        locks = EdgeDerivedLocks.generate_under_locks(engine.team_index[home], engine.team_index[away], home, away)
+        evidence = {lock['bet_label']: lock['evidence_level'] for lock in locks}
+        for rec in result['certainty_recommendations']:
+            row = dict(rec, fixture_id=fixture_id, league=engine.league_name, home_team=home, away_team=away,
+                       controller=summary['controller'], goals_environment=summary['goals_environment'],
+                       evidence_level=evidence.get(rec['certainty_bet']) if rec['priority'] == 2 else None)
+            rows.append({column: row[column] for column in BrutballCertaintyEngine.FIXTURE_COLUMNS})
+    return rows
+
+
+@pytest.mark.parametrize('league_name', LEAGUE_NAMES)
+def test_analyze_fixtures_matches_analyze_match(leagues_dir, league_name):
+    engine = BrutballCertaintyEngine(league_name)
+    teams = engine.get_available_teams()
+    pairs = [(home, away) for home in teams[:6] for away in teams[:6] if home != away]
+    expected = fixture_rows_from_analyze_match(engine, pairs, 2500, 1.5)
+
+    fixtures = pd.DataFrame(pairs, columns=['home_team', 'away_team'])
+    for slate in (pairs, fixtures):
+        result = engine.analyze_fixtures(slate, 2500, 1.5)
+        assert list(result.columns) == BrutballCertaintyEngine.FIXTURE_COLUMNS
+        actual = [{key: (None if value is None or value != value else value) for key, value in row.items()}
+                  for row in result.to_dict('records')]
+        assert_close(expected, actual)
+
+
+def test_analyze_fixtures_rejects_unknown_teams(leagues_dir):
+    engine = BrutballCertaintyEngine('serie_a')
+    home = engine.get_available_teams()[0]
+    with pytest.raises(ValueError, match='Team not found'):
+        engine.analyze_fixtures([(home, 'Nowhere FC')])
+    assert engine.analyze_fixtures([]).empty
+
+
+# ============================================================================
+# CERTAINTY DISPATCH
+# ============================================================================
+
+def legacy_transform(label: str, team: str = "") -> dict:
+    """The original substring-matching transformation"""
+    rule, bet = None, None
+    if "UNDER" in label and team:
+        for line in ("1.5", "2.5"):
+            if f"UNDER {line}" in label:
+                rule, bet = f"TEAM UNDER {line}", f"{team} UNDER {line}"
+                break
+    if rule is None:
+        rule = next((pattern for pattern in CERTAINTY_TRANSFORMATIONS if pattern in label), None)
+    if rule is None:
+        return CertaintyTransformationEngine.fallback_certainty(label)
+    data = CERTAINTY_TRANSFORMATIONS[rule]
+    return {
+        'original_detection': label, 'certainty_bet': bet or data['certainty_bet'],
+        'odds_range': data['odds_range'], 'historical_wins': data['historical_wins'], 'win_rate': data['win_rate'],
+        'reason': data['reason'], 'icon': data['icon'], 'stake_multiplier': data['stake_multiplier'],
+        'certainty_level': '100%', 'transformation_applied': True
+    }
+
+
+def test_transform_to_certainty_matches_substring_rules():
+    words = ["BACK", "HOME", "AWAY", "&", "OVER", "UNDER", "TEAM", "1.5", "2.5", "3.5", "2.50", "X"]
+    rng = random.Random(7)
+    labels = [*CERTAINTY_TRANSFORMATIONS, *EdgeDetectionEngine.ACTIONS]
+    labels += [" ".join(rng.choice(words) for _ in range(rng.randint(1, 5))) for _ in range(3000)]
+    for label in labels:
+        for team in ("", "Inter"):
+            assert CertaintyTransformationEngine.transform_to_certainty(label, team) == \
+                legacy_transform(label, team), (label, team)
+
+
+def test_detection_keys_round_trip():
+    for label in [*CERTAINTY_TRANSFORMATIONS, *EdgeDetectionEngine.ACTIONS]:
+        key = parse_detection_label(label)
+        assert key is not None, label
+        assert parse_detection_label(format_detection_label(key))[1:] == key[1:], label
+        # Structured keys give the transformation of their canonical label (team locks are per team)
+        team = "Inter" if key[0] == Market.TEAM_UNDER else ""
+        assert CertaintyTransformationEngine.transform_key(key, team) == \
+            legacy_transform(format_detection_label(key), team), label
+    assert EdgeDetectionEngine.ACTION_KEYS == tuple(map(parse_detection_label, EdgeDetectionEngine.ACTIONS))
+    assert parse_detection_label("BACK HOME & UNDER 2.5") is None
+    assert parse_detection_label("") is None
+
+
+def test_lock_generators_return_plain_dicts(leagues_dir):
+    engine = BrutballCertaintyEngine('serie_a')
+    teams = engine.get_available_teams()
+    seen = 0
+    for home in teams:
+        for away in teams:
+            if home == away:
+                continue
+            args = (engine.team_index[home], engine.team_index[away], home, away)
+            locks = EdgeDerivedLocks.generate_under_locks(*args)
+            assert all(type(lock) is dict for lock in locks)
+            assert [lock['bet_label'] for lock in locks] == \
+                [lock.bet_label for lock in EdgeDerivedLocks.under_locks(*args)]
+            json.dumps(locks)
+            seen += len(locks)
+    assert seen
+
+
+# ============================================================================
+# MATCH ANALYSIS CACHE
+# ============================================================================
+
+def test_match_analysis_cache_is_a_bounded_lru():
+    cache = MatchAnalysisCache(maxsize=2)
+    version = ('v1', 'engine')
+    cache.put(('L', 'A', 'B', *version), {'n': 1})
+    cache.put(('L', 'A', 'C', *version), {'n': 2})
+    assert cache.get(('L', 'A', 'B', *version)) == {'n': 1}
+    cache.put(('L', 'B', 'C', *version), {'n': 3})
+
+    # A-C was least recently used
+    assert cache.get(('L', 'A', 'C', *version)) is None
+    assert cache.get(('L', 'A', 'B', *version)) == {'n': 1}
+    assert cache.get_stats() == {'size': 2, 'maxsize': 2, 'hits': 2, 'misses': 1, 'evictions': 1,
+                                 'hit_rate': 2 / 3}
+
+
+def test_match_analysis_cache_drops_old_versions_per_league():
+    cache = MatchAnalysisCache()
+    cache.put(('L', 'A', 'B', 'v1', 'e'), {'n': 1})
+    cache.put(('M', 'A', 'B', 'v1', 'e'), {'n': 2})
+    assert cache.get(('L', 'A', 'B', 'v2', 'e')) is None
+    assert cache.get(('L', 'A', 'B', 'v1', 'e')) is None
+    assert cache.get(('M', 'A', 'B', 'v1', 'e')) == {'n': 2}
+
+    cache.invalidate('M')
+    assert cache.get_stats()['size'] == 0
+
+
+def test_memoized_analysis_matches_uncached(leagues_dir):
+    cache = MatchAnalysisCache()
+    cached = BrutballCertaintyEngine('bundesliga', analysis_cache=cache)
+    uncached = BrutballCertaintyEngine('bundesliga', analysis_cache=None)
+    teams = cached.get_available_teams()[:5]
+    pairs = [(home, away) for home in teams for away in teams if home != away]
+
+    for bankroll, stake_pct in ((1000, 0.5), (250, 2.0)):
+        for home, away in pairs:
+            assert cached.analyze_match(home, away, bankroll, stake_pct) == \
+                uncached.analyze_match(home, away, bankroll, stake_pct)
+    stats = cache.get_stats()
+    assert (stats['misses'], stats['hits'], stats['size']) == (len(pairs), len(pairs), len(pairs))
+
+    # A rewritten league gets a new data version and is analysed afresh
+    csv_path = os.path.join(leagues_dir, 'bundesliga.csv')
+    df = pd.read_csv(csv_path)
+    df['goals_scored_last_5'] = 0
+    df.to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(0, 1))
+    home, away = pairs[0]
+    fresh = BrutballCertaintyEngine('bundesliga', analysis_cache=cache).analyze_match(home, away)
+    assert fresh == BrutballCertaintyEngine('bundesliga', analysis_cache=None).analyze_match(home, away)
+    assert fresh['home_data']['goals_scored_last_5'] == 0
+    assert cache.get_stats()['size'] == 1
+
+
+# ============================================================================
+# IMPORT BUDGET
+# ============================================================================
+
+COLD_IMPORT_BUDGET_MS = 100
+HEAVY_MODULES = ('streamlit', 'pandas', 'pyarrow', 'plotly', 'sklearn', 'scipy', 'umap')
+
+
+def measure_cold_import(module: str, runs: int = 5) -> dict:
+    """Best-of-`runs` import time of `module` in fresh interpreters, plus the heavy modules it loaded"""
+    code = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - started\n"
+        f"print(json.dumps([elapsed, sorted(name for name in {HEAVY_MODULES!r} if name in sys.modules)]))\n"
+    )
+    timings, heavy = [], []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        elapsed, heavy = json.loads(output.stdout)
+        timings.append(elapsed * 1000)
+    return {'import_ms': min(timings), 'heavy_modules': heavy}
+
+
+@pytest.mark.parametrize('module', ['brutball_core', 'league_scanner', 'slate_scanner'])
+def test_cold_import_loads_no_heavy_modules(module):
+    assert measure_cold_import(module, runs=1)['heavy_modules'] == []
+
+
+def test_cold_import_is_within_budget():
+    assert measure_cold_import('brutball_core')['import_ms'] <= COLD_IMPORT_BUDGET_MS
+
+
+def test_lazy_module_imports_on_first_use():
+    code = (
+        "import sys\n"
+        "from brutball_core import LazyModule\n"
+        "csv = LazyModule('csv')\n"
+        "assert 'csv' not in sys.modules\n"
+        "assert csv.QUOTE_ALL == 1 and 'csv' in sys.modules\n"
+    )
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+    assert LazyModule('math').sqrt(4.0) == 2.0
@@ -0,0 +1,77 @@
+import operator
+
+import numpy as np
+import pytest
+
+from brutball_rules import DEFAULT_RULES, RULE_DEFINITIONS, RULE_PARAMETERS, RuleSet
+
+OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+             '==': operator.eq, '!=': operator.ne}
+
+
+def interpret(rules: RuleSet, name: str, features: dict) -> bool:
+    """Clause-by-clause reading of a rule for one match"""
+    return all(
+        OPERATORS[op](features[feature], eval(expression, {}, dict(rules.parameters)))
+        for feature, op, expression in rules.definitions[name]
+    )
+
+
+def random_features(rules: RuleSet, n: int, seed: int = 3) -> dict:
+    rng = np.random.default_rng(seed)
+    features = {}
+    for feature in rules.get_features(rules.definitions):
+        values = rng.choice([0.0, 0.9, 1.0, 1.2, 1.4, 1.5, 1.6, 2.0, 2.8, 4.0], n) + rng.choice([0.0, 0.05], n)
+        values[rng.random(n) < 0.05] = np.nan
+        features[feature] = values
+    return features
+
+
+# ============================================================================
+# COMPILED RULES
+# ============================================================================
+
+@pytest.mark.parametrize('rules', [DEFAULT_RULES, DEFAULT_RULES.with_parameters(tempo_xg=1.0, elite_defense_gap=0.5)])
+def test_compiled_rules_match_clause_interpretation(rules):
+    features = random_features(rules, 2000)
+    arrays = rules.evaluate(features)
+    assert list(arrays) == list(RULE_DEFINITIONS)
+
+    for i in range(2000):
+        row = {feature: float(values[i]) for feature, values in features.items()}
+        scalars = rules.evaluate(row)
+        for name in RULE_DEFINITIONS:
+            expected = interpret(rules, name, row)
+            assert bool(arrays[name][i]) == expected, (name, row)
+            assert bool(scalars[name]) == expected, (name, row)
+
+
+def test_compile_selects_and_memoizes_rule_groups():
+    evaluate = DEFAULT_RULES.compile(['attack_clear', 'attack_unclear'])
+    assert DEFAULT_RULES.compile(('attack_clear', 'attack_unclear')) is evaluate
+    assert evaluate({'avg_scored_last_5': 1.1}) == {'attack_clear': False, 'attack_unclear': True}
+    assert DEFAULT_RULES.get_features(['control_efficiency', 'control_tempo']) == \
+        ('total_xg', 'finishing_ratio', 'avg_xg_per_match')
+
+
+# ============================================================================
+# PARAMETERS
+# ============================================================================
+
+def test_with_parameters_returns_an_independent_rule_set():
+    strict = DEFAULT_RULES.with_parameters(attack_clear=0.5)
+    assert strict.thresholds['attack_clear'] == (0.5,)
+    assert DEFAULT_RULES.thresholds['attack_clear'] == (RULE_PARAMETERS['attack_clear'],)
+    assert RULE_PARAMETERS['attack_clear'] == 1.0
+    assert strict.evaluate({'avg_scored_last_5': 0.8}, ['attack_clear']) == {'attack_clear': False}
+
+    # Derived thresholds follow their parameters
+    separated = DEFAULT_RULES.with_parameters(quiet_control_separation=0.5)
+    assert separated.thresholds['control_separated'] == (0.5 + RULE_PARAMETERS['control_epsilon'],)
+
+
+def test_invalid_rules_and_parameters_raise():
+    with pytest.raises(ValueError, match='Unknown rule parameters'):
+        DEFAULT_RULES.with_parameters(no_such_threshold=1)
+    with pytest.raises(ValueError, match='unsupported operator'):
+        RuleSet({'bad': (('x', '=>', '1'),)})
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from brutball_core import BrutballCertaintyEngine, Market, TeamStats
+from certainty_service import CertaintyService, ServiceError, encode_json, frame_records, serve
+from league_scanner import scan_leagues
+
+
+def strict_loads(body: bytes):
+    def reject(constant):
+        raise AssertionError(f"non-standard JSON constant {constant}")
+    return json.loads(body, parse_constant=reject)
+
+
+@pytest.fixture
+def service(leagues_dir):
+    service = CertaintyService(leagues_dir, workers=2, poll_interval=None)
+    yield service
+    service.close()
+
+
+def call(service: CertaintyService, method: str, path: str, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    status, response = asyncio.run(service.handle(method, path, body))
+    return status, strict_loads(response)
+
+
+# ============================================================================
+# JSON ENCODING
+# ============================================================================
+
+def test_encode_json_maps_non_finite_numbers_to_null():
+    payload = {'a': float('nan'), 'b': [1.5, float('inf'), (np.float64('nan'), -np.inf)],
+               'c': np.array([1.0, np.nan]), 'd': {'e': np.float32(2.5), 'f': np.int64(3)}}
+    assert strict_loads(encode_json(payload)) == \
+        {'a': None, 'b': [1.5, None, [None, None]], 'c': [1.0, None], 'd': {'e': 2.5, 'f': 3}}
+    # The input is not modified
+    assert math.isnan(payload['a'])
+
+
+def test_encode_json_matches_json_dumps_for_finite_payloads():
+    payload = {'team': 'Inter', 'values': [1, 2.5, None, True], 'nested': {'é': 'ü'}}
+    assert encode_json(payload) == json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    stats = TeamStats({'team': 'A', 'home_goals_scored': 2})
+    assert strict_loads(encode_json({'stats': stats, 'market': Market.TEAM_UNDER})) == \
+        {'stats': stats.to_dict(), 'market': 'TEAM UNDER'}
+    with pytest.raises(TypeError):
+        encode_json({'bad': object()})
+
+
+def test_frame_records_use_null_for_missing_values():
+    df = pd.DataFrame({'x': [1.0, np.nan], 'y': ['a', None]})
+    assert frame_records(df) == [{'x': 1.0, 'y': 'a'}, {'x': None, 'y': None}]
+
+
+# ============================================================================
+# ENDPOINTS
+# ============================================================================
+
+def test_analyze_and_slate_match_the_engine(service):
+    engine = BrutballCertaintyEngine('serie_a', analysis_cache=None)
+    home, away, third = engine.get_available_teams()[:3]
+
+    status, result = call(service, 'POST', '/analyze', {'league': 'serie_a', 'home_team': home,
+                                                        'away_team': away, 'bankroll': 500})
+    assert status == 200
+    assert result == {'league': 'serie_a', **json.loads(json.dumps(engine.analyze_match(home, away, 500)))}
+
+    status, result = call(service, 'POST', '/slate', {'league': 'serie_a', 'fixtures': [[home, away], [third, home]]})
+    expected = frame_records(engine.analyze_fixtures([(home, away), (third, home)]))
+    assert (status, result['fixtures']) == (200, 2)
+    assert result['recommendations'] == json.loads(encode_json(expected))
+
+
+def test_scan_matches_the_league_scanner(service, leagues_dir):
+    status, result = call(service, 'POST', '/scan', {'leagues': ['la_liga', 'serie_a'], 'top': 25})
+    expected = scan_leagues(['la_liga', 'serie_a'], workers=1, leagues_dir=leagues_dir)
+    assert status == 200
+    assert result['fixtures'] == expected['fixtures']
+    assert result['total'] == len(expected['recommendations'])
+    assert result['recommendations'] == json.loads(encode_json(frame_records(expected['recommendations'].head(25))))
+
+
+def test_leagues_health_and_stats(service):
+    status, leagues = call(service, 'GET', '/leagues')
+    engine = BrutballCertaintyEngine('ligue_1', analysis_cache=None)
+    assert status == 200
+    assert leagues['ligue_1']['teams'] == engine.get_available_teams()
+    assert call(service, 'GET', '/health') == (200, {'status': 'ok', 'leagues': len(leagues)})
+    assert set(call(service, 'GET', '/stats')[1]) == {'latency', 'coalescing', 'analysis_cache'}
+
+
+@pytest.mark.parametrize('method, path, payload, status', [
+    ('POST', '/analyze', {'league': 'nowhere'}, 404),
+    ('POST', '/analyze', {'league': 'serie_a', 'home_team': 'Nowhere FC', 'away_team': 'Inter'}, 404),
+    ('POST', '/analyze', {'league': 'serie_a', 'home_team': 'Inter', 'away_team': 'Inter'}, 400),
+    ('POST', '/analyze', {'league': 'serie_a', 'home_team': 'Inter', 'away_team': 'Como', 'bankroll': 'x'}, 400),
+    ('POST', '/analyze', {'league': 'serie_a', 'home_team': 'Inter', 'away_team': 'Como', 'bankroll': 0}, 400),
+    ('POST', '/slate', {'league': 'serie_a', 'fixtures': [], 'bankroll': -100}, 400),
+    ('POST', '/scan', {'base_stake_pct': -1}, 400),
+    ('POST', '/slate', {'league': 'serie_a', 'fixtures': [['Inter']]}, 400),
+    ('POST', '/scan', {'top': -1}, 400),
+    ('POST', '/scan', {'leagues': ['nowhere']}, 404),
+    ('GET', '/analyze', None, 405),
+    ('GET', '/nowhere', None, 404),
+])
+def test_bad_requests_raise_service_errors(service, method, path, payload, status):
+    with pytest.raises(ServiceError) as error:
+        call(service, method, path, payload)
+    assert error.value.status == status
+
+
+# ============================================================================
+# COALESCING AND HTTP
+# ============================================================================
+
+def test_concurrent_identical_requests_share_one_computation(service):
+    async def run():
+        body = json.dumps({'leagues': ['bundesliga']}).encode()
+        return await asyncio.gather(*(service.handle('POST', '/scan', body) for _ in range(10)))
+
+    responses = asyncio.run(run())
+    assert len({body for _, body in responses}) == 1
+    assert (service.coalescer.started, service.coalescer.coalesced) == (1, 9)
+
+
+def test_http_keep_alive_round_trips(service):
+    async def request(reader, writer, method, path, body=b''):
+        writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        head = (await reader.readuntil(b'\r\n\r\n')).decode().split('\r\n')
+        headers = dict(line.split(': ', 1) for line in head[1:] if ': ' in line)
+        return int(head[0].split()[1]), headers, strict_loads(await reader.readexactly(int(headers['Content-Length'])))
+
+    async def run():
+        server = await serve(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            status, headers, body = await request(reader, writer, 'GET', '/health')
+            assert status == 200 and body['status'] == 'ok'
+            assert float(headers['X-Latency-Ms']) >= 0 and headers['Connection'] == 'keep-alive'
+            status, _, body = await request(reader, writer, 'POST', '/analyze', b'{bad')
+            assert status == 400 and body['error'].startswith('Invalid JSON')
+            status, _, body = await request(reader, writer, 'GET', '/stats')
+            assert body['latency']['/analyze']['errors'] == 1
+        finally:
+            writer.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_malformed_bodies_do_not_kill_the_connection_task(service):
+    async def run():
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        server = await serve(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b"POST /analyze HTTP/1.1\r\nContent-Length: -5\r\n\r\n")
+            head = (await reader.readuntil(b'\r\n\r\n')).decode()
+            assert head.startswith('HTTP/1.1 400') and 'Connection: close' in head
+            writer.close()
+
+            # Truncated body: the client hangs up before sending all it announced
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b"POST /analyze HTTP/1.1\r\nContent-Length: 100\r\n\r\n{\"league\"")
+            writer.write_eof()
+            assert await reader.read() == b''
+            writer.close()
+
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b"GET /health HTTP/1.1\r\nContent-Length: 0\r\n\r\n")
+            assert (await reader.readuntil(b'\r\n\r\n')).startswith(b'HTTP/1.1 200')
+            writer.close()
+        finally:
+            server.close()
+            await server.wait_closed()
+        await asyncio.sleep(0)
+        assert errors == []
+
+    asyncio.run(run())
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from brutball_core import BrutballDataLoader
+from conftest import SOURCE_LEAGUES_DIR
+from form_updater import FORM_WINDOW, GOAL_TYPES, LeagueFormUpdater, RollingWindow
+
+WINDOW_COLUMNS = ('goals_scored_last_5', 'goals_conceded_last_5',
+                  'home_goals_conceded_last_5', 'away_goals_conceded_last_5')
+FORM_COLUMNS = ('form_last_5_overall', 'form_last_5_home', 'form_last_5_away')
+
+
+def empty_window_table() -> pd.DataFrame:
+    """serie_a with cumulative totals kept and every last-5 window zeroed (no form strings)"""
+    df = pd.read_csv(f"{SOURCE_LEAGUES_DIR}/serie_a.csv")
+    for col in WINDOW_COLUMNS:
+        df[col] = 0
+    for col in FORM_COLUMNS:
+        df[col] = ''
+    return df
+
+
+def random_results(teams, n: int, seed: int = 5) -> list:
+    rng = np.random.default_rng(seed)
+    results = []
+    for i in range(n):
+        home, away = rng.choice(len(teams), 2, replace=False)
+        home_goals, away_goals = int(rng.poisson(1.4)), int(rng.poisson(1.1))
+        result = {'home_team': teams[home], 'away_team': teams[away], 'home_goals': home_goals,
+                  'away_goals': away_goals, 'home_xg': round(float(rng.uniform(0, 3)), 2),
+                  'away_xg': rng.choice([round(float(rng.uniform(0, 3)), 2), np.nan, None])}
+        if i % 3 == 0:
+            result['home_goal_types'] = {rng.choice(GOAL_TYPES): home_goals} if home_goals else {}
+        results.append(result)
+    return results
+
+
+def recompute(seed: pd.DataFrame, results: list) -> pd.DataFrame:
+    """Table rebuilt from scratch: seed totals plus every result, windows over the full match lists"""
+    df = seed.copy()
+    position = {team: i for i, team in enumerate(df['team'])}
+    matches = {team: {'all': [], 'home': [], 'away': []} for team in df['team']}
+    for result in results:
+        home, away = position[result['home_team']], position[result['away_team']]
+        hg, ag = result['home_goals'], result['away_goals']
+        hx = 0.0 if pd.isna(result.get('home_xg')) else result['home_xg']
+        ax = 0.0 if pd.isna(result.get('away_xg')) else result['away_xg']
+        for venue, team, scored, conceded, xg_for, xg_against in (
+                ('home', home, hg, ag, hx, ax), ('away', away, ag, hg, ax, hx)):
+            df.loc[team, f'{venue}_matches_played'] += 1
+            df.loc[team, f'{venue}_goals_scored'] += scored
+            df.loc[team, f'{venue}_goals_conceded'] += conceded
+            df.loc[team, f'{venue}_xg_for'] += xg_for
+            df.loc[team, f'{venue}_xg_against'] += xg_against
+            outcome = 'W' if scored > conceded else 'D' if scored == conceded else 'L'
+            for view in ('all', venue):
+                matches[df.loc[team, 'team']][view].append((scored, conceded, outcome))
+        for goal_type, count in (result.get('home_goal_types') or {}).items():
+            df.loc[home, f'home_goals_{goal_type}_for'] += count
+            df.loc[away, f'away_goals_{goal_type}_against'] += count
+
+    def last(entries, i):
+        return [entry[i] for entry in entries[-FORM_WINDOW:]]
+
+    for i, team in enumerate(df['team']):
+        history = matches[team]
+        # The seed counts as a window of zero-goal, unlabelled matches
+        padded = {view: [(0, 0, '')] * FORM_WINDOW + entries for view, entries in history.items()}
+        df.loc[i, 'goals_scored_last_5'] = sum(last(padded['all'], 0))
+        df.loc[i, 'goals_conceded_last_5'] = sum(last(padded['all'], 1))
+        df.loc[i, 'home_goals_conceded_last_5'] = sum(last(padded['home'], 1))
+        df.loc[i, 'away_goals_conceded_last_5'] = sum(last(padded['away'], 1))
+        df.loc[i, 'form_last_5_overall'] = ''.join(last(padded['all'], 2))
+        df.loc[i, 'form_last_5_home'] = ''.join(last(padded['home'], 2))
+        df.loc[i, 'form_last_5_away'] = ''.join(last(padded['away'], 2))
+    return df
+
+
+# ============================================================================
+# STREAMING TABLE
+# ============================================================================
+
+def test_streamed_table_matches_recomputation():
+    seed = empty_window_table()
+    updater = LeagueFormUpdater('serie_a', seed)
+    results = random_results(seed['team'].tolist(), 300)
+
+    for checkpoint in (1, 40, 300):
+        already = updater.version
+        updater.ingest_many(results[already:checkpoint])
+        expected = recompute(seed, results[:checkpoint])
+        pd.testing.assert_frame_equal(updater.get_frame(), expected, check_dtype=False)
+    assert updater.version == 300
+
+
+def test_missing_xg_counts_as_zero():
+    seed = empty_window_table()
+    updater = LeagueFormUpdater('serie_a', seed)
+    home, away = seed['team'][:2]
+    updater.ingest({'home_team': home, 'away_team': away, 'home_goals': 1, 'away_goals': 0,
+                    'home_xg': float('nan'), 'away_xg': None})
+    frame = updater.get_frame()
+    assert frame.loc[0, 'home_xg_for'] == seed.loc[0, 'home_xg_for']
+    assert frame.loc[1, 'away_xg_against'] == seed.loc[1, 'away_xg_against']
+    assert not frame[['home_xg_for', 'away_xg_for', 'home_xg_against', 'away_xg_against']].isna().any().any()
+
+
+def test_resent_score_replaces_the_latest_result():
+    seed = empty_window_table()
+    teams = seed['team'].tolist()
+    live = LeagueFormUpdater('serie_a', seed)
+    final = LeagueFormUpdater('serie_a', seed)
+
+    fixture = {'home_team': teams[0], 'away_team': teams[1], 'match_id': 'm1', 'home_xg': 0.4, 'away_xg': 0.2}
+    for home_goals, away_goals in ((0, 0), (1, 0), (1, 1)):
+        live.ingest(dict(fixture, home_goals=home_goals, away_goals=away_goals))
+    final.ingest(dict(fixture, home_goals=1, away_goals=1))
+    pd.testing.assert_frame_equal(live.get_frame(), final.get_frame())
+
+    live.ingest({'home_team': teams[0], 'away_team': teams[2], 'home_goals': 2, 'away_goals': 0, 'match_id': 'm2'})
+    with pytest.raises(ValueError, match='no longer the latest'):
+        live.ingest(dict(fixture, home_goals=2, away_goals=1))
+    with pytest.raises(ValueError, match='Team not found'):
+        live.ingest({'home_team': 'Nowhere FC', 'away_team': teams[0], 'home_goals': 0, 'away_goals': 0})
+
+
+# ============================================================================
+# ENGINES AND VERSIONS
+# ============================================================================
+
+def test_engine_is_unmemoized_and_versions_are_per_stream(leagues_dir):
+    first = LeagueFormUpdater.from_league('serie_a')
+    second = LeagueFormUpdater.from_league('serie_a')
+    assert first.get_data_version() != second.get_data_version()
+
+    teams = first.teams
+    first.ingest({'home_team': teams[0], 'away_team': teams[1], 'home_goals': 3, 'away_goals': 0})
+    engine = first.get_engine()
+    assert engine.analysis_cache is None
+    assert engine.data_version == first.get_data_version() == ('stream', first.stream_id, 1)
+    result = engine.analyze_match(teams[0], teams[1])
+    assert result['home_data']['home_goals_scored'] == \
+        BrutballDataLoader.load_league_data('serie_a').loc[0, 'home_goals_scored'] + 3
+
+
+# ============================================================================
+# RING BUFFER
+# ============================================================================
+
+def test_rolling_window_seed_and_eviction():
+    window = RollingWindow(2, ('goals',), size=3)
+    window.seed(0, (7.0,), 'WDL')
+    window.seed(1, (float('nan'),), '')
+    assert window.values[0, :, 0].tolist() == [3.0, 2.0, 2.0]
+    assert window.get_sums(0)[0] == 7 and np.isnan(window.get_sums(0)[1])
+
+    window.push(0, (1.0,), 'W')
+    window.push(1, (2.0,), 'L')
+    assert window.form(0) == 'DLW' and window.form(1) == 'L'
+    assert window.get_sums(0).tolist() == [5, 2]
+    window.replace_latest(1, (0.0,), 'D')
+    assert window.form(1) == 'D' and window.get_sums(0).tolist() == [5, 0]
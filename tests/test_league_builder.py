@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from brutball_core import BrutballDataLoader
+from form_updater import LeagueFormUpdater
+from league_builder import LEAGUE_TABLE_COLUMNS, build_league_tables, write_league_tables
+from match_history import MatchHistory
+
+
+def random_results(seed: int = 21) -> pd.DataFrame:
+    """Two leagues of 6 teams, one match per team per date, some unplayed, shuffled rows"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for league_name in ('alpha', 'beta'):
+        teams = [f'{league_name}-{i}' for i in range(6)]
+        for day in pd.date_range('2024-08-01', periods=20, freq='7D'):
+            order = rng.permutation(len(teams))
+            for i in range(0, len(order), 2):
+                played = rng.random() > 0.05
+                home_goals = int(rng.poisson(1.5))
+                rows.append({'league': league_name, 'date': day.strftime('%Y-%m-%d'),
+                             'home_team': teams[order[i]], 'away_team': teams[order[i + 1]],
+                             'home_goals': home_goals if played else None,
+                             'away_goals': int(rng.poisson(1.1)) if played else None,
+                             'home_xg': round(float(rng.uniform(0, 3)), 2),
+                             'away_xg': round(float(rng.uniform(0, 3)), 2) if rng.random() > 0.1 else None,
+                             'home_goals_penalty': int(home_goals > 0 and rng.random() < 0.3)})
+    return pd.DataFrame(rows).sample(frac=1, random_state=3).reset_index(drop=True)
+
+
+# ============================================================================
+# CHUNKING
+# ============================================================================
+
+def test_tables_do_not_depend_on_chunking_or_row_order():
+    results = random_results()
+    reversed_chunks = [results.iloc[::-1].iloc[i:i + 50] for i in range(0, len(results), 50)]
+    expected = build_league_tables(results, chunksize=len(results))
+    assert sorted(expected) == ['alpha', 'beta']
+
+    for tables in (build_league_tables(results, chunksize=7),
+                   build_league_tables(results.sort_values('date'), chunksize=3),
+                   build_league_tables(iter(reversed_chunks))):
+        for league_name, table in expected.items():
+            pd.testing.assert_frame_equal(tables[league_name], table)
+            assert list(table.columns) == LEAGUE_TABLE_COLUMNS
+
+
+# ============================================================================
+# AGREEMENT
+# ============================================================================
+
+def test_tables_match_match_history_and_totals():
+    results = random_results()
+    played = results.dropna(subset=['home_goals', 'away_goals'])
+    tables = build_league_tables(results)
+
+    for league_name, table in tables.items():
+        league = played[played['league'] == league_name]
+        table = table.set_index('team').sort_index()
+        for venue, other in (('home', 'away'), ('away', 'home')):
+            grouped = league.groupby(f'{venue}_team')
+            assert (table[f'{venue}_matches_played'] == grouped.size()).all()
+            assert (table[f'{venue}_goals_scored'] == grouped[f'{venue}_goals'].sum()).all()
+            assert (table[f'{venue}_goals_conceded'] == grouped[f'{other}_goals'].sum()).all()
+            assert np.allclose(table[f'{venue}_xg_against'], grouped[f'{other}_xg'].sum().round(2))
+        assert (table['home_goals_penalty_for'] == league.groupby('home_team')['home_goals_penalty'].sum()).all()
+
+        windows = MatchHistory(league).last_n_frame(5).set_index('team').sort_index()
+        for column in ('goals_scored_last_5', 'goals_conceded_last_5', 'home_goals_conceded_last_5',
+                       'away_goals_conceded_last_5', 'form_last_5_overall', 'form_last_5_home',
+                       'form_last_5_away'):
+            assert (table[column] == windows[column]).all(), column
+
+
+def test_tables_match_streamed_form_updater():
+    results = random_results()
+    tables = build_league_tables(results)
+    played = results.dropna(subset=['home_goals', 'away_goals']).sort_values('date', kind='mergesort')
+
+    table = tables['alpha']
+    seed = table.copy()
+    for column in seed.columns[2:]:
+        seed[column] = '' if column.startswith('form_') else 0
+    updater = LeagueFormUpdater('alpha', seed)
+    updater.ingest_many([
+        dict(row, home_goal_types={'penalty': row['home_goals_penalty']})
+        for row in played[played['league'] == 'alpha'].to_dict('records')
+    ])
+    streamed = updater.get_frame()
+
+    for column in LEAGUE_TABLE_COLUMNS[2:]:
+        if column == 'defenders_out':
+            continue
+        assert np.allclose(streamed[column], table[column]) if 'xg' in column else \
+            (streamed[column] == table[column]).all(), column
+
+
+# ============================================================================
+# OPTIONS AND OUTPUT
+# ============================================================================
+
+def test_date_range_and_default_league():
+    results = random_results().drop(columns='league')
+    tables = build_league_tables(results, league_name='cup', since='2024-09-01', until='2024-10-01')
+    kept = results.dropna(subset=['home_goals']).query("'2024-09-01' <= date < '2024-10-01'")
+    assert list(tables) == ['cup']
+    table = tables['cup']
+    assert table['home_matches_played'].sum() == len(kept)
+    assert table['season_position'].tolist() == list(range(1, len(table) + 1))
+    with pytest.raises(ValueError, match='Missing required columns'):
+        build_league_tables(results.drop(columns='date'))
+
+
+def test_written_tables_load_as_leagues(tmp_path):
+    tables = build_league_tables(random_results())
+    paths = write_league_tables(tables, str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == ['alpha.csv', 'beta.csv']
+    for path, (league_name, table) in zip(paths, tables.items()):
+        loaded = BrutballDataLoader.load_csv(path, use_cache=False)
+        pd.testing.assert_frame_equal(loaded[BrutballDataLoader.REQUIRED_COLUMNS],
+                                      table[BrutballDataLoader.REQUIRED_COLUMNS], check_dtype=False)
@@ -0,0 +1,109 @@
+import os
+
+import pandas as pd
+
+from brutball_core import BrutballDataLoader
+from conftest import LEAGUE_NAMES
+from league_catalog import LeagueCatalog
+
+
+def bump_mtime(path: str) -> None:
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_catalog_lists_bundled_leagues_with_metadata(leagues_dir):
+    catalog = LeagueCatalog(leagues_dir)
+    assert catalog.get_leagues() == LEAGUE_NAMES
+    assert catalog.get_invalid() == {} and catalog.get_warnings() == {}
+
+    for league_name in LEAGUE_NAMES:
+        info = catalog.get_info(league_name)
+        df = BrutballDataLoader.load_league_data(league_name)
+        assert info.is_valid and info.error is None
+        assert (info.rows, info.teams) == (len(df), df['team'].nunique())
+        assert info.data_version == BrutballDataLoader.get_data_version(league_name)
+    assert catalog.get_info('nowhere') is None
+
+
+def test_unchanged_files_are_not_revalidated(leagues_dir):
+    catalog = LeagueCatalog(leagues_dir)
+    assert catalog.refresh()
+    entries = catalog.get_entries()
+    assert not catalog.refresh()
+    assert catalog.get_entries() is entries
+    assert catalog.refresh(force=True)
+    forced = catalog.get_entries()
+    assert forced.keys() == entries.keys()
+    assert all(forced[name] is not info for name, info in entries.items())
+
+
+def test_added_and_removed_files_are_picked_up(leagues_dir):
+    catalog = LeagueCatalog(leagues_dir)
+    catalog.get_leagues()
+
+    df = pd.read_csv(os.path.join(leagues_dir, 'serie_a.csv'))
+    df.to_csv(os.path.join(leagues_dir, 'serie_b.csv'), index=False)
+    os.remove(os.path.join(leagues_dir, 'la_liga.csv'))
+    bump_mtime(leagues_dir)
+
+    assert catalog.get_leagues() == sorted({*LEAGUE_NAMES, 'serie_b'} - {'la_liga'})
+    assert catalog.get_info('serie_b').teams == len(df)
+    assert catalog.get_info('la_liga') is None
+
+
+def test_duplicate_team_rows_warn_but_stay_valid(leagues_dir):
+    csv_path = os.path.join(leagues_dir, 'ligue_1.csv')
+    df = pd.read_csv(csv_path)
+    pd.concat([df, df.iloc[[0]]], ignore_index=True).to_csv(csv_path, index=False)
+
+    catalog = LeagueCatalog(leagues_dir)
+    assert 'ligue_1' in catalog.get_leagues()
+    assert 'Duplicate team rows' in catalog.get_warnings()['ligue_1']
+    info = catalog.get_info('ligue_1')
+    assert (info.rows, info.teams) == (len(df) + 1, len(df))
+
+
+def test_empty_and_malformed_files_are_invalid(leagues_dir):
+    columns = pd.read_csv(os.path.join(leagues_dir, 'serie_a.csv')).columns
+    pd.DataFrame(columns=columns).to_csv(os.path.join(leagues_dir, 'empty.csv'), index=False)
+    pd.read_csv(os.path.join(leagues_dir, 'serie_a.csv')).drop(columns='home_xg_for').to_csv(
+        os.path.join(leagues_dir, 'broken.csv'), index=False)
+
+    catalog = LeagueCatalog(leagues_dir)
+    invalid = catalog.get_invalid()
+    assert sorted(invalid) == ['broken', 'empty']
+    assert invalid['empty'] == "No teams in file"
+    assert 'home_xg_for' in invalid['broken']
+    assert catalog.get_leagues() == LEAGUE_NAMES
+    assert catalog.get_leagues(valid_only=False) == sorted([*LEAGUE_NAMES, 'broken', 'empty'])
+
+
+def test_changes_within_one_directory_mtime_are_picked_up(leagues_dir):
+    catalog = LeagueCatalog(leagues_dir)
+    before = catalog.get_info('serie_a')
+    others = {name: catalog.get_info(name) for name in LEAGUE_NAMES if name != 'serie_a'}
+    dir_stat = os.stat(leagues_dir)
+
+    # An in-place edit and an added file, with the directory mtime left as it was
+    csv_path = os.path.join(leagues_dir, 'serie_a.csv')
+    df = pd.read_csv(csv_path)
+    df.iloc[:-2].to_csv(csv_path, index=False)
+    bump_mtime(csv_path)
+    df.to_csv(os.path.join(leagues_dir, 'serie_b.csv'), index=False)
+    os.utime(leagues_dir, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+
+    assert catalog.refresh()
+    info = catalog.get_info('serie_a')
+    assert info is not before
+    assert info.teams == len(df) - 2
+    assert info.data_version == BrutballDataLoader.get_data_version('serie_a')
+    assert catalog.get_info('serie_b').teams == len(df)
+    assert all(catalog.get_info(name) is info for name, info in others.items())
+
+
+def test_missing_directory_is_created(tmp_path):
+    catalog = LeagueCatalog(str(tmp_path / 'leagues'))
+    assert catalog.get_leagues() == []
+    assert catalog.created_dir
+    assert os.path.isdir(tmp_path / 'leagues')
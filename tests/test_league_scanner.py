@@ -0,0 +1,126 @@
+import os
+
+import pandas as pd
+import pytest
+
+import league_scanner
+from brutball_core import BrutballCertaintyEngine, BrutballDataLoader
+from conftest import SOURCE_LEAGUES_DIR
+from league_scanner import count_rows, plan_shards, scan_leagues
+
+LEAGUES = ['bundesliga', 'serie_a']
+
+
+@pytest.fixture
+def worker_engines(monkeypatch):
+    engines = {}
+    monkeypatch.setattr(league_scanner, '_WORKER_ENGINES', engines)
+    return engines
+
+
+# ============================================================================
+# SCAN
+# ============================================================================
+
+def test_scan_is_independent_of_sharding_and_workers(leagues_dir, worker_engines):
+    reference = scan_leagues(LEAGUES, workers=1, leagues_dir=leagues_dir)
+    team_counts = [len(BrutballDataLoader.load_league_data(league)) for league in LEAGUES]
+    assert reference['leagues'] == LEAGUES and reference['errors'] == {}
+    assert reference['fixtures'] == sum(n * (n - 1) for n in team_counts)
+
+    for workers, block_size in ((1, 3), (1, 1000), (2, None), (2, 4)):
+        result = scan_leagues(LEAGUES, workers=workers, block_size=block_size, leagues_dir=leagues_dir)
+        assert result['fixtures'] == reference['fixtures']
+        pd.testing.assert_frame_equal(result['recommendations'], reference['recommendations'])
+
+
+def test_scan_matches_per_league_analyze_fixtures(leagues_dir, worker_engines):
+    result = scan_leagues(['la_liga'], workers=1, block_size=5, leagues_dir=leagues_dir)
+    engine = BrutballCertaintyEngine('la_liga')
+    teams = engine.get_available_teams()
+    expected = engine.analyze_fixtures([(h, a) for h in teams for a in teams if h != a])
+
+    ranked = result['recommendations']
+    assert list(ranked['rank']) == list(range(1, len(expected) + 1))
+    key = ['home_team', 'away_team', 'certainty_bet']
+    actual = ranked.drop(columns='rank').sort_values(key).reset_index(drop=True)
+    expected = expected.drop(columns='fixture_id').sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_failed_league_is_reported_not_fatal(leagues_dir, worker_engines):
+    csv_path = os.path.join(leagues_dir, 'serie_a.csv')
+    pd.read_csv(csv_path).drop(columns='home_xg_for').to_csv(csv_path, index=False)
+
+    result = scan_leagues(['bundesliga', 'serie_a', 'missing'], workers=1, block_size=4, leagues_dir=leagues_dir)
+    assert result['leagues'] == ['bundesliga']
+    assert set(result['errors']) == {'serie_a', 'missing'}
+    assert set(result['recommendations']['league']) == {'bundesliga'}
+
+
+# ============================================================================
+# WORKER ENGINES
+# ============================================================================
+
+def test_worker_keeps_one_engine_per_file_and_replaces_it_on_rewrite(leagues_dir, worker_engines):
+    csv_path = os.path.join(leagues_dir, 'serie_a.csv')
+    engine = league_scanner._load_engine('serie_a', csv_path)
+    assert league_scanner._load_engine('serie_a', csv_path) is engine
+
+    df = pd.read_csv(csv_path)
+    df.loc[0, 'home_goals_scored'] += 1
+    df.to_csv(csv_path, index=False)
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    reloaded = league_scanner._load_engine('serie_a', csv_path)
+    assert reloaded is not engine
+    assert reloaded.df.loc[0, 'home_goals_scored'] == df.loc[0, 'home_goals_scored']
+    assert worker_engines == {csv_path: reloaded}
+
+
+def test_in_process_scan_does_not_keep_engines(leagues_dir, worker_engines, monkeypatch):
+    loaded = []
+    load_csv = BrutballDataLoader.load_csv
+    monkeypatch.setattr(BrutballDataLoader, 'load_csv',
+                        staticmethod(lambda csv_path: loaded.append(csv_path) or load_csv(csv_path)))
+
+    worker_engines['stale.csv'] = None
+    result = scan_leagues(LEAGUES, workers=1, block_size=4, leagues_dir=leagues_dir)
+    # Every shard of a league reuses one load, and nothing outlives the scan
+    assert result['errors'] == {} and len(loaded) == len(LEAGUES)
+    assert worker_engines == {}
+
+
+# ============================================================================
+# SHARD PLANNING
+# ============================================================================
+
+def test_plan_shards_does_not_parse_csvs(leagues_dir, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('plan_shards parsed a CSV')
+    monkeypatch.setattr(BrutballDataLoader, 'load_csv', fail)
+    monkeypatch.setattr(pd, 'read_csv', fail)
+
+    n_rows = count_rows(os.path.join(leagues_dir, 'serie_a.csv'))
+    shards, errors = plan_shards(['serie_a', 'missing'], leagues_dir, block_size=4)
+    assert set(errors) == {'missing'}
+    starts = list(range(0, n_rows, 4))
+    assert [(start, stop) for _, _, start, stop in shards] == \
+        [(start, start + 4) for start in starts[:-1]] + [(starts[-1], None)]
+
+    shards, _ = plan_shards(['serie_a'], leagues_dir)
+    assert [(start, stop) for _, _, start, stop in shards] == [(0, None)]
+
+
+def test_count_rows(tmp_path):
+    csv_path = tmp_path / 'league.csv'
+    csv_path.write_text('team,x\nA,1\nB,2')
+    assert count_rows(str(csv_path)) == 2
+    csv_path.write_text('team,x\nA,1\nB,2\n')
+    assert count_rows(str(csv_path)) == 2
+    csv_path.write_text('')
+    assert count_rows(str(csv_path)) == 0
+    for name in os.listdir(SOURCE_LEAGUES_DIR):
+        csv_path = os.path.join(SOURCE_LEAGUES_DIR, name)
+        assert count_rows(csv_path) == len(pd.read_csv(csv_path)), name
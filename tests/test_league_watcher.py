@@ -0,0 +1,79 @@
+import os
+
+import pandas as pd
+
+from league_watcher import LeagueWatcher, diff_league_frames
+
+
+def bump_mtime(csv_path: str) -> None:
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_first_poll_adds_every_league_then_nothing_changes(leagues_dir):
+    watcher = LeagueWatcher(leagues_dir)
+    reports = watcher.poll()
+    assert sorted(report['league'] for report in reports) == sorted(watcher.get_snapshots())
+    assert {report['status'] for report in reports} == {'added'}
+    assert watcher.poll() == []
+
+
+def test_touch_without_edit_is_not_a_change(leagues_dir):
+    watcher = LeagueWatcher(leagues_dir)
+    watcher.poll()
+    snapshot = watcher.get_snapshot('serie_a')
+    bump_mtime(os.path.join(leagues_dir, 'serie_a.csv'))
+    assert watcher.poll() == []
+    assert watcher.get_snapshot('serie_a') is snapshot
+
+
+def test_edit_reports_changed_teams_and_swaps_one_snapshot(leagues_dir):
+    watcher = LeagueWatcher(leagues_dir)
+    received = []
+    watcher.subscribe(received.append)
+    watcher.poll()
+    untouched = watcher.get_snapshot('la_liga')
+
+    csv_path = os.path.join(leagues_dir, 'serie_a.csv')
+    df = pd.read_csv(csv_path)
+    team = df.loc[2, 'team']
+    df.loc[2, 'goals_scored_last_5'] += 3
+    df.to_csv(csv_path, index=False)
+    bump_mtime(csv_path)
+
+    reports = watcher.poll()
+    assert reports == received[-1:]
+    assert reports[0]['status'] == 'modified'
+    assert reports[0]['changed_teams'] == [team]
+    assert reports[0]['added_teams'] == reports[0]['removed_teams'] == []
+    assert watcher.get_snapshot('la_liga') is untouched
+
+    engine = watcher.get_snapshot('serie_a').engine
+    home, away = team, df.loc[3, 'team']
+    assert engine.analyze_match(home, away)['home_data']['goals_scored_last_5'] == df.loc[2, 'goals_scored_last_5']
+
+
+def test_bad_file_keeps_last_good_snapshot_and_removal_is_reported(leagues_dir):
+    watcher = LeagueWatcher(leagues_dir)
+    watcher.poll()
+    snapshot = watcher.get_snapshot('serie_a')
+
+    csv_path = os.path.join(leagues_dir, 'serie_a.csv')
+    pd.read_csv(csv_path).drop(columns='home_xg_for').to_csv(csv_path, index=False)
+    bump_mtime(csv_path)
+    reports = watcher.poll()
+    assert [report['status'] for report in reports] == ['error']
+    assert watcher.get_snapshot('serie_a') is snapshot
+
+    os.remove(csv_path)
+    reports = watcher.poll()
+    assert reports[0]['status'] == 'removed'
+    assert reports[0]['removed_teams'] == snapshot.get_teams()
+    assert watcher.get_snapshot('serie_a') is None
+
+
+def test_diff_league_frames():
+    old = pd.DataFrame({'team': ['A', 'B', 'C'], 'x': [1.0, None, 3.0]})
+    new = pd.DataFrame({'team': ['A', 'B', 'D'], 'x': [2.0, None, 4.0]})
+    assert diff_league_frames(old, new) == {'added_teams': ['D'], 'removed_teams': ['C'], 'changed_teams': ['A']}
+    assert diff_league_frames(None, new)['added_teams'] == ['A', 'B', 'D']
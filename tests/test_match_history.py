@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from brutball_core import BrutballDataLoader
+from conftest import SOURCE_LEAGUES_DIR
+from match_history import METRICS, MatchHistory
+
+TEAMS = [f'T{i}' for i in range(8)]
+
+
+def random_results(rounds: int = 30, seed: int = 9) -> pd.DataFrame:
+    """Round-robin-style results: each team plays at most once per date; a few unplayed"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for day in pd.date_range('2024-08-01', periods=rounds, freq='4D'):
+        order = rng.permutation(len(TEAMS))
+        for i in range(0, len(order), 2):
+            played = rng.random() > 0.05
+            rows.append({'date': day, 'home_team': TEAMS[order[i]], 'away_team': TEAMS[order[i + 1]],
+                         'home_goals': rng.poisson(1.5) if played else np.nan,
+                         'away_goals': rng.poisson(1.1) if played else np.nan,
+                         'home_xg': rng.choice([round(rng.uniform(0, 3), 2), np.nan]),
+                         'away_xg': round(rng.uniform(0, 3), 2)})
+    return pd.DataFrame(rows).sample(frac=1, random_state=1).reset_index(drop=True)
+
+
+def naive_window(results: pd.DataFrame, team: str, window: int, venue: str, before=None) -> dict:
+    """Walk the team's matches in date order and sum the last `window`"""
+    rows = []
+    for _, match in results.sort_values('date').iterrows():
+        if pd.isna(match['home_goals']) or (before is not None and match['date'] >= pd.Timestamp(before)):
+            continue
+        for side, other in (('home', 'away'), ('away', 'home')):
+            if match[f'{side}_team'] == team and venue in ('all', side):
+                scored, conceded = match[f'{side}_goals'], match[f'{other}_goals']
+                rows.append({'scored': scored, 'conceded': conceded,
+                             'xg_for': np.nan_to_num(match[f'{side}_xg']),
+                             'xg_against': np.nan_to_num(match[f'{other}_xg']),
+                             'wins': float(scored > conceded), 'draws': float(scored == conceded),
+                             'losses': float(scored < conceded),
+                             'result': 'W' if scored > conceded else 'D' if scored == conceded else 'L'})
+    rows = rows[-window:]
+    sums = {metric: sum(row[metric] for row in rows) for metric in METRICS}
+    sums['matches'] = len(rows)
+    sums['form'] = ''.join(row['result'] for row in rows)
+    return sums
+
+
+# ============================================================================
+# WINDOWS
+# ============================================================================
+
+@pytest.mark.parametrize('venue', ['all', 'home', 'away'])
+def test_prefix_windows_match_naive_rolling_sums(venue):
+    results = random_results()
+    history = MatchHistory(results)
+    dates = sorted(results['date'].unique())
+
+    for window in (1, 3, 5, 8, 100):
+        for before in (None, dates[0], dates[7], dates[7] + pd.Timedelta(days=1)):
+            sums = history.window(window, TEAMS, venue, before)
+            forms = history.form_strings(window, TEAMS, venue, before)
+            for i, team in enumerate(TEAMS):
+                expected = naive_window(results, team, window, venue, before)
+                for metric in METRICS + ('matches',):
+                    assert np.isclose(sums[metric][i], expected[metric]), (window, before, team, metric)
+                assert forms[i] == expected['form'], (window, before, team)
+
+
+def test_per_team_cutoff_dates():
+    results = random_results()
+    history = MatchHistory(results)
+    dates = sorted(results['date'].unique())
+    cutoffs = [dates[i * 3] for i in range(len(TEAMS))]
+    sums = history.window(5, TEAMS, 'all', cutoffs)
+    for i, (team, cutoff) in enumerate(zip(TEAMS, cutoffs)):
+        assert sums['conceded'][i] == naive_window(results, team, 5, 'all', cutoff)['conceded']
+
+
+def test_invalid_lookups_raise():
+    history = MatchHistory(random_results(rounds=3))
+    with pytest.raises(ValueError, match='Unknown venue'):
+        history.window(5, venue='neutral')
+    with pytest.raises(ValueError, match='at least 1'):
+        history.window(0)
+    with pytest.raises(ValueError, match='Team not found'):
+        history.window(5, ['Nowhere FC'])
+    with pytest.raises(ValueError, match='Missing required columns'):
+        MatchHistory(pd.DataFrame({'date': []}))
+
+
+# ============================================================================
+# LEAGUE FRAMES
+# ============================================================================
+
+def test_with_window_rescales_to_five_matches():
+    results = random_results()
+    history = MatchHistory(results)
+    league = pd.read_csv(f"{SOURCE_LEAGUES_DIR}/serie_a.csv").head(len(TEAMS) + 1)
+    league['team'] = TEAMS + ['Unseen FC']
+
+    table = history.with_window(league, 8)
+    for i, team in enumerate(TEAMS):
+        for column, venue, metric in (('goals_scored_last_5', 'all', 'scored'),
+                                      ('home_goals_conceded_last_5', 'home', 'conceded')):
+            expected = naive_window(results, team, 8, venue)
+            assert np.isclose(table.loc[i, column], expected[metric] * 5 / expected['matches']), (team, column)
+    assert table.iloc[-1]['goals_scored_last_5'] == league.iloc[-1]['goals_scored_last_5']
+
+    # last_n_frame reports raw (unscaled) totals and form strings
+    five = history.last_n_frame(5, TEAMS)
+    for i, team in enumerate(TEAMS):
+        assert five.loc[i, 'goals_conceded_last_5'] == naive_window(results, team, 5, 'all')['conceded']
+        assert five.loc[i, 'form_last_5_away'] == naive_window(results, team, 5, 'away')['form']
+
+    features = history.feature_table(league, 8)
+    pd.testing.assert_frame_equal(features, BrutballDataLoader.build_feature_table(table))
@@ -0,0 +1,163 @@
+import itertools
+import math
+from collections.abc import Mapping
+
+import pytest
+
+from match_state_classifier import (
+    ELITE_DEFENSE_TEMPLATES, UNDER_35_BETS, WINNER_LOCK_TEMPLATE, CompletePatternDetector, PatternRecommendation,
+    PatternTemplate
+)
+
+def strip_timestamp(result: dict) -> dict:
+    return {key: value for key, value in result.items() if key != 'analysis_timestamp'}
+
+
+# ============================================================================
+# BATCH MODE
+# ============================================================================
+
+def test_batch_matches_original_per_match_analysis(baseline_patterns):
+    batch = CompletePatternDetector.analyze_matches_batch(
+        [case['home_conceded'] for case in baseline_patterns],
+        [case['away_conceded'] for case in baseline_patterns],
+        [case['metadata']['winner_lock_detected'] for case in baseline_patterns],
+        [case['metadata']['winner_delta_value'] for case in baseline_patterns],
+        [case['metadata']['winner_lock_team'] for case in baseline_patterns],
+        home_teams=[case['metadata']['home_team'] for case in baseline_patterns],
+        away_teams=[case['metadata']['away_team'] for case in baseline_patterns]
+    )
+
+    for i, case in enumerate(baseline_patterns):
+        expected = case['result']
+        assert CompletePatternDetector.PATTERN_COMBINATIONS[batch['pattern_combination'][i]] == \
+            expected['pattern_combination'], i
+        under_35 = expected['under_35_bet']
+        assert CompletePatternDetector.UNDER_35_PATTERNS[batch['pattern_combination'][i]] == \
+            (under_35['pattern'] if under_35 else None), i
+        assert bool(batch['has_elite_defense'][i]) == expected['has_elite_defense'], i
+        assert bool(batch['has_winner_lock'][i]) == expected['has_winner_lock'], i
+        if expected['recommendations']:
+            assert strip_timestamp(batch['details'][i]) == expected, i
+        else:
+            assert i not in batch['details'], i
+
+
+def nan_safe(value):
+    """NaN compared by value (each analysis makes its own NaN float)"""
+    if isinstance(value, dict):
+        return {key: nan_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [nan_safe(item) for item in value]
+    return 'NaN' if isinstance(value, float) and math.isnan(value) else value
+
+
+def test_batch_matches_per_match_analysis_on_missing_values():
+    nan = float('nan')
+    cases = list(itertools.product([nan, 1.0, 4.0, 6.0], [nan, 1.0, 6.0], [True, False], [nan, 0.5, 0.0, -1.0],
+                                   ['home', 'away', None]))
+    batch = CompletePatternDetector.analyze_matches_batch(*map(list, zip(*cases)))
+
+    for i, (home_conceded, away_conceded, detected, delta, side) in enumerate(cases):
+        metadata = {'home_team': 'Home', 'away_team': 'Away', 'winner_lock_detected': detected,
+                    'winner_lock_team': side or '', 'winner_delta_value': delta}
+        expected = CompletePatternDetector.analyze_match_complete(
+            {'goals_conceded_last_5': home_conceded}, {'goals_conceded_last_5': away_conceded}, metadata,
+            analysis_timestamp=batch['analysis_timestamp']
+        )
+        assert CompletePatternDetector.PATTERN_COMBINATIONS[batch['pattern_combination'][i]] == \
+            expected['pattern_combination'], cases[i]
+        if expected['recommendations']:
+            assert nan_safe(batch['details'][i]) == nan_safe(expected), cases[i]
+        else:
+            assert i not in batch['details'], cases[i]
+    # A NaN delta does not veto a detected lock, in either mode
+    assert batch['has_winner_lock'][cases.index((nan, nan, True, nan, 'home'))]
+
+
+def test_batch_without_winner_inputs_or_details():
+    batch = CompletePatternDetector.analyze_matches_batch([1, 6, 2], [5, 1, 3], materialize=False)
+    assert batch['has_elite_defense'].tolist() == [True, True, False]
+    assert not batch['has_winner_lock'].any()
+    assert batch['fired'].tolist() == [0, 1]
+    assert 'details' not in batch
+
+
+# ============================================================================
+# PER-MATCH ANALYSIS
+# ============================================================================
+
+def assert_plain(value, where=''):
+    """Only JSON-style containers: no Mapping views or shared tuples leak out"""
+    if isinstance(value, dict):
+        assert type(value) is dict, where
+        for key, item in value.items():
+            assert_plain(item, f'{where}.{key}')
+    else:
+        assert not isinstance(value, (tuple, Mapping)), where
+        if isinstance(value, list):
+            for i, item in enumerate(value):
+                assert_plain(item, f'{where}[{i}]')
+
+
+def test_analyze_match_complete_matches_original(baseline_patterns):
+    for i, case in enumerate(baseline_patterns):
+        result = CompletePatternDetector.analyze_match_complete(
+            {'goals_conceded_last_5': case['home_conceded']}, {'goals_conceded_last_5': case['away_conceded']},
+            case['metadata']
+        )
+        assert strip_timestamp(result) == case['result'], i
+        assert_plain(result, str(i))
+
+
+def test_detectors_return_shared_template_records():
+    elite = CompletePatternDetector.detect_elite_defense({'team_name': 'H', 'goals_conceded_last_5': 1},
+                                                         {'team_name': 'A', 'goals_conceded_last_5': 6})
+    winner = CompletePatternDetector.detect_winner_lock({'home_team': 'H', 'away_team': 'A',
+                                                         'winner_lock_detected': True, 'winner_lock_team': 'away',
+                                                         'winner_delta_value': 0.5})
+    under_35 = CompletePatternDetector.determine_under_35_bet(True, True)
+
+    assert [type(hit) for hit in (*elite, winner, under_35)] == [PatternRecommendation] * 3
+    assert elite[0].template is ELITE_DEFENSE_TEMPLATES['home'] and elite[0].values == ('A', 'H', 5, 1, 6)
+    assert winner.template is WINNER_LOCK_TEMPLATE and winner['team_to_bet'] == 'A'
+    assert under_35 is UNDER_35_BETS[3]
+    assert CompletePatternDetector.determine_under_35_bet(False, False) is None
+
+
+def test_results_do_not_share_pattern_data():
+    metadata = {'home_team': 'H', 'away_team': 'A', 'winner_lock_detected': True,
+                'winner_lock_team': 'home', 'winner_delta_value': 0.5}
+    first = CompletePatternDetector.analyze_match_complete(
+        {'goals_conceded_last_5': 1}, {'goals_conceded_last_5': 6}, metadata)
+    assert first['pattern_combination'] == 'BOTH_PATTERNS'
+    for recommendation in first['recommendations']:
+        recommendation['historical_evidence'].append('edited')
+        recommendation['stake_multiplier'] = 0
+    first['under_35_bet']['confidence'] = 'edited'
+
+    second = CompletePatternDetector.analyze_match_complete(
+        {'goals_conceded_last_5': 1}, {'goals_conceded_last_5': 6}, metadata)
+    for recommendation in second['recommendations']:
+        assert 'edited' not in recommendation['historical_evidence']
+        assert recommendation['stake_multiplier'] > 0
+    assert second['under_35_bet']['confidence'] == 'TIER_1_100'
+    assert ELITE_DEFENSE_TEMPLATES['home'].constants['historical_evidence'][-1] != 'edited'
+
+
+# ============================================================================
+# PATTERN TEMPLATES
+# ============================================================================
+
+def test_pattern_recommendation_formats_conditions_on_read():
+    hit = PatternRecommendation(WINNER_LOCK_TEMPLATE, ('Home (Double Chance)', 'home', 0.456))
+    assert hit['condition_2'] == "Δ = 0.46 (directional dominance)"
+    assert list(hit) == list(WINNER_LOCK_TEMPLATE.keys) and len(hit) == len(WINNER_LOCK_TEMPLATE.keys)
+    assert 'lock_team' in hit and 'missing' not in hit
+    plain = hit.to_dict()
+    assert list(plain) == list(hit)
+    assert plain['condition_2'] == hit['condition_2'] and plain['delta_value'] == 0.456
+    assert plain['historical_evidence'] == list(WINNER_LOCK_TEMPLATE.constants['historical_evidence'])
+    with pytest.raises(ValueError, match='Template keys'):
+        PatternTemplate(('pattern', 'extra'), (), {'pattern': 'P'})
+    assert UNDER_35_BETS[0] is None
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import prepare_history, run_backtest
+from brutball_rules import DEFAULT_RULES
+from parameter_sweep import (
+    STAT_COLUMNS, grid_configurations, pack_history, random_configurations, rank_configurations, run_sweep,
+    unpack_history
+)
+
+CONFIGURATIONS = grid_configurations({'tempo_xg': [1.2, 1.4], 'attack_clear': [0.8, 1.0, 1.2]})
+
+
+def backtest_metrics(history, parameters: dict) -> dict:
+    result = run_backtest(*history, rules=DEFAULT_RULES.with_parameters(**parameters), include_patterns=False)
+    return {row['rule']: (row['bets'], row['wins'], row['roi']) for _, row in result['summary'].iterrows()}
+
+
+# ============================================================================
+# SWEEP
+# ============================================================================
+
+def test_sweep_matches_backtest_per_configuration(history):
+    results = run_sweep(*history, CONFIGURATIONS, workers=1)
+    assert list(results.columns[:2]) == ['tempo_xg', 'attack_clear']
+
+    for parameters in CONFIGURATIONS:
+        selected = results[(results['tempo_xg'] == parameters['tempo_xg']) &
+                           (results['attack_clear'] == parameters['attack_clear'])]
+        expected = backtest_metrics(history, parameters)
+        rows = selected[selected['rule'] != 'ALL']
+        # The sweep also lists rules that placed no bets
+        assert sorted(rows.loc[rows['bets'] > 0, 'rule']) == sorted(expected)
+        rows = rows[rows['bets'] > 0]
+        for _, row in rows.iterrows():
+            bets, wins, roi = expected[row['rule']]
+            assert (row['bets'], row['wins']) == (bets, wins)
+            assert np.isclose(row['roi'], roi)
+
+        total = selected[selected['rule'] == 'ALL'].iloc[0]
+        assert total['bets'] == rows['bets'].sum() and total['wins'] == rows['wins'].sum()
+        # Every fixture gets a main certainty bet
+        assert total['coverage'] == 1.0
+
+
+def test_default_configuration_matches_backtest(history):
+    results = run_sweep(*history, [{}], workers=1)
+    expected = backtest_metrics(history, {})
+    rows = results[(results['rule'] != 'ALL') & (results['bets'] > 0)]
+    assert sorted(rows['rule']) == sorted(expected)
+    for _, row in rows.iterrows():
+        assert (row['bets'], row['wins']) == expected[row['rule']][:2]
+
+
+def test_parallel_sweep_matches_serial(history):
+    serial = run_sweep(*history, CONFIGURATIONS, workers=1)
+    parallel = run_sweep(*history, CONFIGURATIONS, workers=2, chunk_size=1)
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+def test_rank_configurations(history):
+    ranked = rank_configurations(run_sweep(*history, CONFIGURATIONS, workers=1), min_bets=1)
+    assert len(ranked) == len(CONFIGURATIONS)
+    assert set(ranked['rule']) == {'ALL'}
+    assert ranked['roi'].is_monotonic_decreasing
+
+
+# ============================================================================
+# CONFIGURATIONS AND SHARED HISTORY
+# ============================================================================
+
+def test_configuration_builders():
+    assert CONFIGURATIONS[:2] == [{'tempo_xg': 1.2, 'attack_clear': 0.8}, {'tempo_xg': 1.2, 'attack_clear': 1.0}]
+    drawn = random_configurations({'control_minimum': (1, 3), 'tempo_xg': (1.0, 2.0)}, 50, seed=4)
+    assert drawn == random_configurations({'control_minimum': (1, 3), 'tempo_xg': (1.0, 2.0)}, 50, seed=4)
+    assert {config['control_minimum'] for config in drawn} == {1, 2, 3}
+    assert all(1.0 <= config['tempo_xg'] < 2.0 for config in drawn)
+    with pytest.raises(ValueError, match='Unknown rule parameters'):
+        grid_configurations({'no_such_threshold': [1]})
+    with pytest.raises(ValueError, match='Unknown rule parameters'):
+        run_sweep(pd.DataFrame(), pd.DataFrame(), [{'no_such_threshold': 1}])
+
+
+def test_packed_history_round_trips(history):
+    prepared = prepare_history(*history)
+    unpacked = unpack_history(pack_history(prepared))
+    for side in ('home', 'away'):
+        pd.testing.assert_frame_equal(unpacked[side], prepared[side][STAT_COLUMNS].astype(np.float64))
+    assert unpacked['home_goals'].tolist() == prepared['fixtures']['home_goals'].tolist()
+    assert unpacked['away_goals'].tolist() == prepared['fixtures']['away_goals'].tolist()
@@ -0,0 +1,93 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from brutball_core import BrutballCertaintyEngine
+from conftest import ROOT
+from slate_scanner import JsonlSink, all_pairings, main, plan_slates, scan_slates
+
+
+def expected_rows(league_name: str, pairs, first_fixture: int = 0) -> pd.DataFrame:
+    engine = BrutballCertaintyEngine(league_name, analysis_cache=None)
+    frame = engine.analyze_fixtures(list(pairs))
+    frame['fixture_id'] += first_fixture
+    return frame
+
+
+def records(frame: pd.DataFrame) -> list:
+    """Rows as JSON values (nulls compare equal whichever way the format reads them back)"""
+    return json.loads(frame.to_json(orient='records'))
+
+
+# ============================================================================
+# OUTPUT
+# ============================================================================
+
+def test_jsonl_output_matches_analyze_fixtures(leagues_dir, tmp_path):
+    output = tmp_path / 'bets.jsonl'
+    assert main(['serie_a', '-o', str(output), '--batch-size', '7', '--leagues-dir', leagues_dir]) == 0
+
+    engine = BrutballCertaintyEngine('serie_a', analysis_cache=None)
+    expected = expected_rows('serie_a', all_pairings(engine.get_available_teams()))
+    written = pd.read_json(output, lines=True, dtype=False)
+    assert list(written.columns) == BrutballCertaintyEngine.FIXTURE_COLUMNS
+    assert records(written) == records(expected)
+
+
+def test_parquet_output_for_a_multi_league_fixtures_file(leagues_dir, tmp_path):
+    pytest.importorskip('pyarrow')
+    la_liga = BrutballCertaintyEngine('la_liga', analysis_cache=None).get_available_teams()
+    serie_a = BrutballCertaintyEngine('serie_a', analysis_cache=None).get_available_teams()
+    fixtures = pd.DataFrame({
+        'league': ['serie_a', 'la_liga', 'serie_a', 'la_liga'],
+        'home_team': [serie_a[0], la_liga[0], serie_a[2], la_liga[2]],
+        'away_team': [serie_a[1], la_liga[1], serie_a[3], la_liga[3]],
+    })
+    fixtures_path = tmp_path / 'slate.csv'
+    fixtures.to_csv(fixtures_path, index=False)
+    output = tmp_path / 'bets.parquet'
+    assert main(['all', '--fixtures', str(fixtures_path), '-o', str(output), '--batch-size', '1',
+                 '--leagues-dir', leagues_dir]) == 0
+
+    # Leagues in directory order; fixture ids continue across leagues
+    first = expected_rows('la_liga', [(la_liga[0], la_liga[1]), (la_liga[2], la_liga[3])])
+    second = expected_rows('serie_a', [(serie_a[0], serie_a[1]), (serie_a[2], serie_a[3])], first_fixture=2)
+    expected = pd.concat([first, second], ignore_index=True)
+    written = pd.read_parquet(output)
+    assert list(written.columns) == BrutballCertaintyEngine.FIXTURE_COLUMNS
+    assert records(written) == records(expected)
+
+
+def test_scan_reports_league_errors_and_keeps_going(leagues_dir):
+    stream = io.StringIO()
+    slates = [('serie_a', [('Nowhere FC', 'Inter')]), ('missing', None), ('ligue_1', None)]
+    summary = scan_slates(slates, JsonlSink(stream), leagues_dir, batch_size=50)
+    assert set(summary['errors']) == {'serie_a', 'missing'}
+    teams = len(BrutballCertaintyEngine('ligue_1', analysis_cache=None).get_available_teams())
+    assert summary['fixtures'] == teams * (teams - 1)
+    assert len(stream.getvalue().splitlines()) == summary['recommendations']
+
+
+def test_plan_slates_validates_fixtures(leagues_dir):
+    fixtures = pd.DataFrame({'home_team': ['A'], 'away_team': ['B']})
+    assert plan_slates('serie_a', fixtures, leagues_dir) == [('serie_a', [('A', 'B')])]
+    with pytest.raises(ValueError, match='league column'):
+        plan_slates('all', fixtures, leagues_dir)
+    with pytest.raises(ValueError, match='League not found'):
+        plan_slates('all', fixtures.assign(league='nowhere'), leagues_dir)
+    assert main(['all', '--fixtures', os.path.join(leagues_dir, 'missing.csv'), '--leagues-dir', leagues_dir]) == 2
+
+
+# ============================================================================
+# HEADLESS IMPORT
+# ============================================================================
+
+def test_import_does_not_load_the_ui():
+    code = "import sys, slate_scanner; print(sorted(m for m in ('app', 'streamlit') if m in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == '[]'
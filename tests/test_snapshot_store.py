@@ -0,0 +1,98 @@
+import os
+
+import pandas as pd
+import pytest
+
+from backtest import run_backtest
+from brutball_core import BrutballDataLoader
+from conftest import SOURCE_LEAGUES_DIR
+from snapshot_store import LeagueSnapshotStore
+
+
+def snapshot_tables(snapshots: pd.DataFrame, league_name: str):
+    """(as_of, table) per snapshot date of one league, in time order"""
+    rows = snapshots[snapshots['league'] == league_name]
+    for as_of, table in rows.groupby('as_of', sort=True):
+        yield as_of, table.drop(columns=['league', 'as_of']).reset_index(drop=True)
+
+
+@pytest.fixture
+def store(tmp_path, history):
+    store = LeagueSnapshotStore(str(tmp_path / 'snapshots'))
+    for league_name in ('bundesliga', 'serie_a'):
+        for as_of, table in snapshot_tables(history[1], league_name):
+            store.append(league_name, table, as_of)
+    return store
+
+
+# ============================================================================
+# ROUND TRIP
+# ============================================================================
+
+def test_every_version_reads_back_as_appended(store, history):
+    reopened = LeagueSnapshotStore(store.root)
+    assert reopened.get_leagues() == ['bundesliga', 'serie_a']
+    for league_name in reopened.get_leagues():
+        for version, (as_of, table) in enumerate(snapshot_tables(history[1], league_name)):
+            assert reopened.get_versions(league_name)['as_of'][version] == as_of
+            pd.testing.assert_frame_equal(reopened.get_frame(league_name, version), table, check_dtype=False)
+            pd.testing.assert_frame_equal(reopened.as_of(league_name, as_of), table, check_dtype=False)
+
+
+def test_unchanged_rows_are_referenced_not_stored(tmp_path):
+    store = LeagueSnapshotStore(str(tmp_path))
+    df = BrutballDataLoader.load_csv(os.path.join(SOURCE_LEAGUES_DIR, 'ligue_1.csv'), use_cache=False)
+    assert store.append('ligue_1', df, '2024-01-01')['new_rows'] == len(df)
+
+    changed = df.copy()
+    changed.loc[3, 'home_goals_scored'] += 1
+    assert store.append('ligue_1', df, '2024-01-02')['new_rows'] == 0
+    report = store.append('ligue_1', changed, '2024-01-03')
+    assert (report['new_rows'], report['reused_rows']) == (1, len(df) - 1)
+    # A schema change stores every row again
+    assert store.append('ligue_1', changed.assign(extra=1), '2024-01-04')['new_rows'] == len(df)
+
+    for version, expected in enumerate((df, df, changed, changed.assign(extra=1))):
+        pd.testing.assert_frame_equal(store.get_frame('ligue_1', version), expected, check_dtype=False)
+
+
+def test_history_feeds_the_backtest(store, history):
+    fixtures, snapshots = history
+    stored = store.get_history()
+    expected = run_backtest(fixtures, snapshots)['summary']
+    pd.testing.assert_frame_equal(run_backtest(fixtures, stored)['summary'], expected)
+
+
+# ============================================================================
+# AS-OF LOOKUPS
+# ============================================================================
+
+def test_find_version(store):
+    versions = store.get_versions('serie_a')
+    first, second = versions['as_of'][0], versions['as_of'][1]
+    assert store.find_version('serie_a', first - pd.Timedelta(seconds=1)) is None
+    assert store.find_version('serie_a', first) == 0
+    assert store.find_version('serie_a', first, strict=True) is None
+    assert store.find_version('serie_a', second - pd.Timedelta(seconds=1)) == 0
+    assert store.find_version('serie_a', pd.Timestamp(second).tz_localize('Europe/Rome')) == 0
+    assert store.find_version('serie_a', '2099-01-01') == len(versions) - 1
+    assert store.as_of('serie_a', '2000-01-01') is None
+    assert store.find_version('missing', '2024-01-01') is None
+
+
+def test_get_engine_uses_the_table_before_the_date(store):
+    second = store.get_versions('serie_a')['as_of'][1]
+    engine = store.get_engine('serie_a', second)
+    assert engine.analysis_cache is None
+    pd.testing.assert_frame_equal(engine.df, store.get_frame('serie_a', 0))
+    assert engine.data_version[1] == 0
+    with pytest.raises(ValueError, match='No snapshot'):
+        store.get_engine('serie_a', store.get_versions('serie_a')['as_of'][0])
+
+
+def test_appends_must_move_forward(store):
+    latest = store.get_versions('serie_a')['as_of'].iloc[-1]
+    with pytest.raises(ValueError, match='not after'):
+        store.append('serie_a', store.get_frame('serie_a', 0), latest)
+    with pytest.raises(ValueError, match='No snapshot version'):
+        store.get_frame('serie_a', 99)